@@ -1,13 +1,26 @@
-from fastapi import FastAPI, Request
+import asyncio
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import RedirectResponse
 
-from starlette.middleware.sessions import SessionMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from database.init_db import init_db, SessionLocal
-from models.ledger_entry import LedgerEntry
-from services.analytics_service import generate_analytics
+from database.async_db import async_engine, async_read_engine, get_async_read_db
+from database.init_db import init_db
+from services.analytics_service import cached_analytics_async
+from services.access_service import require_admin
+from services.anchor_service import anchorer
+from services.cache_service import cache
+from services.ledger_service import list_ledger_page_async, recent_ledger_async
+from services.event_hub import hub
+from services.ledger_writer import ledger_writer
+from services.metrics_service import MetricsMiddleware, instrument_templates
+from services.rollup_service import rollup_job
+from services.session_service import SessionStoreMiddleware
+from services.transaction_service import ACTIVE_STATUSES
 
 # --------------------------------------------------
 # ROUTERS (CORRECT WAY)
@@ -21,6 +34,16 @@ from routes import (
     analytics_router
 )
 from routes import dashboard as dashboard_api  # API dashboard only
+from routes import ledger_api                   # ledger proofs / paging
+from routes import documents_api                # blob store upload / download
+from routes import export_api                   # streaming NDJSON / CSV exports
+from routes import import_api                   # bulk historical imports
+from routes import transactions_api             # status transitions / history
+from routes import analytics_api                # rollup time series
+from routes import events_api                   # live dashboard events (SSE)
+from routes import metrics_api                  # Prometheus /metrics
+from routes import anchor_api                   # Merkle-root anchoring receipts
+from routes import sessions_api                 # forced logout / session stats
 
 # --------------------------------------------------
 # App initialization
@@ -28,25 +51,44 @@ from routes import dashboard as dashboard_api  # API dashboard only
 app = FastAPI(title="TradeChain – Trade Finance Blockchain Explorer")
 
 # --------------------------------------------------
-# SESSION MIDDLEWARE
+# METRICS (added first so it runs inside the session middleware
+# and can see the logged-in user for ?profile=1)
 # --------------------------------------------------
-app.add_middleware(
-    SessionMiddleware,
-    secret_key="tradechain-secret-key-123"
-)
+app.add_middleware(MetricsMiddleware)
+
+# --------------------------------------------------
+# SESSION MIDDLEWARE (server-side store, opaque id cookie;
+# TRADECHAIN_SESSION_BACKEND=sqlite to share it between workers)
+# --------------------------------------------------
+app.add_middleware(SessionStoreMiddleware)
 
 # --------------------------------------------------
 # Startup event
 # --------------------------------------------------
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     init_db()
+    hub.bind(asyncio.get_running_loop())
+    ledger_writer.start()
+    rollup_job.start()
+    anchorer.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await rollup_job.stop()
+    # Seal queued document hashes; unsubmitted batches stay pending
+    await run_in_threadpool(anchorer.stop)
+    # Flush queued ledger entries before the worker exits
+    await run_in_threadpool(ledger_writer.stop)
+    await async_engine.dispose()
+    await async_read_engine.dispose()
 
 # --------------------------------------------------
 # Static files & templates
 # --------------------------------------------------
 app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
+templates = instrument_templates(Jinja2Templates(directory="templates"))
 
 # --------------------------------------------------
 # ROOT → FORCE LOGIN FIRST
@@ -64,93 +106,117 @@ app.include_router(user_router)   # /auth/signup , /auth/login , /auth/logout
 # DASHBOARD UI
 # --------------------------------------------------
 @app.get("/dashboard")
-def dashboard_ui(request: Request):
+async def dashboard_ui(request: Request,
+                       db: AsyncSession = Depends(get_async_read_db)):
     user_data = request.session.get("user")
 
     if not user_data:
         return RedirectResponse("/auth/login", status_code=303)
 
-    db = SessionLocal()
+    # ---------- SAFE ANALYTICS ----------
+    analytics_data = {
+        "documents_by_type": {},
+        "trades_by_status": {},
+        "risk_distribution": {},
+        "ledger_activity_count": 0
+    }
 
     try:
-        # ---------- SAFE ANALYTICS ----------
-        analytics_data = {
-            "documents_by_type": {},
-            "trades_by_status": {},
-            "risk_distribution": {},
-            "ledger_activity_count": 0
+        data = await cached_analytics_async(db)
+        if isinstance(data, dict):
+            analytics_data.update(data)
+    except Exception as e:
+        print("ANALYTICS ERROR:", e)
+
+    # ---------- METRICS ----------
+    total_documents = sum(
+        analytics_data.get("documents_by_type", {}).values()
+    )
+
+    # counter keys are lower-cased status names
+    trades_by_status = analytics_data.get("trades_by_status", {})
+    active_transactions = sum(
+        trades_by_status.get(status.lower(), 0) for status in ACTIVE_STATUSES
+    )
+
+    verified_today = analytics_data.get("ledger_activity_count", 0)
+    avg_risk_score = "Auto"
+
+    # ---------- LEDGER ----------
+    recent_entries = []
+    try:
+        recent_entries = await recent_ledger_async(db)
+    except Exception as e:
+        print("LEDGER ERROR:", e)
+
+    # ---------- RENDER ----------
+    return templates.TemplateResponse(
+        "dashboard.html",
+        {
+            "request": request,
+            "total_documents": total_documents,
+            "active_transactions": active_transactions,
+            "verified_today": verified_today,
+            "avg_risk_score": avg_risk_score,
+            "recent_ledger": recent_entries,
+            "analytics": analytics_data,
+
+            # USER DATA
+            "user_name": user_data.get("name"),
+            "user_email": user_data.get("email"),
+            "user_role": user_data.get("role"),
+            "user_org": user_data.get("org")
         }
+    )
 
-        try:
-            data = generate_analytics(db)
-            if isinstance(data, dict):
-                analytics_data.update(data)
-        except Exception as e:
-            print("ANALYTICS ERROR:", e)
-
-        # ---------- METRICS ----------
-        total_documents = sum(
-            analytics_data.get("documents_by_type", {}).values()
-        )
-
-        active_transactions = (
-            analytics_data
-            .get("trades_by_status", {})
-            .get("in_progress", 0)
-        )
-
-        verified_today = analytics_data.get("ledger_activity_count", 0)
-        avg_risk_score = "Auto"
-
-        # ---------- LEDGER ----------
-        recent_ledger = []
-        try:
-            ledger_entries = (
-                db.query(LedgerEntry)
-                .order_by(LedgerEntry.timestamp.desc())
-                .limit(5)
-                .all()
-            )
-
-            for entry in ledger_entries:
-                recent_ledger.append({
-                    "document_id": entry.document_id,
-                    "action": entry.action,
-                    "actor": entry.actor_role,
-                    "timestamp": entry.timestamp
-                })
-        except Exception as e:
-            print("LEDGER ERROR:", e)
-
-        # ---------- RENDER ----------
-        return templates.TemplateResponse(
-            "dashboard.html",
-            {
-                "request": request,
-                "total_documents": total_documents,
-                "active_transactions": active_transactions,
-                "verified_today": verified_today,
-                "avg_risk_score": avg_risk_score,
-                "recent_ledger": recent_ledger,
-                "analytics": analytics_data,
-
-                # USER DATA
-                "user_name": user_data.get("name"),
-                "user_email": user_data.get("email"),
-                "user_role": user_data.get("role"),
-                "user_org": user_data.get("org")
-            }
-        )
-
-    finally:
-        db.close()
+# --------------------------------------------------
+# LEDGER EXPLORER UI
+# (first keyset page; ledger.js follows next_cursor via /ledger/entries)
+# --------------------------------------------------
+@app.get("/ledger")
+async def ledger_ui(request: Request,
+                    db: AsyncSession = Depends(get_async_read_db)):
+    if not request.session.get("user"):
+        return RedirectResponse("/auth/login", status_code=303)
+
+    entries, next_cursor = [], None
+    try:
+        entries, next_cursor = await list_ledger_page_async(db)
+    except Exception as e:
+        print("LEDGER ERROR:", e)
+
+    return templates.TemplateResponse(
+        "ledger.html",
+        {
+            "request": request,
+            "ledger": entries,
+            "next_cursor": next_cursor
+        }
+    )
+
+# --------------------------------------------------
+# CACHE METRICS
+# --------------------------------------------------
+@app.get("/cache/stats")
+def cache_stats(user: dict = Depends(require_admin)):
+    return cache.describe()
 
 # --------------------------------------------------
 # MODULE ROUTES (CORRECT)
 # --------------------------------------------------
+app.include_router(documents_api.router) # /documents/store , /documents/{id}/content
 app.include_router(documents_router)     # /documents/*
 app.include_router(ledger_router)        # /ledger/*
+app.include_router(ledger_api.router)    # /ledger/checkpoints , /ledger/proof/*
+app.include_router(transactions_api.router)  # /transactions/{id}/status , /transactions/active
 app.include_router(transactions_router)  # /transactions/*
 app.include_router(risk_router)          # /risk/*
+app.include_router(analytics_api.router) # /analytics/series
 app.include_router(analytics_router)     # /analytics/*
+app.include_router(events_api.router)    # /events/stream
+app.include_router(metrics_api.router)   # /metrics
+app.include_router(export_api.router)    # /export/{ledger,transactions,documents}
+app.include_router(import_api.router)    # /import/{transactions,documents,ledger}
+app.include_router(anchor_api.router)    # /anchor/receipts/{hash} , /anchor/batches
+app.include_router(sessions_api.router)  # /sessions/users/{email} , /sessions/stats
 
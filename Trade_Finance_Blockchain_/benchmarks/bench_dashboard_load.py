@@ -0,0 +1,109 @@
+"""
+Dashboard data path under concurrent load: sync handler + SessionLocal
+(old) versus async handler + AsyncSession (new).
+
+Both handlers run the same queries (analytics counters + 5 newest ledger
+entries) with the cache bypassed, inside one in-process ASGI app driven
+by httpx, so the difference is the threadpool vs. event-loop model.
+
+Usage (from Trade_Finance_Blockchain_/):
+    python -m benchmarks.bench_dashboard_load --clients 200 --requests 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.async_db import get_async_read_db
+from database.init_db import SessionLocal, init_db
+from services.analytics_service import generate_analytics, generate_analytics_async
+from services.ledger_service import (
+    RECENT_LEDGER_LIMIT,
+    list_ledger_page,
+    list_ledger_page_async,
+    log_ledger_many
+)
+
+bench_app = FastAPI()
+
+
+@bench_app.get("/sync")
+def dashboard_sync():
+    db = SessionLocal()
+    try:
+        analytics = generate_analytics(db)
+        entries, _ = list_ledger_page(db, limit=RECENT_LEDGER_LIMIT)
+        return {"analytics": analytics, "recent": entries}
+    finally:
+        db.close()
+
+
+@bench_app.get("/async")
+async def dashboard_async(db: AsyncSession = Depends(get_async_read_db)):
+    analytics = await generate_analytics_async(db)
+    entries, _ = await list_ledger_page_async(db, limit=RECENT_LEDGER_LIMIT)
+    return {"analytics": analytics, "recent": entries}
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _drive(path: str, clients: int, per_client: int):
+    latencies = []
+    transport = httpx.ASGITransport(app=bench_app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in range(per_client):
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2)
+    }
+
+
+def run(clients: int, per_client: int, seed_entries: int):
+    init_db()
+    db = SessionLocal()
+    try:
+        if not list_ledger_page(db, limit=1)[0]:
+            log_ledger_many(db, [
+                (i % 500, "UPLOAD", "bank") for i in range(seed_entries)
+            ])
+    finally:
+        db.close()
+
+    for path in ("/sync", "/async"):
+        result = asyncio.run(_drive(path, clients, per_client))
+        print(
+            f"{result['path']:<7} {result['requests']:>6} req "
+            f"{result['rps']:>9} req/s  p50 {result['p50_ms']:>8} ms  "
+            f"p99 {result['p99_ms']:>8} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=10,
+                        help="requests per client")
+    parser.add_argument("--seed-entries", type=int, default=10000)
+    args = parser.parse_args()
+    run(args.clients, args.requests, args.seed_entries)
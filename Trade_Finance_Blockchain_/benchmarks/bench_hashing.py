@@ -0,0 +1,72 @@
+"""
+Compares whole-file generate_hash() against the streaming hashers.
+
+Usage (from Trade_Finance_Blockchain_/):
+    python -m benchmarks.bench_hashing --size-mb 200
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+from services.blockchain_service import generate_hash, hash_file, hash_upload
+
+
+def _make_file(size_mb: int):
+    fd, path = tempfile.mkstemp(suffix=".bin")
+    block = os.urandom(1024 * 1024)
+    with os.fdopen(fd, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+    return path
+
+
+def _measure(label, fn, size_mb):
+    tracemalloc.start()
+    start = time.perf_counter()
+    digest = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{label:<22} {elapsed * 1000:9.1f} ms "
+        f"{size_mb / elapsed:9.1f} MB/s "
+        f"peak {peak / (1024 * 1024):8.2f} MB"
+    )
+    return digest
+
+
+def run(size_mb: int):
+    path = _make_file(size_mb)
+    try:
+        def whole_file():
+            with open(path, "rb") as f:
+                return generate_hash(f.read())
+
+        def streaming():
+            return hash_file(path).digest
+
+        def streaming_async():
+            async def go():
+                with open(path, "rb") as f:
+                    return (await hash_upload(f)).digest
+            return asyncio.run(go())
+
+        print(f"file size: {size_mb} MB")
+        results = {
+            _measure("generate_hash (bytes)", whole_file, size_mb),
+            _measure("hash_file", streaming, size_mb),
+            _measure("hash_upload (async)", streaming_async, size_mb),
+        }
+        assert len(results) == 1, "digests differ"
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=100)
+    run(parser.parse_args().size_mb)
@@ -0,0 +1,80 @@
+"""
+Batch risk recomputation at scale.
+
+Seeds N users with random document/transaction activity into a scratch
+SQLite file, then times a full and an incremental recompute.
+
+Usage (from Trade_Finance_Blockchain_/):
+    python -m benchmarks.bench_risk --users 1000000
+"""
+import argparse
+import datetime
+import os
+import random
+import tempfile
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from database.sqlite_profile import create_write_engine
+from models.base import Base
+from models.document import Document
+from models.transaction import TradeTransaction
+from models.user import User
+from services.risk_service import recompute_risk_scores
+
+SEED_CHUNK = 50000
+
+
+def _seed(db, users: int):
+    rng = random.Random(42)
+    email = "user{}@bench.local".format
+
+    for lo in range(0, users, SEED_CHUNK):
+        ids = range(lo, min(lo + SEED_CHUNK, users))
+        db.execute(insert(User), [
+            {"id": i + 1, "name": f"u{i}", "email": email(i), "password": "x",
+             "role": "buyer", "org_name": "bench"} for i in ids
+        ])
+        db.execute(insert(Document), [
+            {"filename": "f.pdf", "document_type": "INVOICE", "owner_email": email(i)}
+            for i in ids for _ in range(rng.randint(0, 4))
+        ])
+        db.execute(insert(TradeTransaction), [
+            {"buyer_email": email(i), "seller_email": email(rng.randrange(users))}
+            for i in ids for _ in range(rng.randint(0, 2))
+        ])
+    db.commit()
+
+
+def run(users: int, changed: int):
+    path = os.path.join(tempfile.mkdtemp(), "bench_risk.db")
+    engine = create_write_engine("sqlite:///" + path)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    try:
+        _seed(db, users)
+        print("full:       ", recompute_risk_scores(db))
+
+        later = datetime.datetime.utcnow() + datetime.timedelta(seconds=1)
+        db.execute(insert(Document), [
+            {"filename": "f.pdf", "document_type": "INVOICE",
+             "owner_email": f"user{i}@bench.local", "uploaded_at": later}
+            for i in range(changed)
+        ])
+        db.commit()
+        print("incremental:", recompute_risk_scores(db, incremental=True))
+    finally:
+        db.close()
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--changed", type=int, default=1000,
+                        help="users touched before the incremental run")
+    args = parser.parse_args()
+    run(args.users, args.changed)
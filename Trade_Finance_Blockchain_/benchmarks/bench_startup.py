@@ -0,0 +1,95 @@
+"""
+Cold start to first response.
+
+Every run is a fresh interpreter that imports the app, runs its startup
+hooks and serves one request in-process, timing each phase:
+  - current: the app as shipped (schema version check, lazy NumPy)
+  - eager:   the previous behaviour, emulated by importing NumPy up
+             front and running create_all over every model at startup
+
+Run it against an existing database (e.g. one made by benchmarks.datagen):
+    python -m benchmarks.bench_startup --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.results import save_results
+
+PHASES = ("import_ms", "startup_ms", "first_response_ms", "total_ms")
+
+_CHILD = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+eager = sys.argv[1] == "eager"
+if eager:
+    import numpy
+import httpx
+t0 = time.perf_counter()
+from app import app
+t1 = time.perf_counter()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        if eager:
+            from database.init_db import engine
+            from models.base import Base
+            Base.metadata.create_all(bind=engine)
+        t2 = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/ledger/entries?limit=5")
+            response.raise_for_status()
+        t3 = time.perf_counter()
+    return t2, t3
+
+t2, t3 = asyncio.run(main())
+print(json.dumps({
+    "import_ms": (t1 - t0 + (t0 - started if eager else 0)) * 1000,
+    "startup_ms": (t2 - t1) * 1000,
+    "first_response_ms": (t3 - t2) * 1000,
+    "total_ms": (t3 - started) * 1000
+}))
+"""
+
+
+def _run_child(mode: str):
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD, mode],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(runs: int):
+    # warm the OS file cache and bring the schema up to date first
+    _run_child("current")
+
+    results = {}
+    for mode in ("eager", "current"):
+        samples = [_run_child(mode) for _ in range(runs)]
+        results[mode] = {
+            phase: round(statistics.median(s[phase] for s in samples), 1)
+            for phase in PHASES
+        }
+        print(f"{mode:<8} " + "  ".join(
+            f"{phase[:-3]} {results[mode][phase]:>7} ms" for phase in PHASES
+        ))
+
+    results["total_saved_ms"] = round(
+        results["eager"]["total_ms"] - results["current"]["total_ms"], 1
+    )
+    print(f"saved {results['total_saved_ms']} ms per cold start")
+    save_results("startup", {"runs": runs}, results)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    run(parser.parse_args().runs)
@@ -0,0 +1,206 @@
+"""
+Synthetic data for benchmarks: users, documents, transactions (with
+status history) and ledger entries, written into the database named by
+DATABASE_URL. Point it at a scratch file:
+
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.datagen \\
+        --users 10000 --documents 50000 --transactions 100000 --ledger 2000000
+
+All users share the password BENCH_PASSWORD so the load driver can
+log in as any of them.
+"""
+import argparse
+import datetime
+import random
+import time
+
+from sqlalchemy import func, insert, select
+
+from database.init_db import SessionLocal, init_db
+from models.document import Document
+from models.transaction import TradeTransaction
+from models.transaction_history import TransactionStatusHistory
+from models.user import User
+from benchmarks.results import save_results
+from services.counter_service import rebuild_counters
+from services.ledger_service import log_ledger_many
+from services.rollup_service import update_rollups
+from services.transaction_service import TRANSITIONS
+
+BENCH_PASSWORD = "benchpass"
+CHUNK = 10000
+ROLES = ("buyer", "seller", "bank")
+DOCUMENT_TYPES = ("KYC", "Purchase Order", "Invoice", "Shipping", "Bank")
+# vocabulary for extracted document text (search benchmarks)
+WORDS = ("invoice", "letter", "credit", "cargo", "steel", "shipment", "rotterdam",
+         "shanghai", "payment", "bill", "lading", "insurance", "customs", "vessel",
+         "container", "amount", "due", "beneficiary", "issuing", "bank", "goods",
+         "origin", "certificate", "inspection", "freight", "port", "draft", "terms")
+LEDGER_ACTIONS = ("UPLOAD", "VERIFY", "AMEND", "APPROVE")
+# 5 x 365 days of history
+SPAN = datetime.timedelta(days=5 * 365)
+
+try:
+    from passlib.context import CryptContext
+    _pwd = CryptContext(schemes=["bcrypt"])
+except ImportError:
+    _pwd = None
+
+
+def bench_email(i: int):
+    return f"user{i}@bench.local"
+
+
+def _password_hash():
+    return _pwd.hash(BENCH_PASSWORD) if _pwd else BENCH_PASSWORD
+
+
+def _chunks(total: int, size: int = CHUNK):
+    for lo in range(0, total, size):
+        yield range(lo, min(lo + size, total))
+
+
+COUNTERPARTIES = tuple(
+    f"{head}{tail}" for head in ("acme", "globex", "initech", "umbrella", "stark",
+                                 "wayne", "tyrell", "cyberdyne", "hooli", "vandelay")
+    for tail in ("trading", "shipping", "metals", "foods", "textiles",
+                 "marine", "steel", "grain", "energy", "chemicals")
+)
+
+
+def _text(rng, words: int = 40):
+    # common trade vocabulary, a counterparty and a unique reference
+    body = [rng.choice(WORDS) for _ in range(words)]
+    body.insert(rng.randrange(words), rng.choice(COUNTERPARTIES))
+    body.append(f"ref{rng.randrange(10 ** 7):07d}")
+    return " ".join(body)
+
+
+def _timestamp(rng, now):
+    return now - SPAN * rng.random()
+
+
+def _path_to(status: str):
+    """
+    Statuses visited from CREATED to status along TRANSITIONS.
+    """
+    path = ["CREATED"]
+    while path[-1] != status and TRANSITIONS.get(path[-1]):
+        following = TRANSITIONS[path[-1]]
+        path.append(status if status in following else following[0])
+    return path
+
+
+def _report(results, label, count, started):
+    elapsed = time.perf_counter() - started
+    rate = round(count / elapsed) if elapsed else 0
+    print(f"{label:<16} {count:>10} rows  {elapsed:8.1f}s  {rate:>9} rows/s")
+    results[label] = {"rows": count, "seconds": round(elapsed, 3), "rows_per_second": rate}
+
+
+def generate(users: int, documents: int, transactions: int, ledger: int, seed: int = 42):
+    init_db()
+    rng = random.Random(seed)
+    now = datetime.datetime.utcnow()
+    db = SessionLocal()
+    results = {}
+
+    try:
+        # ---------- USERS ----------
+        started = time.perf_counter()
+        first = (db.execute(select(func.max(User.id))).scalar() or 0) + 1
+        password = _password_hash()
+        for ids in _chunks(users):
+            db.execute(insert(User), [
+                {"name": f"Bench User {first + i}", "email": bench_email(first + i),
+                 "password": password, "role": ROLES[i % len(ROLES)],
+                 "org_name": f"Org {(first + i) % 97}"}
+                for i in ids
+            ])
+            db.commit()
+        _report(results, "users", users, started)
+        user_count = first + users - 1
+
+        # ---------- DOCUMENTS ----------
+        started = time.perf_counter()
+        for ids in _chunks(documents):
+            db.execute(insert(Document), [
+                {"filename": f"doc-{rng.randrange(10 ** 9)}.pdf",
+                 "document_type": rng.choice(DOCUMENT_TYPES),
+                 "owner_email": bench_email(rng.randint(1, user_count)),
+                 "uploaded_at": _timestamp(rng, now),
+                 "extracted_text": _text(rng)}
+                for _ in ids
+            ])
+            db.commit()
+        _report(results, "documents", documents, started)
+
+        # ---------- TRANSACTIONS + HISTORY ----------
+        started = time.perf_counter()
+        statuses = list(TRANSITIONS)
+        for ids in _chunks(transactions):
+            rows = []
+            for _ in ids:
+                created = _timestamp(rng, now)
+                rows.append({
+                    "buyer_email": bench_email(rng.randint(1, user_count)),
+                    "seller_email": bench_email(rng.randint(1, user_count)),
+                    "status": rng.choice(statuses),
+                    "created_at": created
+                })
+            tx_ids = db.execute(
+                insert(TradeTransaction).returning(
+                    TradeTransaction.id, sort_by_parameter_order=True
+                ), rows
+            ).scalars().all()
+
+            history = []
+            for tx_id, row in zip(tx_ids, rows):
+                changed = row["created_at"]
+                previous = None
+                for status in _path_to(row["status"]):
+                    history.append({"transaction_id": tx_id, "from_status": previous,
+                                    "to_status": status, "actor": "datagen",
+                                    "changed_at": changed})
+                    previous = status
+                    changed += datetime.timedelta(hours=rng.randint(1, 72))
+            db.execute(insert(TransactionStatusHistory), history)
+            db.commit()
+        _report(results, "transactions", transactions, started)
+
+        # ---------- LEDGER ----------
+        started = time.perf_counter()
+        max_document = db.execute(select(func.max(Document.id))).scalar() or 1
+        stamps = sorted(_timestamp(rng, now) for _ in range(ledger))
+        log_ledger_many(db, (
+            (rng.randint(1, max_document), rng.choice(LEDGER_ACTIONS),
+             rng.choice(ROLES), stamp)
+            for stamp in stamps
+        ), chunk_size=CHUNK)
+        _report(results, "ledger", ledger, started)
+
+        # ---------- DERIVED ----------
+        started = time.perf_counter()
+        rebuild_counters(db)
+        update_rollups(db)
+        _report(results, "counters+rollups", users + documents + transactions + ledger, started)
+    finally:
+        db.close()
+
+    save_results("datagen", {
+        "users": users, "documents": documents, "transactions": transactions,
+        "ledger": ledger, "seed": seed
+    }, results)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--documents", type=int, default=50000)
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--ledger", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    generate(args.users, args.documents, args.transactions, args.ledger, args.seed)
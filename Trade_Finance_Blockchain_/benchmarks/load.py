@@ -0,0 +1,160 @@
+"""
+In-process load driver for the full app.
+
+Runs the app's startup/shutdown hooks and drives it through httpx's ASGI
+transport, so no server or network is involved. Every virtual client
+has its own cookie jar and logs in as a different datagen user before
+its requests are timed.
+
+Scenarios:
+    login      POST /auth/login (password check)
+    dashboard  GET /dashboard
+    ledger     GET /ledger/entries
+    upload     POST /documents/store
+
+Seed the database with benchmarks.datagen first, then
+(from Trade_Finance_Blockchain_/):
+    python -m benchmarks.load --clients 50 --requests 20
+    python -m benchmarks.load --scenarios dashboard ledger --clients 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+from benchmarks.datagen import BENCH_PASSWORD, bench_email
+from benchmarks.results import save_results
+
+SCENARIOS = ("login", "dashboard", "ledger", "upload")
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+# --------------------------------------------------
+# REQUESTS
+# --------------------------------------------------
+def _login(client, user: int):
+    return client.post("/auth/login", data={
+        "email": bench_email(user), "password": BENCH_PASSWORD
+    })
+
+
+def _dashboard(client, user: int):
+    return client.get("/dashboard")
+
+
+def _ledger(client, user: int):
+    return client.get("/ledger/entries")
+
+
+def _upload(client, user: int, upload_kb: int):
+    return client.post(
+        "/documents/store",
+        data={"doc_type": "Invoice"},
+        files={"file": (f"bench-{user}.pdf", os.urandom(upload_kb * 1024),
+                        "application/pdf")}
+    )
+
+
+# --------------------------------------------------
+# DRIVER
+# --------------------------------------------------
+async def _drive(app, scenario: str, clients: int, per_client: int,
+                 users: int, upload_kb: int):
+    latencies = []
+    errors = 0
+    transport = httpx.ASGITransport(app=app)
+
+    def request(client, user):
+        if scenario == "login":
+            return _login(client, user)
+        if scenario == "dashboard":
+            return _dashboard(client, user)
+        if scenario == "ledger":
+            return _ledger(client, user)
+        return _upload(client, user, upload_kb)
+
+    async def virtual_client(n: int):
+        nonlocal errors
+        user = n % users + 1
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            if scenario != "login":
+                response = await _login(client, user)
+                if response.status_code >= 400:
+                    errors += per_client
+                    return
+
+            for _ in range(per_client):
+                start = time.perf_counter()
+                try:
+                    response = await request(client, user)
+                    failed = response.status_code >= 400
+                except Exception as e:
+                    print("LOAD ERROR:", e)
+                    failed = True
+                latencies.append(time.perf_counter() - start)
+                errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_client(n) for n in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2)
+    }
+
+
+async def _run_all(scenarios, clients: int, per_client: int,
+                   users: int, upload_kb: int):
+    from app import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        for scenario in scenarios:
+            result = await _drive(app, scenario, clients, per_client, users, upload_kb)
+            results[scenario] = result
+            print(
+                f"{scenario:<10} {result['requests']:>6} req "
+                f"{result.get('rps', 0):>9} req/s  "
+                f"p50 {result.get('p50_ms', 0):>8} ms  "
+                f"p95 {result.get('p95_ms', 0):>8} ms  "
+                f"p99 {result.get('p99_ms', 0):>8} ms  "
+                f"errors {result['errors']}"
+            )
+    return results
+
+
+def run(scenarios, clients: int, per_client: int, users: int, upload_kb: int):
+    results = asyncio.run(_run_all(scenarios, clients, per_client, users, upload_kb))
+    save_results("load", {
+        "scenarios": list(scenarios), "clients": clients,
+        "requests_per_client": per_client, "users": users, "upload_kb": upload_kb
+    }, results)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20,
+                        help="requests per client")
+    parser.add_argument("--users", type=int, default=1000,
+                        help="datagen users to log in as (user1..userN)")
+    parser.add_argument("--upload-kb", type=int, default=64)
+    args = parser.parse_args()
+    run(args.scenarios, args.clients, args.requests, args.users, args.upload_kb)
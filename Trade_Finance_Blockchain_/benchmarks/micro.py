@@ -0,0 +1,207 @@
+"""
+Microbenchmarks for the hot paths: hashing, risk scoring and ledger
+append. Runs against the database named by DATABASE_URL (ledger rows
+are appended to it; use a scratch file).
+
+Usage (from Trade_Finance_Blockchain_/):
+    python -m benchmarks.micro
+    python -m benchmarks.micro --only ledger --ledger-rows 200000
+    python -m benchmarks.micro --only search   # over benchmarks.datagen documents
+"""
+import argparse
+import io
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.results import save_results
+from database.init_db import SessionLocal, init_db
+from models.document import Document
+from services.blockchain_service import generate_hash, hash_stream
+from services.ledger_service import log_ledger_many
+from services.ledger_writer import ledger_writer
+from services.risk_service import calculate_risk_score, score_arrays
+from services.search_service import search_documents
+
+SUITES = ("hashing", "risk", "ledger", "search")
+
+# against benchmarks.datagen text: broad terms, a counterparty (~1% of
+# documents), a reference prefix (a handful), a metadata filter, a deep page
+SEARCH_QUERIES = {
+    "broad_term": {"query": "invoice"},
+    "broad_prefix": {"query": "lett"},
+    "counterparty": {"query": "steel rotterdam acmemetals"},
+    "reference_prefix": {"query": "ref12345"},
+    "owner_filter": {"query": "cargo", "owner_email": "user7@bench.local"},
+    "ranked_page_3": {"query": "globexgrain", "offset": 40},
+}
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _latency(samples):
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(_percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(_percentile(samples, 99) * 1000, 3)
+    }
+
+
+def _best_of(fn, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# --------------------------------------------------
+# HASHING
+# --------------------------------------------------
+def bench_hashing(size_mb: int, repeat: int = 3):
+    payload = os.urandom(size_mb * 1024 * 1024)
+    spool = os.devnull
+
+    whole = _best_of(lambda: generate_hash(payload), repeat)
+    streamed = _best_of(lambda: hash_stream(io.BytesIO(payload), spool_path=spool), repeat)
+
+    return {
+        "size_mb": size_mb,
+        "generate_hash_mb_per_s": round(size_mb / whole, 1),
+        "hash_stream_mb_per_s": round(size_mb / streamed, 1)
+    }
+
+
+# --------------------------------------------------
+# RISK SCORING
+# --------------------------------------------------
+def bench_risk(users: int, repeat: int = 3):
+    rng = random.Random(42)
+    docs = [rng.randint(0, 5) for _ in range(users)]
+    txs = [rng.randint(0, 8) for _ in range(users)]
+
+    def scalar():
+        for d, t in zip(docs, txs):
+            calculate_risk_score(d, t)
+
+    loop = _best_of(scalar, repeat)
+    vector = _best_of(lambda: score_arrays(docs, txs), repeat)
+
+    return {
+        "users": users,
+        "scalar_per_second": round(users / loop),
+        "vector_per_second": round(users / vector),
+        "speedup": round(loop / vector, 1)
+    }
+
+
+# --------------------------------------------------
+# LEDGER APPEND
+# --------------------------------------------------
+def bench_ledger(rows: int, durable_calls: int, threads: int):
+    init_db()
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        log_ledger_many(db, ((i % 1000, "UPLOAD", "bank") for i in range(rows)))
+        bulk = time.perf_counter() - start
+    finally:
+        db.close()
+
+    def one_call(i):
+        start = time.perf_counter()
+        ledger_writer.log_sync(i % 1000, "VERIFY", "bank")
+        return time.perf_counter() - start
+
+    ledger_writer.start()
+    try:
+        # one caller at a time: pays the full flush interval per entry
+        sequential = [one_call(i) for i in range(durable_calls)]
+
+        # many callers: entries share group commits
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            concurrent = list(pool.map(one_call, range(durable_calls * threads)))
+        concurrent_elapsed = time.perf_counter() - start
+    finally:
+        ledger_writer.stop()
+
+    return {
+        "bulk": {"rows": rows, "rows_per_second": round(rows / bulk)},
+        "durable_sequential": _latency(sequential),
+        "durable_concurrent": {
+            "threads": threads,
+            "rows_per_second": round(len(concurrent) / concurrent_elapsed),
+            **_latency(concurrent)
+        }
+    }
+
+
+# --------------------------------------------------
+# DOCUMENT SEARCH
+# --------------------------------------------------
+def bench_search(repeat: int):
+    init_db()
+    db = SessionLocal()
+    try:
+        results = {"documents": db.query(Document).count()}
+        for name, kwargs in SEARCH_QUERIES.items():
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                search_documents(db, **kwargs)
+                samples.append(time.perf_counter() - start)
+            results[name] = _latency(samples)
+        return results
+    finally:
+        db.close()
+
+
+def run(only, size_mb: int, users: int, ledger_rows: int,
+        durable_calls: int, threads: int, search_repeat: int = 50):
+    params = {
+        "size_mb": size_mb, "users": users, "ledger_rows": ledger_rows,
+        "durable_calls": durable_calls, "threads": threads,
+        "search_repeat": search_repeat
+    }
+    results = {}
+
+    if "hashing" in only:
+        results["hashing"] = bench_hashing(size_mb)
+    if "risk" in only:
+        results["risk"] = bench_risk(users)
+    if "ledger" in only:
+        results["ledger"] = bench_ledger(ledger_rows, durable_calls, threads)
+    if "search" in only:
+        results["search"] = bench_search(search_repeat)
+
+    for suite, metrics in results.items():
+        print(f"[{suite}]")
+        for name, value in metrics.items():
+            print(f"  {name}: {value}")
+
+    save_results("micro", params, results)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=SUITES, default=SUITES)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--ledger-rows", type=int, default=100000)
+    parser.add_argument("--durable-calls", type=int, default=50,
+                        help="log_sync calls (per thread in the concurrent run)")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--search-repeat", type=int, default=50)
+    args = parser.parse_args()
+    run(args.only, args.size_mb, args.users, args.ledger_rows,
+        args.durable_calls, args.threads, args.search_repeat)
@@ -0,0 +1,114 @@
+"""
+Saving and comparing benchmark results.
+
+Every suite writes benchmarks/results/<suite>-<UTC timestamp>.json with
+its parameters, metrics and enough environment info to tell runs apart.
+
+Usage (from Trade_Finance_Blockchain_/):
+    python -m benchmarks.results list
+    python -m benchmarks.results compare OLD.json NEW.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# metrics where a larger number is better; everything else is a cost
+HIGHER_IS_BETTER = ("rps", "per_second", "mb_per_s", "speedup")
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    from config import DATABASE_URL
+    return {
+        "git": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "database": DATABASE_URL
+    }
+
+
+def save_results(suite: str, params: dict, results: dict):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    path = os.path.join(RESULTS_DIR, f"{suite}-{stamp}.json")
+
+    with open(path, "w") as f:
+        json.dump({
+            "suite": suite,
+            "created_at": stamp,
+            "environment": environment(),
+            "params": params,
+            "results": results
+        }, f, indent=2, default=str)
+
+    print(f"saved {path}")
+    return path
+
+
+def _flatten(results: dict, prefix: str = ""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(old_path: str, new_path: str):
+    """
+    Prints every numeric metric of both runs with the relative change;
+    "+" means better, "-" worse.
+    """
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    before = _flatten(old["results"])
+    after = _flatten(new["results"])
+
+    print(f"{'metric':<48} {'old':>12} {'new':>12} {'change':>9}")
+    for name in sorted(set(before) | set(after)):
+        a, b = before.get(name), after.get(name)
+        if a is None or b is None or a == 0:
+            change = ""
+        else:
+            pct = (b - a) / abs(a) * 100
+            better = pct > 0 if name.endswith(HIGHER_IS_BETTER) else pct < 0
+            change = f"{'+' if better else '-'}{abs(pct):.1f}%" if round(pct, 1) else "0%"
+        print(f"{name:<48} {str(a):>12} {str(b):>12} {change:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark results")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    cmp_parser = sub.add_parser("compare")
+    cmp_parser.add_argument("old")
+    cmp_parser.add_argument("new")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        compare(args.old, args.new)
+    else:
+        for name in sorted(os.listdir(RESULTS_DIR)) if os.path.isdir(RESULTS_DIR) else []:
+            if name.endswith(".json"):
+                print(os.path.join(RESULTS_DIR, name))
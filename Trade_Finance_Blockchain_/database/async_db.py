@@ -0,0 +1,71 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from config import DATABASE_URL
+from database.sqlite_profile import install_pragmas, is_sqlite, read_only_uri
+
+# Sync driver -> asyncio driver for the same database
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str):
+    """
+    sqlite:///./x.db           -> sqlite+aiosqlite:///./x.db
+    postgresql://u:p@h/db      -> postgresql+asyncpg://u:p@h/db
+    URLs that already name an async driver are returned unchanged.
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+async_read_engine = async_engine
+
+if is_sqlite(DATABASE_URL):
+    install_pragmas(async_engine.sync_engine)
+
+    if read_only_uri(DATABASE_URL):
+        async_read_engine = create_async_engine(
+            "sqlite+aiosqlite:///" + read_only_uri(DATABASE_URL) + "&uri=true"
+        )
+        install_pragmas(async_read_engine.sync_engine, read_only=True)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Read-only: dashboard, listings, proofs
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+async def get_async_db():
+    """
+    FastAPI dependency: one AsyncSession per request.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """
+    FastAPI dependency: read-only AsyncSession.
+    """
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -1,31 +1,76 @@
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from config import DATABASE_URL
+from database.sqlite_profile import create_read_engine, create_write_engine
 from models.base import Base
 
 # Import all models so SQLAlchemy registers them
 from models.user import User
 from models.document import Document
+from models import document_search   # FTS5 index + triggers on documents
 from models.ledger_entry import LedgerEntry
+from models.ledger_segment import LedgerSegment
 from models.transaction import TradeTransaction
 from models.risk_score import RiskScore
+from models.merkle import MerkleNode, LedgerHead, LedgerCheckpoint
+from models.verification import VerificationCheckpoint
+from models.analytics_counter import AnalyticsCounter
+from models.blob import Blob
+from models.import_job import ImportJob
+from models.transaction_history import TransactionStatusHistory
+from models.rollup import AnalyticsRollup, RollupWatermark
+from models.anchor import AnchorBatch, AnchorReceipt
 
-# Create engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Required for SQLite
-)
+# Create engines (see database/sqlite_profile.py)
+engine = create_write_engine(DATABASE_URL)
+ledger_engine = create_write_engine(DATABASE_URL, pool_size=1, max_overflow=0)
+read_engine = create_read_engine(DATABASE_URL, engine)
 
-# Session factory
+# Session factories
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine
 )
 
+# Used only by the ledger writer thread
+LedgerSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=ledger_engine
+)
+
+# Read-only: analytics, listings, proofs
+ReadSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=read_engine
+)
+
+def get_db():
+    """
+    FastAPI dependency: one session per request.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db():
+    """
+    FastAPI dependency: read-only session.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 def init_db():
     """
-    Initializes database tables.
-    Must be called once at application startup.
+    Brings the schema up to date (see database/migrations.py).
+    Must be called once at application startup; when the schema is
+    current this is a single version lookup.
     """
-    Base.metadata.create_all(bind=engine)
+    from database.migrations import migrate
+    migrate(engine)
@@ -0,0 +1,400 @@
+"""
+Versioned schema migrations.
+
+The database records the schema version it is at in schema_version, so
+startup only has to read one row:
+  - current version: nothing else happens
+  - empty database: create_all, then stamp the latest version
+  - older or unversioned (created by an older create_all) database:
+    the missing steps run in order, each stamped when done
+
+Every step is idempotent (tables and indexes created only if missing,
+columns added only if missing, backfills only touch rows that still
+need it), so a legacy database converges on the current schema whatever
+subset of it it already has, and a step interrupted halfway can simply
+run again.
+
+Indexes are built online where the backend supports it: on PostgreSQL
+with CREATE INDEX CONCURRENTLY, outside the step's transaction, so
+writes keep flowing while a large table is indexed. SQLite has no
+online build; there they are plain CREATE INDEX.
+
+CLI (from Trade_Finance_Blockchain_/):
+    python -m database.migrations status
+    python -m database.migrations upgrade
+"""
+import argparse
+import contextlib
+import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, inspect, select, text
+from sqlalchemy.orm import Session
+
+from models.base import Base
+from models.user import User
+from models.document import Document
+from models.document_search import install_search_index
+from models.ledger_entry import LedgerEntry
+from models.ledger_segment import LedgerSegment
+from models.transaction import TradeTransaction
+from models.risk_score import RiskScore
+from models.merkle import MerkleNode, LedgerHead, LedgerCheckpoint
+from models.verification import VerificationCheckpoint
+from models.analytics_counter import AnalyticsCounter
+from models.blob import Blob
+from models.import_job import ImportJob
+from models.transaction_history import TransactionStatusHistory
+from models.rollup import AnalyticsRollup, RollupWatermark
+from models.anchor import AnchorBatch, AnchorReceipt
+
+# kept out of Base.metadata: it describes the schema, it is not part of it
+schema_metadata = MetaData()
+schema_version = Table(
+    "schema_version", schema_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer, nullable=False),
+    Column("applied_at", DateTime)
+)
+
+# arbitrary key for pg_advisory_lock, shared by every worker
+_PG_LOCK_KEY = 724201
+
+MIGRATIONS = []
+
+
+def migration(version: int, description: str):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+
+# --------------------------------------------------
+# STEP CONTEXT
+# --------------------------------------------------
+class Step:
+    """
+    What a migration function works with. DDL runs on self.conn inside
+    the step's transaction; online index builds and data backfills are
+    deferred until that transaction has committed.
+    """
+
+    def __init__(self, engine, conn):
+        self.engine = engine
+        self.conn = conn
+        self.dialect = conn.dialect.name
+        self._deferred = []
+
+    def create_tables(self, *models):
+        for model in models:
+            model.__table__.create(self.conn, checkfirst=True)
+
+    def add_column(self, column):
+        """
+        Adds a model column to its table if the table lacks it.
+        Constraints (unique, foreign keys) are left to create_index.
+        """
+        table = column.table.name
+        existing = {c["name"] for c in inspect(self.conn).get_columns(table)}
+        if column.name in existing:
+            return
+        ddl_type = column.type.compile(dialect=self.conn.dialect)
+        self.conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column.name} {ddl_type}"))
+
+    def create_index(self, name: str, table: str, columns, unique: bool = False):
+        statement = "CREATE {unique}INDEX {online}{name} ON {table} ({columns})".format(
+            unique="UNIQUE " if unique else "",
+            online="CONCURRENTLY " if self.dialect == "postgresql" else "",
+            name=name, table=table, columns=", ".join(columns)
+        )
+        if _has_index(self.conn, table, name, columns, unique):
+            return
+        if self.dialect == "postgresql":
+            self._deferred.append(lambda: _create_index_online(self.engine, name, statement))
+        else:
+            self.conn.execute(text(statement))
+
+    def execute(self, sql: str):
+        self.conn.execute(text(sql))
+
+    def backfill(self, fn):
+        """
+        fn(session) runs after the DDL has committed; it commits itself.
+        """
+        self._deferred.append(lambda: _run_backfill(self.engine, fn))
+
+    def run_deferred(self):
+        for job in self._deferred:
+            job()
+
+
+def _has_index(conn, table: str, name: str, columns, unique: bool):
+    """
+    True if the index exists, or an equivalent one does under another
+    name (e.g. one create_all made from index=True / unique=True).
+    """
+    inspector = inspect(conn)
+    for index in inspector.get_indexes(table):
+        if index["name"] == name:
+            # PostgreSQL: _create_index_online checks it is valid
+            return conn.dialect.name != "postgresql"
+        if index["column_names"] == list(columns) and (index["unique"] or not unique):
+            return True
+    if unique:
+        return any(
+            constraint["column_names"] == list(columns)
+            for constraint in inspector.get_unique_constraints(table)
+        )
+    return False
+
+
+def _create_index_online(engine, name: str, statement: str):
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        valid = conn.execute(text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+        ), {"name": name}).scalar()
+        if valid:
+            return
+        if valid is False:
+            # left behind by an interrupted concurrent build
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        conn.execute(text(statement))
+
+
+def _run_backfill(engine, fn):
+    db = Session(bind=engine)
+    try:
+        fn(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+# --------------------------------------------------
+# MIGRATIONS (append only; never edit a released step)
+# --------------------------------------------------
+@migration(1, "baseline: users, documents, ledger, transactions, risk scores")
+def _baseline(step):
+    step.create_tables(User, Document, LedgerEntry, TradeTransaction, RiskScore)
+
+
+@migration(2, "ledger hash chain and Merkle tree")
+def _ledger_chain(step):
+    for name in ("leaf_index", "prev_hash", "entry_hash"):
+        step.add_column(LedgerEntry.__table__.c[name])
+    step.create_tables(MerkleNode, LedgerHead, LedgerCheckpoint, VerificationCheckpoint)
+    step.create_index("ux_ledger_entries_leaf_index", "ledger_entries",
+                      ["leaf_index"], unique=True)
+
+    def seal(db):
+        from services.ledger_service import seal_unsealed_entries
+        sealed = seal_unsealed_entries(db)
+        if sealed:
+            print(f"MIGRATION: sealed {sealed} existing ledger entries")
+
+    step.backfill(seal)
+
+
+@migration(3, "ledger listing indexes")
+def _ledger_indexes(step):
+    step.create_index("ix_ledger_entries_timestamp", "ledger_entries", ["timestamp"])
+    step.create_index("ix_ledger_entries_document_timestamp", "ledger_entries",
+                      ["document_id", "timestamp"])
+    step.create_index("ix_ledger_entries_actor_timestamp", "ledger_entries",
+                      ["actor_role", "timestamp"])
+
+
+@migration(4, "analytics counters")
+def _counters(step):
+    step.create_tables(AnalyticsCounter)
+
+    def rebuild(db):
+        from services.counter_service import rebuild_counters
+        rebuild_counters(db)
+
+    step.backfill(rebuild)
+
+
+@migration(5, "content-addressed blob store")
+def _blobs(step):
+    step.create_tables(Blob)
+    step.add_column(Document.__table__.c.content_hash)
+    step.create_index("ix_documents_content_hash", "documents", ["content_hash"])
+
+
+@migration(6, "bulk import jobs")
+def _import_jobs(step):
+    step.create_tables(ImportJob)
+
+
+@migration(7, "transaction status history and listing indexes")
+def _transactions(step):
+    step.create_tables(TransactionStatusHistory)
+    step.create_index("ix_transactions_status_created", "transactions",
+                      ["status", "created_at"])
+    step.create_index("ix_transactions_buyer_created", "transactions",
+                      ["buyer_email", "created_at"])
+    step.create_index("ix_transactions_seller_created", "transactions",
+                      ["seller_email", "created_at"])
+
+
+@migration(8, "one risk score per user")
+def _risk_unique(step):
+    # keep the newest score of any user scored more than once
+    step.execute(
+        "DELETE FROM risk_scores WHERE id NOT IN "
+        "(SELECT MAX(id) FROM risk_scores GROUP BY user_id)"
+    )
+    step.create_index("ux_risk_scores_user_id", "risk_scores", ["user_id"], unique=True)
+
+
+@migration(9, "analytics rollups")
+def _rollups(step):
+    step.create_tables(AnalyticsRollup, RollupWatermark)
+
+
+@migration(10, "document hash anchoring")
+def _anchoring(step):
+    step.create_tables(AnchorBatch, AnchorReceipt)
+
+
+@migration(11, "document full-text search")
+def _document_search(step):
+    step.add_column(Document.__table__.c.extracted_text)
+    # exact metadata filters (and filter-only listings)
+    step.create_index("ix_documents_document_type", "documents", ["document_type"])
+    step.create_index("ix_documents_owner_email", "documents", ["owner_email"])
+    if step.dialect == "sqlite":
+        # indexes every existing document the first time
+        install_search_index(step.conn)
+
+
+@migration(12, "ledger archive segments")
+def _ledger_segments(step):
+    step.create_tables(LedgerSegment)
+
+
+@migration(13, "blob release times")
+def _blob_release(step):
+    step.add_column(Blob.__table__.c.released_at)
+
+
+@migration(14, "export order indexes")
+def _export_indexes(step):
+    step.create_index("ix_transactions_created_id", "transactions", ["created_at", "id"])
+    step.create_index("ix_documents_uploaded_id", "documents", ["uploaded_at", "id"])
+
+
+@migration(15, "verification run claim")
+def _verification_claim(step):
+    step.add_column(VerificationCheckpoint.__table__.c.running_since)
+
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# --------------------------------------------------
+# RUNNER
+# --------------------------------------------------
+def current_version(conn):
+    """
+    Stamped version, or None if the database has never been stamped.
+    """
+    if not inspect(conn).has_table("schema_version"):
+        return None
+    return conn.execute(
+        select(schema_version.c.version).where(schema_version.c.id == 1)
+    ).scalar()
+
+
+def _stamp(conn, version: int):
+    values = {"version": version, "applied_at": datetime.datetime.utcnow()}
+    updated = conn.execute(
+        schema_version.update().where(schema_version.c.id == 1).values(**values)
+    ).rowcount
+    if not updated:
+        conn.execute(schema_version.insert().values(id=1, **values))
+
+
+@contextlib.contextmanager
+def _migration_lock(engine):
+    """
+    Serializes concurrent workers on PostgreSQL. On SQLite the steps
+    are idempotent and the database lock serializes the writes.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _PG_LOCK_KEY})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _PG_LOCK_KEY})
+
+
+def migrate(engine, target: int = LATEST_VERSION):
+    """
+    Brings the database up to target. Returns the versions applied.
+    """
+    with engine.connect() as conn:
+        if current_version(conn) == target:
+            return []
+
+    applied = []
+    with _migration_lock(engine):
+        with engine.begin() as conn:
+            version = current_version(conn)
+            if version is None:
+                fresh = not inspect(conn).get_table_names()
+                schema_metadata.create_all(conn)
+                if fresh:
+                    Base.metadata.create_all(conn)
+                    _stamp(conn, LATEST_VERSION)
+                    print(f"MIGRATION: new database created at version {LATEST_VERSION}")
+                    return [LATEST_VERSION]
+                version = 0
+
+        for number, description, fn in MIGRATIONS:
+            if number <= version or number > target:
+                continue
+            with engine.begin() as conn:
+                step = Step(engine, conn)
+                fn(step)
+            step.run_deferred()
+            with engine.begin() as conn:
+                _stamp(conn, number)
+            print(f"MIGRATION {number}: {description}")
+            applied.append(number)
+
+    return applied
+
+
+def status(engine):
+    with engine.connect() as conn:
+        version = current_version(conn)
+    return {
+        "version": version,
+        "latest": LATEST_VERSION,
+        "pending": [
+            f"{number}: {description}" for number, description, _ in MIGRATIONS
+            if version is None or number > version
+        ]
+    }
+
+
+if __name__ == "__main__":
+    from database.init_db import engine
+
+    parser = argparse.ArgumentParser(description="Schema migrations")
+    parser.add_argument("command", choices=["status", "upgrade"])
+    parser.add_argument("--target", type=int, default=LATEST_VERSION)
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        applied = migrate(engine, args.target)
+        print(f"applied: {applied or 'nothing, already current'}")
+    else:
+        for key, value in status(engine).items():
+            print(f"{key}: {value}")
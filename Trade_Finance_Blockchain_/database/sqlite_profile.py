@@ -0,0 +1,129 @@
+"""
+SQLite connection profile.
+
+"production" (default) turns on WAL so readers never block the ledger
+writer, relaxes fsync to synchronous=NORMAL (safe with WAL), and sizes
+the page cache / mmap window. Every setting can be overridden with an
+environment variable; SQLITE_PROFILE=default keeps SQLite's defaults.
+
+Connections are split by role:
+  - ledger engine: exactly one connection, owned by the group-commit
+    ledger writer thread, so appends are serialized in-process instead
+    of fighting over the database lock
+  - write engine: the general read/write pool (SessionLocal)
+  - read engine: a pool of read-only (mode=ro, query_only) connections
+    for analytics and listings; under WAL they never block the writer
+"""
+import os
+import sqlite3
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+
+PRODUCTION_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # negative = size in KiB
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", str(-64 * 1024))),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "temp_store": "MEMORY",
+}
+
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+
+# journal_mode is a property of the database file; only the writer sets it
+_WRITER_ONLY = {"journal_mode"}
+
+
+def is_sqlite(url: str):
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def sqlite_file(url: str):
+    """
+    Filesystem path of a SQLite URL, or None for in-memory databases.
+    """
+    database = make_url(url).database
+    if not database or database == ":memory:" or database.startswith("file:"):
+        return None
+    return database
+
+
+def profile_pragmas(read_only: bool = False):
+    if SQLITE_PROFILE != "production":
+        return {}
+    return {
+        name: value for name, value in PRODUCTION_PRAGMAS.items()
+        if not (read_only and name in _WRITER_ONLY)
+    }
+
+
+def install_pragmas(engine, read_only: bool = False):
+    """
+    Runs the profile's PRAGMAs on every new DBAPI connection of engine
+    (sync engine, or async_engine.sync_engine).
+    """
+    pragmas = profile_pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            if read_only:
+                cursor.execute("PRAGMA query_only=1")
+        finally:
+            cursor.close()
+
+    return engine
+
+
+def create_write_engine(url: str, pool_size: int = 5, max_overflow: int = 10):
+    if not is_sqlite(url):
+        return create_engine(url, pool_size=pool_size, max_overflow=max_overflow)
+
+    # in-memory databases use SQLAlchemy's per-thread pool
+    pool_args = {"pool_size": pool_size, "max_overflow": max_overflow} \
+        if sqlite_file(url) else {}
+
+    return install_pragmas(create_engine(
+        url,
+        connect_args={"check_same_thread": False},  # Required for SQLite
+        **pool_args
+    ))
+
+
+def read_only_uri(url: str):
+    """
+    SQLite URI that opens the same file read-only, or None.
+    """
+    path = sqlite_file(url)
+    if path is None:
+        return None
+    return "file:" + os.path.abspath(path) + "?mode=ro"
+
+
+def create_read_engine(url: str, write_engine=None):
+    """
+    Read-only engine for the same database. Falls back to the write
+    engine where a separate read-only connection is not possible.
+    """
+    if not is_sqlite(url):
+        return write_engine or create_engine(url)
+
+    uri = read_only_uri(url)
+    if uri is None:
+        return write_engine or create_write_engine(url)
+
+    return install_pragmas(create_engine(
+        "sqlite://",
+        creator=lambda: sqlite3.connect(uri, uri=True, check_same_thread=False),
+        poolclass=QueuePool,
+        pool_size=SQLITE_READ_POOL_SIZE,
+        max_overflow=SQLITE_READ_POOL_SIZE
+    ), read_only=True)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String
+from models.base import Base
+
+class AnalyticsCounter(Base):
+    """
+    Running totals kept in step with writes (see services/counter_service.py).
+    name examples: "ledger.total", "trades.status.created", "documents.type.invoice"
+    """
+    __tablename__ = "analytics_counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+import datetime
+from models.base import Base
+
+class AnchorBatch(Base):
+    """
+    One Merkle tree over a batch of document hashes. Only root_hash is
+    submitted to the anchoring backend; anchor_ref is what it returned.
+    status: pending -> anchored, or failed after the last retry
+    """
+    __tablename__ = "anchor_batches"
+    __table_args__ = (
+        Index("ix_anchor_batches_status", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    root_hash = Column(String(64), nullable=False)
+    size = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    backend = Column(String)
+    anchor_ref = Column(String)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.datetime.utcnow)
+    error = Column(String)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    anchored_at = Column(DateTime)
+
+
+class AnchorReceipt(Base):
+    """
+    Proof that content_hash is leaf leaf_index of its batch tree:
+    path is the audit path (comma-separated hex, leaf-first).
+    """
+    __tablename__ = "anchor_receipts"
+
+    id = Column(Integer, primary_key=True)
+    batch_id = Column(Integer, ForeignKey("anchor_batches.id"), nullable=False, index=True)
+    content_hash = Column(String(64), nullable=False, unique=True)
+    leaf_index = Column(Integer, nullable=False)
+    path = Column(Text, nullable=False)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+import datetime
+from models.base import Base
+
+class Blob(Base):
+    """
+    One stored file, addressed by its SHA-256. Documents link to it via
+    Document.content_hash; ref_count is the number of such links.
+    """
+    __tablename__ = "blobs"
+
+    hash = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    # last time a document let go of it (sweep_orphans grace period)
+    released_at = Column(DateTime)
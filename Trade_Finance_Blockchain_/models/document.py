@@ -1,12 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime
-from database.init_db import Base
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from models.base import Base
 from datetime import datetime
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # export order: streamed straight off the index, no sort
+        Index("ix_documents_uploaded_id", "uploaded_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, nullable=False)
-    document_type = Column(String)
-    owner_email = Column(String)
+    document_type = Column(String, index=True)
+    owner_email = Column(String, index=True)
+    content_hash = Column(String(64), index=True)   # -> blobs.hash
+    extracted_text = Column(Text)                   # indexed by documents_fts
     uploaded_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,67 @@
+"""
+SQLite FTS5 index over documents.
+
+documents_fts is an external-content table: it stores only the index,
+the text itself stays in documents. Triggers keep it in step with every
+INSERT, UPDATE and DELETE on documents, so writers never touch it.
+Other databases have no FTS5; search_service falls back to LIKE there.
+"""
+from sqlalchemy import event, text
+
+from models.document import Document
+
+FTS_TABLE = "documents_fts"
+# indexed columns, in bm25() weight order
+FTS_COLUMNS = ("filename", "document_type", "owner_email", "extracted_text")
+
+_columns = ", ".join(FTS_COLUMNS)
+_new = ", ".join("new." + c for c in FTS_COLUMNS)
+_old = ", ".join("old." + c for c in FTS_COLUMNS)
+
+FTS_DDL = (
+    # prefix='2 3' keeps short typeahead prefixes (in*, inv*) on an index
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_columns}, content='documents', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+
+    f"CREATE TRIGGER IF NOT EXISTS documents_fts_insert AFTER INSERT ON documents BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new}); END",
+
+    f"CREATE TRIGGER IF NOT EXISTS documents_fts_delete AFTER DELETE ON documents BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) "
+    f"VALUES ('delete', old.id, {_old}); END",
+
+    f"CREATE TRIGGER IF NOT EXISTS documents_fts_update AFTER UPDATE OF {_columns} "
+    f"ON documents BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) "
+    f"VALUES ('delete', old.id, {_old}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new}); END",
+)
+
+
+def has_search_index(conn):
+    return conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {"name": FTS_TABLE}).first() is not None
+
+
+def install_search_index(conn):
+    """
+    Creates the FTS table and triggers if missing; indexes existing rows
+    when the table is new. SQLite only.
+    """
+    existed = has_search_index(conn)
+    for statement in FTS_DDL:
+        conn.execute(text(statement))
+    if not existed:
+        rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn):
+    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+@event.listens_for(Document.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        install_search_index(connection)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+import datetime
+from models.base import Base
+
+class ImportJob(Base):
+    """
+    Progress of one bulk import. A source file is identified by its
+    SHA-256, so re-running the same file resumes after rows_done.
+    """
+    __tablename__ = "import_jobs"
+    __table_args__ = (
+        UniqueConstraint("kind", "source_hash", name="uq_import_jobs_source"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)            # transactions / documents / ledger
+    source_hash = Column(String(64), nullable=False)
+    source_name = Column(String)
+    status = Column(String, nullable=False, default="running")
+    rows_done = Column(Integer, nullable=False, default=0)     # records consumed
+    rows_imported = Column(Integer, nullable=False, default=0)
+    rows_rejected = Column(Integer, nullable=False, default=0)
+    error = Column(String)
+    started_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -1,12 +1,24 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 import datetime
 from models.base import Base
 
 class LedgerEntry(Base):
     __tablename__ = "ledger_entries"
+    __table_args__ = (
+        # Newest-first listings; SQLite appends the rowid (id) to every
+        # index, so these also serve the (timestamp, id) keyset cursor.
+        Index("ix_ledger_entries_timestamp", "timestamp"),
+        Index("ix_ledger_entries_document_timestamp", "document_id", "timestamp"),
+        Index("ix_ledger_entries_actor_timestamp", "actor_role", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True)
     document_id = Column(Integer, ForeignKey("documents.id"))
     action = Column(String, nullable=False)
     actor_role = Column(String, nullable=False)
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
+
+    # Hash chain + Merkle leaf position (see services/ledger_service.py)
+    leaf_index = Column(Integer, unique=True)
+    prev_hash = Column(String(64))
+    entry_hash = Column(String(64))
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+import datetime
+from models.base import Base
+
+class LedgerSegment(Base):
+    """
+    Archived, immutable run of ledger leaves [first_leaf, first_leaf +
+    entry_count), moved out of ledger_entries into a compressed columnar
+    file (see services/ledger_archive_service.py).
+
+    Hash-range summary: first_prev_hash / last_hash are the chain links
+    at both ends, and merkle_root is the Merkle subtree node covering
+    exactly these leaves. file_hash is the SHA-256 of the file itself.
+    """
+    __tablename__ = "ledger_segments"
+    __table_args__ = (
+        Index("ix_ledger_segments_timestamps", "max_timestamp", "min_timestamp"),
+        Index("ix_ledger_segments_ids", "first_id", "last_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    first_leaf = Column(Integer, nullable=False, unique=True)
+    entry_count = Column(Integer, nullable=False)
+    first_id = Column(Integer, nullable=False)
+    last_id = Column(Integer, nullable=False)
+    min_timestamp = Column(DateTime, nullable=False)
+    max_timestamp = Column(DateTime, nullable=False)
+    first_prev_hash = Column(String(64), nullable=False)
+    last_hash = Column(String(64), nullable=False)
+    merkle_root = Column(String(64), nullable=False)
+    file_name = Column(String, nullable=False)
+    file_size = Column(Integer, nullable=False)
+    file_hash = Column(String(64), nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
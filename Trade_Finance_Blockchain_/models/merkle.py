@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime
+import datetime
+from models.base import Base
+
+class MerkleNode(Base):
+    """
+    Complete subtree of the ledger Merkle tree.
+    level 0 = leaves; (level, position) covers 2**level leaves.
+    """
+    __tablename__ = "merkle_nodes"
+
+    level = Column(Integer, primary_key=True, autoincrement=False)
+    position = Column(Integer, primary_key=True, autoincrement=False)
+    hash = Column(String(64), nullable=False)
+
+
+class LedgerHead(Base):
+    """
+    Single-row pointer to the tip of the ledger hash chain.
+    """
+    __tablename__ = "ledger_head"
+
+    id = Column(Integer, primary_key=True)
+    tree_size = Column(Integer, nullable=False, default=0)
+    last_hash = Column(String(64))
+
+
+class LedgerCheckpoint(Base):
+    __tablename__ = "ledger_checkpoints"
+
+    id = Column(Integer, primary_key=True)
+    tree_size = Column(Integer, nullable=False, unique=True)
+    root_hash = Column(String(64), nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
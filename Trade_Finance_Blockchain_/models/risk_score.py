@@ -6,7 +6,7 @@ class RiskScore(Base):
     __tablename__ = "risk_scores"
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False, unique=True)
     score = Column(Float, nullable=False)
     level = Column(String, nullable=False)
     rationale = Column(String)
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from models.base import Base
+
+class AnalyticsRollup(Base):
+    """
+    Event counts per time bucket.
+    grain: "hour" | "day"; bucket: start of the hour/day (UTC)
+    series: "ledger" (dimension "ACTION|actor_role"),
+            "transactions" (dimension = status entered),
+            "documents" (dimension = document_type)
+    """
+    __tablename__ = "analytics_rollups"
+    __table_args__ = (
+        Index("ix_analytics_rollups_series_bucket", "series", "grain", "bucket"),
+    )
+
+    grain = Column(String(8), primary_key=True)
+    series = Column(String(32), primary_key=True)
+    dimension = Column(String, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class RollupWatermark(Base):
+    """
+    Highest source row id already folded into the rollups, per series.
+    """
+    __tablename__ = "rollup_watermarks"
+
+    series = Column(String(32), primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
@@ -1,9 +1,19 @@
-from sqlalchemy import Column, Integer, String, DateTime
-from database.init_db import Base
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from models.base import Base
 from datetime import datetime
 
 class TradeTransaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # "active transactions" and per-counterparty views are range
+        # scans on these (status is always stored upper-case, see
+        # services/transaction_service.py)
+        Index("ix_transactions_status_created", "status", "created_at"),
+        Index("ix_transactions_buyer_created", "buyer_email", "created_at"),
+        Index("ix_transactions_seller_created", "seller_email", "created_at"),
+        # export order: streamed straight off the index, no sort
+        Index("ix_transactions_created_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     buyer_email = Column(String, nullable=False)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+import datetime
+from models.base import Base
+
+class TransactionStatusHistory(Base):
+    """
+    One row per status change (from_status is NULL for creation).
+    """
+    __tablename__ = "transaction_status_history"
+    __table_args__ = (
+        Index("ix_transaction_status_history_tx", "transaction_id", "changed_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=False)
+    from_status = Column(String)
+    to_status = Column(String, nullable=False)
+    actor = Column(String)
+    changed_at = Column(DateTime, default=datetime.datetime.utcnow)
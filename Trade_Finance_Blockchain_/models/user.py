@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String
-from database.init_db import Base
+from models.base import Base
 
 class User(Base):
     __tablename__ = "users"
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime
+import datetime
+from models.base import Base
+
+class VerificationCheckpoint(Base):
+    """
+    Single row: how much of the hash chain has already been verified,
+    and whether a verification is running.
+    """
+    __tablename__ = "verification_checkpoints"
+
+    id = Column(Integer, primary_key=True)
+    verified_size = Column(Integer, nullable=False, default=0)
+    last_hash = Column(String(64))
+    verified_at = Column(DateTime, default=datetime.datetime.utcnow)
+    # set while a verification run holds the claim (one run at a time)
+    running_since = Column(DateTime)
@@ -0,0 +1,53 @@
+import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.async_db import get_async_read_db
+from services.access_service import session_user
+from services.rollup_service import timeseries_async
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+DEFAULT_RANGE = datetime.timedelta(days=30)
+
+
+def _utc_param(value: str, name: str):
+    """
+    ISO 8601 query value as naive UTC, the form rollup buckets use:
+    offsets are converted, values without one are taken as UTC.
+    400 for anything else.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    except (OverflowError, ValueError):
+        raise HTTPException(400, f"{name} must be an ISO 8601 date/time")
+    return parsed
+
+
+@router.get("/series")
+async def analytics_series(series: str = "ledger",
+                           start: str = None,
+                           end: str = None,
+                           grain: str = "auto",
+                           dimension: str = None,
+                           user: dict = Depends(session_user),
+                           db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Event counts per hour/day over [start, end) (UTC, default: last 30
+    days). series: ledger | transactions | documents.
+    """
+    start, end = _utc_param(start, "start"), _utc_param(end, "end")
+    end = end or datetime.datetime.utcnow()
+    try:
+        start = start or end - DEFAULT_RANGE
+    except OverflowError:
+        raise HTTPException(400, "end is out of range")
+    try:
+        return await timeseries_async(db, series, start, end, grain, dimension)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
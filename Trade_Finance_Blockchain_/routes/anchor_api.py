@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.async_db import get_async_read_db
+from models.anchor import AnchorBatch
+from models.document import Document
+from services.access_service import is_auditor, require_admin, session_user
+from services.anchor_service import anchor_stats, anchorer, receipt
+
+router = APIRouter(prefix="/anchor", tags=["Anchoring"])
+
+ANCHOR_PAGE_SIZE = 100
+
+
+@router.get("/receipts/{content_hash}")
+async def anchor_receipt(content_hash: str,
+                         user: dict = Depends(session_user),
+                         db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Merkle path from a document hash to its batch root, plus where
+    that root was anchored. Auditors, and owners of a document with
+    that hash, only.
+    """
+    if not is_auditor(user):
+        owned = await db.scalar(
+            select(Document.id)
+            .where(Document.content_hash == content_hash.lower(),
+                   Document.owner_email == user.get("email"))
+            .limit(1)
+        )
+        if owned is None:
+            raise HTTPException(404, "hash not sealed into an anchor batch yet")
+
+    found = await db.run_sync(receipt, content_hash, anchorer.backend)
+    if found is None:
+        raise HTTPException(404, "hash not sealed into an anchor batch yet")
+    return found
+
+
+@router.get("/batches")
+async def anchor_batches(status: str = None, limit: int = ANCHOR_PAGE_SIZE,
+                         user: dict = Depends(session_user),
+                         db: AsyncSession = Depends(get_async_read_db)):
+    query = select(AnchorBatch).order_by(AnchorBatch.id.desc()) \
+        .limit(min(limit, 1000))
+    if status:
+        query = query.where(AnchorBatch.status == status)
+
+    batches = (await db.execute(query)).scalars()
+    return [
+        {
+            "id": b.id,
+            "root_hash": b.root_hash,
+            "size": b.size,
+            "status": b.status,
+            "backend": b.backend,
+            "anchor_ref": b.anchor_ref,
+            "attempts": b.attempts,
+            "error": b.error,
+            "created_at": b.created_at,
+            "anchored_at": b.anchored_at
+        }
+        for b in batches
+    ]
+
+
+@router.get("/stats")
+async def anchor_pipeline_stats(user: dict = Depends(require_admin),
+                                db: AsyncSession = Depends(get_async_read_db)):
+    stats = await db.run_sync(anchor_stats)
+    stats["queue_depth"] = anchorer.queue_depth
+    stats["hashes_dropped"] = anchorer.hashes_dropped
+    return stats
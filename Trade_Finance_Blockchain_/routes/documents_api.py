@@ -0,0 +1,131 @@
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, Response
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.async_db import get_async_db, get_async_read_db
+from models.blob import Blob
+from models.document import Document
+from services.access_service import can_read_document, is_auditor, session_user
+from services.blob_service import (
+    blob_etag,
+    blob_path,
+    create_document,
+    is_content_hash,
+    store_upload
+)
+from services.ledger_writer import ledger_writer
+from services.search_service import SEARCH_PAGE_SIZE, extract_text, search_documents
+
+router = APIRouter(prefix="/documents", tags=["Documents"])
+
+# content never changes for a given hash
+BLOB_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+def _not_modified(request: Request, etag: str):
+    tags = request.headers.get("if-none-match", "")
+    return tags.strip() == "*" or etag in [t.strip() for t in tags.split(",")]
+
+
+def blob_response(request: Request, content_hash: str, filename: str = None):
+    """
+    Serves a blob. FileResponse handles Range/If-Range and uses the
+    server's zero-copy path send extension when available; the ETag is
+    the content hash itself.
+    """
+    etag = blob_etag(content_hash)
+    headers = {"ETag": etag, "Cache-Control": BLOB_CACHE_CONTROL}
+
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(blob_path(content_hash), filename=filename, headers=headers)
+
+
+# --------------------------------------------------
+# UPLOAD (deduplicated)
+# --------------------------------------------------
+@router.post("/store")
+async def store_document(file: UploadFile = File(...),
+                         doc_type: str = Form(...),
+                         user: dict = Depends(session_user),
+                         db: AsyncSession = Depends(get_async_db)):
+    result, created = await store_upload(file)
+    content = await run_in_threadpool(extract_text, result.path, file.filename)
+    document = await db.run_sync(
+        create_document, result, file.filename, doc_type, user.get("email"), content
+    )
+    await ledger_writer.log(document.id, "UPLOAD", user.get("role"))
+
+    return {
+        "document_id": document.id,
+        "content_hash": result.digest,
+        "size": result.size,
+        "deduplicated": not created
+    }
+
+
+# --------------------------------------------------
+# SEARCH
+# --------------------------------------------------
+@router.get("/search")
+async def document_search(q: str = "", doc_type: str = None, owner: str = None,
+                          limit: int = SEARCH_PAGE_SIZE, offset: int = 0,
+                          user: dict = Depends(session_user),
+                          db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Ranked, prefix-matched search over filename, type, owner and file
+    text. Follow next_offset for the next page. Auditors search every
+    document; everyone else only the documents they own.
+    """
+    if not is_auditor(user):
+        if owner is not None and owner != user.get("email"):
+            return {"results": [], "next_offset": None}
+        owner = user.get("email")
+    try:
+        results, next_offset = await db.run_sync(
+            search_documents, q, doc_type, owner, limit, offset
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return {"results": results, "next_offset": next_offset}
+
+
+# --------------------------------------------------
+# DOWNLOAD
+# --------------------------------------------------
+# (documents the caller may not read are reported as not found, so
+# ids and hashes cannot be probed)
+@router.get("/{document_id}/content")
+async def document_content(document_id: int, request: Request,
+                           user: dict = Depends(session_user),
+                           db: AsyncSession = Depends(get_async_read_db)):
+    document = await db.get(Document, document_id)
+    if (document is None or not is_content_hash(document.content_hash)
+            or not can_read_document(user, document)):
+        raise HTTPException(404, "document not found")
+    return blob_response(request, document.content_hash, document.filename)
+
+
+@router.get("/blobs/{content_hash}")
+async def blob_content(content_hash: str, request: Request,
+                       user: dict = Depends(session_user),
+                       db: AsyncSession = Depends(get_async_read_db)):
+    """
+    A blob is readable by auditors and by owners of a document linking to it.
+    """
+    content_hash = content_hash.lower()
+    if not is_content_hash(content_hash) or await db.get(Blob, content_hash) is None:
+        raise HTTPException(404, "blob not found")
+    if not is_auditor(user):
+        owned = await db.scalar(
+            select(Document.id)
+            .where(Document.content_hash == content_hash,
+                   Document.owner_email == user.get("email"))
+            .limit(1)
+        )
+        if owned is None:
+            raise HTTPException(404, "blob not found")
+    return blob_response(request, content_hash)
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from services.access_service import require_admin, session_user
+from services.event_hub import hub, sse_stream
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+@router.get("/stream")
+async def event_stream(user: dict = Depends(session_user)):
+    """
+    Server-sent events: "ledger" (new entries) and "counters"
+    (analytics counter deltas), published after each commit.
+    """
+    return StreamingResponse(
+        sse_stream(hub.subscribe()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/stats")
+def event_stats(user: dict = Depends(require_admin)):
+    """
+    Subscriber and queue counts. Admins only.
+    """
+    return hub.describe()
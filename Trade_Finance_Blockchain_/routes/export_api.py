@@ -0,0 +1,34 @@
+import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from services.access_service import require_auditor
+from services.export_service import EXPORT_FORMATS, export_stream
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+@router.get("/{kind}")
+def export(kind: str, format: str = "ndjson", compress: bool = True,
+           start: datetime.datetime = None, end: datetime.datetime = None,
+           document_id: int = None, actor: str = None,
+           user: dict = Depends(require_auditor)):
+    """
+    Streams ledger / transactions / documents as NDJSON or CSV,
+    gzip-compressed by default. start is inclusive, end exclusive.
+    actor matches the ledger actor role, document owner, or either
+    party of a transaction. Admins and auditors only.
+    """
+    try:
+        chunks = export_stream(kind, format, compress, start, end,
+                               document_id, actor)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    filename = f"{kind}.{format}" + (".gz" if compress else "")
+    media_type = "application/gzip" if compress else EXPORT_FORMATS[format]
+
+    return StreamingResponse(chunks, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"'
+    })
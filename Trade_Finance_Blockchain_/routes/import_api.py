@@ -0,0 +1,48 @@
+import os
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from database.init_db import SessionLocal
+from services.access_service import require_admin
+from services.blockchain_service import hash_upload
+from services.import_service import IMPORT_KINDS, detect_format, run_import
+
+router = APIRouter(prefix="/import", tags=["Import"])
+
+
+def _import_spooled(kind, path, fmt, source_hash, source_name):
+    db = SessionLocal()
+    try:
+        return run_import(db, kind, path, fmt,
+                          source_hash=source_hash, source_name=source_name)
+    finally:
+        db.close()
+
+
+@router.post("/{kind}")
+async def bulk_import(kind: str, file: UploadFile = File(...),
+                      user: dict = Depends(require_admin)):
+    """
+    Imports an NDJSON / CSV (optionally .gz) upload. Uploading the same
+    file again resumes an interrupted job or returns the finished one.
+    Attached document files are only supported by the CLI: records
+    naming a "file" are rejected, as are content_hash values that are
+    not already stored blobs. Admins only: imported rows carry
+    whatever actor, owner and timestamps the file names.
+    """
+    if kind not in IMPORT_KINDS:
+        raise HTTPException(400, f"unknown import kind '{kind}'")
+
+    result = await hash_upload(file, spool=True)
+    suffix = ".gz" if file.filename.endswith(".gz") else ""
+    path = result.path + suffix
+    os.replace(result.path, path)   # read_records picks gzip by extension
+
+    try:
+        return await run_in_threadpool(
+            _import_spooled, kind, path, detect_format(file.filename),
+            result.digest, file.filename
+        )
+    finally:
+        os.remove(path)
@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.async_db import get_async_read_db
+from services.access_service import require_admin, session_user
+from services.ledger_archive_service import list_segments
+from services.ledger_proof_service import (
+    ProofError,
+    consistency_proof,
+    inclusion_proof,
+    list_checkpoints
+)
+from services.ledger_service import LEDGER_PAGE_SIZE, list_ledger_page_async
+from services.verification_service import VerificationBusy, verify_ledger
+
+router = APIRouter(prefix="/ledger", tags=["Ledger"])
+
+
+# --------------------------------------------------
+# LISTING (keyset pagination)
+# --------------------------------------------------
+@router.get("/entries")
+async def ledger_entries(cursor: str = None, limit: int = LEDGER_PAGE_SIZE,
+                         document_id: int = None, actor: str = None,
+                         user: dict = Depends(session_user),
+                         db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Newest-first ledger entries. Pass next_cursor back as ?cursor=
+    to fetch the following page.
+    """
+    try:
+        entries, next_cursor = await list_ledger_page_async(
+            db, cursor, limit, document_id, actor
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    return {"entries": entries, "next_cursor": next_cursor}
+
+
+@router.get("/segments")
+async def ledger_segments(user: dict = Depends(session_user),
+                          db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Archive segments holding the oldest entries, with their hash-range
+    summaries (first_prev_hash, last_hash, merkle_root).
+    """
+    return await db.run_sync(list_segments)
+
+
+# --------------------------------------------------
+# MERKLE CHECKPOINTS & PROOFS
+# (sync proof code runs on the async connection via run_sync)
+# --------------------------------------------------
+@router.get("/checkpoints")
+async def ledger_checkpoints(limit: int = 100,
+                             user: dict = Depends(session_user),
+                             db: AsyncSession = Depends(get_async_read_db)):
+    return await db.run_sync(list_checkpoints, min(limit, 1000))
+
+
+@router.get("/proof/inclusion/{entry_id}")
+async def ledger_inclusion_proof(entry_id: int, checkpoint_id: int = None,
+                                 user: dict = Depends(session_user),
+                                 db: AsyncSession = Depends(get_async_read_db)):
+    try:
+        return await db.run_sync(inclusion_proof, entry_id, checkpoint_id)
+    except ProofError as e:
+        raise HTTPException(404, str(e))
+
+
+@router.get("/proof/consistency")
+async def ledger_consistency_proof(first: int, second: int = None,
+                                   user: dict = Depends(session_user),
+                                   db: AsyncSession = Depends(get_async_read_db)):
+    try:
+        return await db.run_sync(consistency_proof, first, second)
+    except ProofError as e:
+        raise HTTPException(404, str(e))
+
+
+# --------------------------------------------------
+# HASH-CHAIN VERIFICATION
+# --------------------------------------------------
+@router.post("/verify")
+def ledger_verify(full: bool = False, user: dict = Depends(require_admin)):
+    """
+    Verifies entries appended since the last verified checkpoint
+    (or the whole chain with ?full=true). Admins only; 409 while
+    another run is in progress.
+    """
+    try:
+        return verify_ledger(full)
+    except VerificationBusy as e:
+        raise HTTPException(409, str(e))
@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services.anchor_service import anchorer
+from services.cache_service import cache
+from services.event_hub import hub
+from services.ledger_writer import ledger_writer
+from services.metrics_service import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+metrics.gauge("cache_hits", "Cache hits (this process)", lambda: cache.stats.hits)
+metrics.gauge("cache_misses", "Cache misses (this process)", lambda: cache.stats.misses)
+metrics.gauge("event_subscribers", "Connected SSE clients", lambda: hub.subscriber_count)
+metrics.gauge("event_dropped_clients", "SSE clients dropped as too slow",
+              lambda: hub.dropped)
+metrics.gauge("ledger_writer_queue_depth", "Ledger entries waiting for group commit",
+              lambda: ledger_writer.queue_depth)
+metrics.gauge("ledger_writer_entries_committed", "Ledger entries committed by the writer",
+              lambda: ledger_writer.entries_committed)
+metrics.gauge("anchor_queue_depth", "Document hashes waiting to be sealed",
+              lambda: anchorer.queue_depth)
+metrics.gauge("anchor_batches_anchored", "Anchor batch roots submitted (this process)",
+              lambda: anchorer.batches_anchored)
+metrics.gauge("anchor_hashes_dropped", "Hashes left for backfill under backpressure",
+              lambda: anchorer.hashes_dropped)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from services.access_service import is_admin, require_admin, session_user
+from services.session_service import logout_user, session_store
+
+router = APIRouter(prefix="/sessions", tags=["Sessions"])
+
+
+@router.delete("/users/{email}")
+def force_logout(email: str, request: Request,
+                 user: dict = Depends(session_user)):
+    """
+    Ends every session of a user, in every worker sharing the store
+    (this one included). Users may end their own; admins anyone's.
+    """
+    if user.get("email") != email and not is_admin(user):
+        raise HTTPException(403, "not allowed")
+
+    ended = logout_user(email)
+    if user.get("email") == email:
+        request.session.clear()
+    return {"email": email, "sessions_ended": ended}
+
+
+@router.get("/stats")
+def session_stats(user: dict = Depends(require_admin)):
+    return session_store.describe()
@@ -0,0 +1,102 @@
+import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database.async_db import get_async_read_db
+from database.init_db import get_db
+from models.transaction import TradeTransaction
+from services.access_service import can_read_transaction, is_auditor, session_user
+from services.transaction_service import (
+    TRANSACTION_PAGE_SIZE,
+    InvalidTransition,
+    TransactionNotFound,
+    active_transactions,
+    counterparty_transactions,
+    create_transaction,
+    status_history,
+    transaction_dict,
+    transition
+)
+
+router = APIRouter(prefix="/transactions", tags=["Transactions"])
+
+
+def _actor(request: Request):
+    return session_user(request).get("email")
+
+
+# --------------------------------------------------
+# WRITES
+# --------------------------------------------------
+@router.post("/api")
+def create(data: dict, request: Request, db: Session = Depends(get_db)):
+    """
+    The caller must be the buyer or the seller of the new trade.
+    """
+    actor = _actor(request)
+    try:
+        buyer, seller = data["buyer_email"], data["seller_email"]
+    except KeyError as e:
+        raise HTTPException(400, f"missing {e.args[0]}")
+    if actor not in (buyer, seller):
+        raise HTTPException(403, "you must be the buyer or the seller")
+    return transaction_dict(create_transaction(db, buyer, seller, actor))
+
+
+@router.post("/{transaction_id}/status")
+def change_status(transaction_id: int, data: dict, request: Request,
+                  db: Session = Depends(get_db)):
+    """
+    Body: {"status": "SHIPPED", "expected_status": "IN_PROGRESS"}
+    (expected_status optional). 409 if the move is not allowed.
+    Parties to the trade and auditors only.
+    """
+    user = session_user(request)
+    actor = user.get("email")
+    if not data.get("status"):
+        raise HTTPException(400, "missing status")
+    tx = db.get(TradeTransaction, transaction_id)
+    if tx is None or not can_read_transaction(user, tx):
+        raise HTTPException(404, "transaction not found")
+    try:
+        old, new = transition(db, transaction_id, data["status"], actor,
+                              data.get("expected_status"))
+    except TransactionNotFound as e:
+        raise HTTPException(404, str(e))
+    except InvalidTransition as e:
+        raise HTTPException(409, str(e))
+    return {"id": transaction_id, "from_status": old, "status": new}
+
+
+# --------------------------------------------------
+# READS (parties see their own trades; auditors see all)
+# --------------------------------------------------
+@router.get("/active")
+async def list_active(before: datetime.datetime = None,
+                      limit: int = TRANSACTION_PAGE_SIZE,
+                      user: dict = Depends(session_user),
+                      db: AsyncSession = Depends(get_async_read_db)):
+    party = None if is_auditor(user) else user.get("email")
+    return await db.run_sync(active_transactions, before, min(limit, 500), party)
+
+
+@router.get("/counterparty/{email}")
+async def list_counterparty(email: str, before: datetime.datetime = None,
+                            limit: int = TRANSACTION_PAGE_SIZE,
+                            user: dict = Depends(session_user),
+                            db: AsyncSession = Depends(get_async_read_db)):
+    if email != user.get("email") and not is_auditor(user):
+        raise HTTPException(403, "not allowed")
+    return await db.run_sync(counterparty_transactions, email, before, min(limit, 500))
+
+
+@router.get("/{transaction_id}/history")
+async def history(transaction_id: int,
+                  user: dict = Depends(session_user),
+                  db: AsyncSession = Depends(get_async_read_db)):
+    tx = await db.get(TradeTransaction, transaction_id)
+    if tx is None or not can_read_transaction(user, tx):
+        raise HTTPException(404, "transaction not found")
+    return await db.run_sync(status_history, transaction_id)
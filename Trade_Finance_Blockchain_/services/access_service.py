@@ -0,0 +1,66 @@
+"""
+Access checks shared by the JSON API routes.
+
+Every API route needs a logged-in session, like the HTML pages. Past
+that, parties (buyer / seller / bank) see their own records: documents
+they own, trades they are buyer or seller on. Two env lists widen it:
+    TRADECHAIN_ADMINS        emails allowed to run maintenance endpoints
+                             (verification, stats); they can read everything
+    TRADECHAIN_AUDIT_ROLES   roles that can read every party's records
+                             (default: admin,auditor)
+
+Use as FastAPI dependencies:
+    user: dict = Depends(session_user)
+    user: dict = Depends(require_auditor)
+"""
+import os
+
+from fastapi import HTTPException, Request
+
+TRADECHAIN_ADMINS = {
+    email.strip() for email in os.getenv("TRADECHAIN_ADMINS", "").split(",") if email.strip()
+}
+AUDIT_ROLES = {
+    role.strip().lower()
+    for role in os.getenv("TRADECHAIN_AUDIT_ROLES", "admin,auditor").split(",")
+    if role.strip()
+}
+
+
+def session_user(request: Request):
+    user = request.session.get("user")
+    if not user:
+        raise HTTPException(401, "not logged in")
+    return user
+
+
+def is_admin(user: dict):
+    return user.get("email") in TRADECHAIN_ADMINS or (user.get("role") or "").lower() == "admin"
+
+
+def is_auditor(user: dict):
+    return is_admin(user) or (user.get("role") or "").lower() in AUDIT_ROLES
+
+
+def require_admin(request: Request):
+    user = session_user(request)
+    if not is_admin(user):
+        raise HTTPException(403, "not allowed")
+    return user
+
+
+def require_auditor(request: Request):
+    user = session_user(request)
+    if not is_auditor(user):
+        raise HTTPException(403, "not allowed")
+    return user
+
+
+def can_read_document(user: dict, document):
+    return is_auditor(user) or (
+        document.owner_email is not None and document.owner_email == user.get("email")
+    )
+
+
+def can_read_transaction(user: dict, tx):
+    return is_auditor(user) or user.get("email") in (tx.buyer_email, tx.seller_email)
@@ -1,49 +1,62 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
-from models.transaction import TradeTransaction
-from models.ledger_entry import LedgerEntry
+from services.cache_service import ANALYTICS_KEY, cache
+from services.counter_service import (
+    counters_to_analytics,
+    read_counters,
+    read_counters_async
+)
 
 
 def generate_analytics(db: Session):
     """
     SAFE analytics that NEVER crashes dashboard
     (works even if DB schema is incomplete)
+
+    Reads the incrementally maintained counters (one small table)
+    instead of running GROUP BY / COUNT over transactions and ledger.
     """
 
     analytics = {
-        "documents_by_type": {},     # disabled safely
+        "documents_by_type": {},
         "trades_by_status": {},
         "ledger_activity_count": 0
     }
 
-    # -------------------------------
-    # TRANSACTIONS BY STATUS
-    # -------------------------------
     try:
-        trades = (
-            db.query(
-                TradeTransaction.status,
-                func.count(TradeTransaction.id)
-            )
-            .group_by(TradeTransaction.status)
-            .all()
-        )
-
-        analytics["trades_by_status"] = {
-            status.lower(): count for status, count in trades
-        }
+        analytics.update(counters_to_analytics(read_counters(db)))
     except Exception as e:
-        print("TRADE ANALYTICS ERROR:", e)
+        print("COUNTER ANALYTICS ERROR:", e)
+
+    return analytics
+
+
+async def generate_analytics_async(db):
+    """
+    generate_analytics for an AsyncSession.
+    """
+    analytics = {
+        "documents_by_type": {},
+        "trades_by_status": {},
+        "ledger_activity_count": 0
+    }
 
-    # -------------------------------
-    # LEDGER COUNT
-    # -------------------------------
     try:
-        analytics["ledger_activity_count"] = (
-            db.query(func.count(LedgerEntry.id)).scalar() or 0
-        )
+        analytics.update(counters_to_analytics(await read_counters_async(db)))
     except Exception as e:
-        print("LEDGER ANALYTICS ERROR:", e)
+        print("COUNTER ANALYTICS ERROR:", e)
 
     return analytics
+
+
+def cached_analytics(db: Session):
+    """
+    generate_analytics behind the TTL cache; counter writes invalidate it.
+    """
+    return cache.get_or_set(ANALYTICS_KEY, lambda: generate_analytics(db))
+
+
+async def cached_analytics_async(db):
+    return await cache.get_or_set_async(
+        ANALYTICS_KEY, lambda: generate_analytics_async(db)
+    )
@@ -0,0 +1,587 @@
+"""
+Batched anchoring of document hashes.
+
+Document digests (see blockchain_service.document_hashed) are queued in
+memory and sealed into batches of up to ANCHOR_BATCH_SIZE hashes, or
+whatever arrived within ANCHOR_FLUSH_SECONDS. Each batch becomes one
+Merkle tree (merkle_service.MemoryTree): the batch row and one receipt
+per document, holding its audit path, are committed together, and only
+the root is submitted to the anchoring backend. One anchor therefore
+covers thousands of documents, and any single document can later be
+proven against the anchored root from its receipt alone.
+
+Submission runs in its own thread, reading due batches from the
+database, so a slow or unreachable backend never loses sealed batches:
+failures are retried with exponential backoff (plus jitter) and a batch
+is marked failed after ANCHOR_MAX_ATTEMPTS. Backpressure: once
+ANCHOR_MAX_PENDING batches are waiting for the backend, sealing pauses,
+the in-memory queue fills up and new hashes are skipped rather than
+holding up the append that produced them; skipped hashes are picked up
+again by the backfill command.
+
+Backends are pluggable (register_backend); "local" is a stand-in node
+that appends roots to a JSON-lines file.
+
+CLI (from Trade_Finance_Blockchain_/):
+    python -m services.anchor_service stats
+    python -m services.anchor_service backfill
+    python -m services.anchor_service retry
+    python -m services.anchor_service receipt <sha256>
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models.anchor import AnchorBatch, AnchorReceipt
+from models.blob import Blob
+from services.blockchain_service import add_hash_listener, remove_hash_listener
+from services.merkle_service import MemoryTree, leaf_hash, verify_inclusion
+
+ANCHOR_BACKEND = os.getenv("ANCHOR_BACKEND", "local")
+ANCHOR_BATCH_SIZE = int(os.getenv("ANCHOR_BATCH_SIZE", "4096"))
+ANCHOR_FLUSH_SECONDS = float(os.getenv("ANCHOR_FLUSH_SECONDS", "10"))
+ANCHOR_QUEUE_SIZE = int(os.getenv("ANCHOR_QUEUE_SIZE", "100000"))
+# sealed batches waiting for the backend before sealing pauses
+ANCHOR_MAX_PENDING = int(os.getenv("ANCHOR_MAX_PENDING", "32"))
+ANCHOR_MAX_ATTEMPTS = int(os.getenv("ANCHOR_MAX_ATTEMPTS", "8"))
+ANCHOR_BACKOFF_SECONDS = float(os.getenv("ANCHOR_BACKOFF_SECONDS", "1"))
+ANCHOR_BACKOFF_MAX = float(os.getenv("ANCHOR_BACKOFF_MAX", "300"))
+# how long a submitter owns a batch before another process may take it
+ANCHOR_SUBMIT_LEASE = float(os.getenv("ANCHOR_SUBMIT_LEASE", "60"))
+ANCHOR_NODE_PATH = os.getenv("ANCHOR_NODE_PATH", "storage/anchor_node.jsonl")
+
+# SQLite's bound-parameter limit is the tightest of the supported backends
+_IN_CHUNK = 500
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+class AnchorError(Exception):
+    """
+    Backend could not take the root right now; the batch is retried.
+    """
+
+
+# --------------------------------------------------
+# BACKENDS
+# --------------------------------------------------
+class LocalNode:
+    """
+    Stand-in for a chain node. Every submitted root becomes a "block"
+    appended to a JSON-lines file (in memory with path=None).
+    fail_rate makes that share of submissions fail, to exercise retries.
+    """
+    name = "local"
+
+    def __init__(self, path: str = ANCHOR_NODE_PATH, fail_rate: float = None):
+        self.path = path
+        self.fail_rate = float(os.getenv("ANCHOR_LOCAL_FAIL_RATE", "0")) \
+            if fail_rate is None else fail_rate
+        self._lock = threading.Lock()
+        self._blocks = None
+
+    def _load(self):
+        # read on first use, not at app startup
+        if self._blocks is None:
+            self._blocks = []
+            if self.path and os.path.exists(self.path):
+                with open(self.path) as f:
+                    self._blocks = [json.loads(line) for line in f if line.strip()]
+        return self._blocks
+
+    def submit(self, root_hash: str, size: int):
+        if self.fail_rate and random.random() < self.fail_rate:
+            raise AnchorError("local node rejected the submission")
+
+        with self._lock:
+            self._load()
+            block = {
+                "height": len(self._blocks),
+                "root_hash": root_hash,
+                "size": size,
+                "timestamp": datetime.datetime.utcnow().isoformat()
+            }
+            if self.path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(block) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._blocks.append(block)
+        return f"{self.name}:{block['height']}"
+
+    def lookup(self, anchor_ref: str):
+        """
+        The block an anchor_ref points at, or None.
+        """
+        name, _, height = anchor_ref.partition(":")
+        if name != self.name or not height.isdigit():
+            return None
+        with self._lock:
+            blocks, height = self._load(), int(height)
+            return blocks[height] if height < len(blocks) else None
+
+
+BACKENDS = {"local": LocalNode}
+
+
+def register_backend(name: str, factory):
+    """
+    factory() must return an object with submit(root_hash, size) -> ref
+    (raising AnchorError on retryable failures) and lookup(ref).
+    """
+    BACKENDS[name] = factory
+
+
+def create_backend(name: str = ANCHOR_BACKEND):
+    if name not in BACKENDS:
+        raise ValueError(f"unknown anchor backend: {name}")
+    return BACKENDS[name]()
+
+
+# --------------------------------------------------
+# SEALING (caller commits)
+# --------------------------------------------------
+def _already_receipted(db, digests):
+    found = set()
+    for start in range(0, len(digests), _IN_CHUNK):
+        found.update(db.execute(
+            select(AnchorReceipt.content_hash)
+            .where(AnchorReceipt.content_hash.in_(digests[start:start + _IN_CHUNK]))
+        ).scalars())
+    return found
+
+
+def seal_batch(db, digests):
+    """
+    Builds the Merkle tree for digests (duplicates and already anchored
+    hashes are skipped) and adds the batch plus its receipts.
+    Returns the AnchorBatch, or None if nothing was left to anchor.
+    """
+    digests = list(dict.fromkeys(d.lower() for d in digests))
+    seen = _already_receipted(db, digests)
+    digests = [d for d in digests if d not in seen]
+    if not digests:
+        return None
+
+    tree = MemoryTree([leaf_hash(bytes.fromhex(d)) for d in digests])
+    batch = AnchorBatch(
+        root_hash=tree.root().hex(),
+        size=tree.size,
+        status="pending",
+        backend=ANCHOR_BACKEND,
+        next_attempt_at=datetime.datetime.utcnow()
+    )
+    db.add(batch)
+    db.flush()
+
+    db.execute(insert(AnchorReceipt), [
+        {
+            "batch_id": batch.id,
+            "content_hash": digest,
+            "leaf_index": index,
+            "path": ",".join(node.hex() for node in tree.path(index))
+        }
+        for index, digest in enumerate(digests)
+    ])
+    return batch
+
+
+def backfill(db, batch_size: int = ANCHOR_BATCH_SIZE):
+    """
+    Seals every stored blob that has no receipt yet (hashes stored
+    before anchoring was enabled, or skipped under backpressure).
+    """
+    sealed = 0
+    while True:
+        digests = db.execute(
+            select(Blob.hash)
+            .outerjoin(AnchorReceipt, AnchorReceipt.content_hash == Blob.hash)
+            .where(AnchorReceipt.id.is_(None))
+            .limit(batch_size)
+        ).scalars().all()
+        if not digests:
+            return sealed
+        seal_batch(db, digests)
+        db.commit()
+        sealed += len(digests)
+
+
+# --------------------------------------------------
+# SUBMISSION
+# --------------------------------------------------
+def backoff_delay(attempts: int):
+    delay = min(ANCHOR_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0), ANCHOR_BACKOFF_MAX)
+    return delay * (0.5 + random.random() / 2)
+
+
+def pending_count(db):
+    return db.execute(
+        select(func.count(AnchorBatch.id)).where(AnchorBatch.status == "pending")
+    ).scalar() or 0
+
+
+def claim_due_batch(db):
+    """
+    Takes the oldest due pending batch by pushing its next_attempt_at
+    past the lease, so concurrent submitters skip it. Commits.
+    """
+    now = datetime.datetime.utcnow()
+    candidate = db.execute(
+        select(AnchorBatch.id, AnchorBatch.next_attempt_at)
+        .where(AnchorBatch.status == "pending", AnchorBatch.next_attempt_at <= now)
+        .order_by(AnchorBatch.next_attempt_at, AnchorBatch.id)
+        .limit(1)
+    ).first()
+    if candidate is None:
+        return None
+
+    claimed = db.execute(
+        update(AnchorBatch)
+        .where(AnchorBatch.id == candidate.id,
+               AnchorBatch.status == "pending",
+               AnchorBatch.next_attempt_at == candidate.next_attempt_at)
+        .values(next_attempt_at=now + datetime.timedelta(seconds=ANCHOR_SUBMIT_LEASE))
+    ).rowcount
+    db.commit()
+    return db.get(AnchorBatch, candidate.id) if claimed else None
+
+
+def submit_batch(db, batch, backend):
+    """
+    Submits one batch root. On failure schedules the next attempt with
+    backoff, or marks the batch failed after ANCHOR_MAX_ATTEMPTS.
+    Returns True once anchored. Commits.
+    """
+    batch.attempts += 1
+    try:
+        batch.anchor_ref = backend.submit(batch.root_hash, batch.size)
+    except Exception as e:
+        batch.error = str(e)[:500]
+        if batch.attempts >= ANCHOR_MAX_ATTEMPTS:
+            batch.status = "failed"
+            logger.error("batch %s failed after %d attempts: %s", batch.id, batch.attempts, e)
+        else:
+            batch.next_attempt_at = datetime.datetime.utcnow() + \
+                datetime.timedelta(seconds=backoff_delay(batch.attempts))
+        db.commit()
+        return False
+
+    batch.status = "anchored"
+    batch.backend = getattr(backend, "name", ANCHOR_BACKEND)
+    batch.error = None
+    batch.anchored_at = datetime.datetime.utcnow()
+    db.commit()
+    return True
+
+
+def retry_failed(db):
+    """
+    Puts failed batches back in the queue with a fresh attempt budget.
+    """
+    count = db.execute(
+        update(AnchorBatch)
+        .where(AnchorBatch.status == "failed")
+        .values(status="pending", attempts=0,
+                next_attempt_at=datetime.datetime.utcnow())
+    ).rowcount
+    db.commit()
+    return count
+
+
+# --------------------------------------------------
+# RECEIPTS
+# --------------------------------------------------
+def receipt(db, content_hash: str, backend=None):
+    """
+    Receipt for one document hash, with the proof checked against the
+    batch root (and against the backend's record if backend is given).
+    Returns None if the hash has not been sealed yet.
+    """
+    content_hash = content_hash.lower()
+    row = db.execute(
+        select(AnchorReceipt, AnchorBatch)
+        .join(AnchorBatch, AnchorBatch.id == AnchorReceipt.batch_id)
+        .where(AnchorReceipt.content_hash == content_hash)
+    ).first()
+    if row is None:
+        return None
+
+    entry, batch = row
+    path = [node for node in entry.path.split(",") if node]
+    result = {
+        "content_hash": entry.content_hash,
+        "leaf_hash": leaf_hash(bytes.fromhex(entry.content_hash)).hex(),
+        "leaf_index": entry.leaf_index,
+        "path": path,
+        "batch": {
+            "id": batch.id,
+            "root_hash": batch.root_hash,
+            "size": batch.size,
+            "status": batch.status,
+            "backend": batch.backend,
+            "anchor_ref": batch.anchor_ref,
+            "anchored_at": batch.anchored_at
+        },
+        "verified": verify_inclusion(
+            leaf_hash(bytes.fromhex(entry.content_hash)), entry.leaf_index,
+            batch.size, [bytes.fromhex(node) for node in path],
+            bytes.fromhex(batch.root_hash)
+        )
+    }
+
+    if backend is not None and batch.anchor_ref:
+        block = backend.lookup(batch.anchor_ref)
+        result["anchor_confirmed"] = bool(block) and block.get("root_hash") == batch.root_hash
+    return result
+
+
+def anchor_stats(db):
+    by_status = dict(db.execute(
+        select(AnchorBatch.status, func.count(AnchorBatch.id))
+        .group_by(AnchorBatch.status)
+    ).all())
+    documents = db.execute(select(func.count(AnchorReceipt.id))).scalar() or 0
+    anchored = db.execute(
+        select(func.coalesce(func.sum(AnchorBatch.size), 0))
+        .where(AnchorBatch.status == "anchored")
+    ).scalar()
+    return {
+        "batches": by_status,
+        "documents_sealed": documents,
+        "documents_anchored": anchored,
+        "documents_per_anchor": round(anchored / by_status["anchored"], 1)
+        if by_status.get("anchored") else 0
+    }
+
+
+# --------------------------------------------------
+# PIPELINE
+# --------------------------------------------------
+class Anchorer:
+    """
+    Two threads: the sealer drains the hash queue into batches, the
+    submitter sends due batch roots to the backend. They only meet in
+    the database, so either side can restart without losing work.
+    """
+
+    def __init__(self, session_factory=None, backend=None,
+                 batch_size: int = ANCHOR_BATCH_SIZE,
+                 flush_seconds: float = ANCHOR_FLUSH_SECONDS,
+                 queue_size: int = ANCHOR_QUEUE_SIZE,
+                 max_pending: int = ANCHOR_MAX_PENDING):
+        self.session_factory = session_factory
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stopping = threading.Event()
+        self._wake = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+        self.hashes_sealed = 0
+        self.batches_anchored = 0
+        self.hashes_dropped = 0
+
+    def _session(self):
+        if self.session_factory is None:
+            from database.init_db import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    # --------------------------------------------------
+    # LIFECYCLE
+    # --------------------------------------------------
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            if self.backend is None:
+                self.backend = create_backend()
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._seal_loop, name="anchor-sealer", daemon=True),
+                threading.Thread(target=self._submit_loop, name="anchor-submitter", daemon=True)
+            ]
+            for thread in self._threads:
+                thread.start()
+            add_hash_listener(self.listener)
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Seals everything queued so far, then stops both threads.
+        Unsubmitted batches stay pending for the next start.
+        """
+        with self._lock:
+            if not self.running:
+                return
+            remove_hash_listener(self.listener)
+            # set first: the sealer must not sit in backpressure while
+            # it drains the queue
+            self._stopping.set()
+            self._wake.set()
+            self._queue.put(_STOP)
+            self._threads[0].join(timeout)
+            self._threads[1].join(timeout)
+            self._threads = []
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    # --------------------------------------------------
+    # PRODUCERS
+    # --------------------------------------------------
+    def submit(self, digest: str, timeout: float = None):
+        """
+        Queues one document digest; blocks while the queue is full.
+        """
+        self._queue.put(digest, timeout=timeout)
+
+    def listener(self, digest: str):
+        # runs inside generate_hash: never wait on the queue
+        try:
+            self._queue.put_nowait(digest)
+        except queue.Full:
+            self.hashes_dropped += 1
+            logger.warning("queue full, %s left for backfill", digest)
+
+    # --------------------------------------------------
+    # SEALER THREAD
+    # --------------------------------------------------
+    def _seal_loop(self):
+        stopping = False
+
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_seconds
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._seal(batch, wait=not stopping)
+
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        for start in range(0, len(leftover), self.batch_size):
+            self._seal(leftover[start:start + self.batch_size], wait=False)
+
+    def _seal(self, digests, wait: bool = True):
+        db = self._session()
+        try:
+            # backpressure: hold the queue while the backend is behind
+            while wait and not self._stopping.is_set() and \
+                    pending_count(db) >= self.max_pending:
+                db.rollback()
+                self._wake.set()
+                time.sleep(min(self.flush_seconds, 1.0))
+
+            for attempt in range(2):
+                try:
+                    batch = seal_batch(db, digests)
+                    sealed = batch.size if batch is not None else 0
+                    db.commit()
+                    break
+                except IntegrityError:
+                    # another process receipted one of these meanwhile
+                    db.rollback()
+                    if attempt:
+                        raise
+        except Exception:
+            db.rollback()
+            logger.exception("sealing batch failed")
+            return
+        finally:
+            db.close()
+
+        if sealed:
+            self.hashes_sealed += sealed
+            self._wake.set()
+
+    # --------------------------------------------------
+    # SUBMITTER THREAD
+    # --------------------------------------------------
+    def _submit_loop(self):
+        while not self._stopping.is_set():
+            db = self._session()
+            try:
+                batch = claim_due_batch(db)
+                if batch is not None and submit_batch(db, batch, self.backend):
+                    self.batches_anchored += 1
+            except Exception:
+                db.rollback()
+                batch = None
+                logger.exception("submitting batch failed")
+            finally:
+                db.close()
+
+            if batch is None:
+                self._wake.wait(1.0)
+                self._wake.clear()
+
+
+anchorer = Anchorer()
+
+
+if __name__ == "__main__":
+    from database.init_db import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Document hash anchoring")
+    parser.add_argument("command", choices=["stats", "backfill", "retry", "receipt"])
+    parser.add_argument("content_hash", nargs="?")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if args.command == "backfill":
+            print(f"sealed {backfill(db)} hashes (submitted by the running app)")
+        elif args.command == "retry":
+            print(f"requeued {retry_failed(db)} failed batches")
+        elif args.command == "receipt":
+            if not args.content_hash:
+                parser.error("receipt needs a content hash")
+            found = receipt(db, args.content_hash, create_backend())
+            print(json.dumps(found, indent=2, default=str) if found else "not sealed")
+            raise SystemExit(0 if found and found["verified"] else 1)
+        else:
+            for key, value in anchor_stats(db).items():
+                print(f"{key}: {value}")
+    finally:
+        db.close()
@@ -0,0 +1,273 @@
+"""
+Content-addressed document store.
+
+Every uploaded file is stored once, at a path derived from its SHA-256
+(the same digest generate_hash / hash_upload produce):
+
+    <BLOB_STORE_DIR>/ab/cd/abcd...ef
+
+Documents point at a blob through Document.content_hash; blobs.ref_count
+counts those links, so the invoice uploaded by buyer, seller and bank
+is three Document rows but one file on disk.
+
+Orphaned blobs (ref_count 0) are removed by sweep_orphans(), which is
+meant to run as maintenance rather than inline with deletes:
+    python -m services.blob_service sweep
+A blob is only swept once it has been unreferenced for
+BLOB_SWEEP_GRACE_SECONDS. An upload whose content is already stored
+restarts that grace period (hold_blob) before relying on the file, and
+the sweep unlinks files inside the transaction that deletes their rows:
+either the upload's hold lands first and the row is kept, or the file
+is already gone when the upload looks again and it is placed anew.
+"""
+import argparse
+import datetime
+import os
+import re
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from starlette.concurrency import run_in_threadpool
+
+from models.blob import Blob
+from models.document import Document
+from services.blockchain_service import (
+    _spool_path,
+    document_hashed,
+    hash_stream,
+    hash_upload
+)
+from services.counter_service import record_document_created
+
+BLOB_STORE_DIR = os.path.abspath(os.getenv("BLOB_STORE_DIR", "storage/blobs"))
+# spool files live inside the store so the final move is an atomic rename
+BLOB_SPOOL_DIR = os.path.join(BLOB_STORE_DIR, "tmp")
+BLOB_SWEEP_GRACE_SECONDS = float(os.getenv("BLOB_SWEEP_GRACE_SECONDS", "3600"))
+
+CONTENT_HASH_RE = re.compile(r"[0-9a-f]{64}")
+
+
+def is_content_hash(value) -> bool:
+    """
+    True for a lowercase hex SHA-256, the only form blobs are stored under.
+    """
+    return isinstance(value, str) and CONTENT_HASH_RE.fullmatch(value) is not None
+
+
+def blob_path(content_hash: str):
+    """
+    Raises ValueError unless content_hash is a lowercase hex SHA-256.
+    """
+    if not is_content_hash(content_hash):
+        raise ValueError(f"not a content hash: {content_hash!r}")
+    return os.path.join(
+        BLOB_STORE_DIR, content_hash[:2], content_hash[2:4], content_hash
+    )
+
+
+def blob_etag(content_hash: str):
+    return f'"{content_hash}"'
+
+
+# --------------------------------------------------
+# FILES
+# --------------------------------------------------
+def _place_file(spool_path: str, content_hash: str):
+    """
+    Moves a spooled upload to its content address.
+    Returns False (the spool file is left alone) if identical content
+    was already stored.
+    """
+    path = blob_path(content_hash)
+    if os.path.exists(path):
+        return False
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.chmod(spool_path, 0o444)   # blobs are immutable
+    os.replace(spool_path, path)
+    return True
+
+
+def _store_spooled(spool_path: str, content_hash: str):
+    try:
+        created = _place_file(spool_path, content_hash)
+        if not created:
+            hold_blob(content_hash)
+            # a sweep may have removed the file before the hold
+            created = _place_file(spool_path, content_hash)
+    finally:
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+    return created
+
+
+async def store_upload(upload):
+    """
+    Hashes and stores an upload without buffering it in memory.
+    Returns (HashResult with the blob path, stored_new_file).
+    """
+    os.makedirs(BLOB_SPOOL_DIR, exist_ok=True)
+    result = await hash_upload(upload, spool=True, spool_dir=BLOB_SPOOL_DIR)
+    try:
+        created = await run_in_threadpool(_store_spooled, result.path, result.digest)
+    except BaseException:
+        if os.path.exists(result.path):
+            os.remove(result.path)
+        raise
+    if created:
+        # listeners may block (anchoring backpressure): keep them off the loop
+        await run_in_threadpool(document_hashed, result.digest)
+    return result._replace(path=blob_path(result.digest)), created
+
+
+def store_file(path: str):
+    """
+    Sync counterpart of store_upload for files already on disk
+    (bulk imports): hashes and copies in a single read pass.
+    """
+    os.makedirs(BLOB_SPOOL_DIR, exist_ok=True)
+    with open(path, "rb") as f:
+        result = hash_stream(f, spool_path=_spool_path(BLOB_SPOOL_DIR))
+    created = _store_spooled(result.path, result.digest)
+    if created:
+        document_hashed(result.digest)
+    return result._replace(path=blob_path(result.digest)), created
+
+
+# --------------------------------------------------
+# REFERENCE COUNTS (caller commits)
+# --------------------------------------------------
+def acquire_blob(db, content_hash: str, size: int, count: int = 1):
+    dialect = db.get_bind().dialect.name
+    upsert = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}.get(dialect)
+
+    if upsert is not None:
+        stmt = upsert(Blob).values(hash=content_hash, size=size, ref_count=count)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[Blob.hash],
+            set_={"ref_count": Blob.ref_count + count}
+        ))
+    else:
+        blob = db.get(Blob, content_hash, with_for_update=True)
+        if blob is None:
+            db.add(Blob(hash=content_hash, size=size, ref_count=count))
+        else:
+            blob.ref_count += count
+
+
+def hold_blob(content_hash: str):
+    """
+    Restarts the sweep grace period of a stored blob, in its own
+    committed transaction, so an upload reusing the file has
+    BLOB_SWEEP_GRACE_SECONDS to link its document.
+    """
+    from database.init_db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(Blob)
+            .where(Blob.hash == content_hash, Blob.ref_count <= 0)
+            .values(released_at=datetime.datetime.utcnow())
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def release_blob(db, content_hash: str):
+    db.execute(
+        update(Blob)
+        .where(Blob.hash == content_hash, Blob.ref_count > 0)
+        .values(ref_count=Blob.ref_count - 1, released_at=datetime.datetime.utcnow())
+    )
+
+
+# --------------------------------------------------
+# DOCUMENTS
+# --------------------------------------------------
+def create_document(db, result, filename: str, document_type: str,
+                    owner_email: str, extracted_text: str = None):
+    """
+    Links a stored blob to a new Document row and commits.
+    """
+    document = Document(
+        filename=filename,
+        document_type=document_type,
+        owner_email=owner_email,
+        content_hash=result.digest,
+        extracted_text=extracted_text
+    )
+    db.add(document)
+    acquire_blob(db, result.digest, result.size)
+    record_document_created(db, document_type)
+    db.commit()
+    db.refresh(document)
+    return document
+
+
+def delete_document(db, document):
+    if document.content_hash:
+        release_blob(db, document.content_hash)
+    record_document_created(db, document.document_type, -1)
+    db.delete(document)
+    db.commit()
+
+
+def sweep_orphans(db, grace_seconds: float = BLOB_SWEEP_GRACE_SECONDS):
+    """
+    Deletes blob rows unreferenced for longer than grace_seconds, and
+    their files.
+    """
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=grace_seconds)
+    try:
+        hashes = db.execute(
+            delete(Blob)
+            .where(Blob.ref_count <= 0,
+                   func.coalesce(Blob.released_at, Blob.created_at) < cutoff)
+            .returning(Blob.hash)
+        ).scalars().all()
+
+        # unlinked before the commit: until then the deleted rows stay
+        # locked, so no hold_blob can slip in between
+        for content_hash in hashes:
+            try:
+                os.remove(blob_path(content_hash))
+            except FileNotFoundError:
+                pass
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return hashes
+
+
+def dedup_stats(db):
+    blobs = db.execute(select(Blob.size, Blob.ref_count)).all()
+    stored = sum(size for size, _ in blobs)
+    logical = sum(size * refs for size, refs in blobs)
+    return {
+        "blobs": len(blobs),
+        "links": sum(refs for _, refs in blobs),
+        "stored_bytes": stored,
+        "logical_bytes": logical,
+        "saved_bytes": logical - stored
+    }
+
+
+if __name__ == "__main__":
+    from database.init_db import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Content-addressed blob store")
+    parser.add_argument("command", choices=["stats", "sweep"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "sweep":
+            print(f"removed {len(sweep_orphans(db))} orphaned blobs")
+        else:
+            for key, value in dedup_stats(db).items():
+                print(f"{key}: {value}")
+    finally:
+        db.close()
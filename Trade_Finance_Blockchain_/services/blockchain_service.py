@@ -1,4 +1,153 @@
-import hashlib
-
-def generate_hash(file_bytes: bytes):
-    return hashlib.sha256(file_bytes).hexdigest()
+import hashlib
+import inspect
+import os
+import tempfile
+from collections import namedtuple
+
+from starlette.concurrency import run_in_threadpool
+
+from services.metrics_service import timed
+
+# 1 MiB keeps memory flat while still letting hashlib release the GIL
+CHUNK_SIZE = 1024 * 1024
+
+HashResult = namedtuple("HashResult", ["digest", "size", "path"])
+
+# callables notified with every document digest (e.g. the anchoring
+# pipeline); they run in the hashing thread and must be cheap
+_hash_listeners = []
+
+
+def add_hash_listener(listener):
+    if listener not in _hash_listeners:
+        _hash_listeners.append(listener)
+
+
+def remove_hash_listener(listener):
+    if listener in _hash_listeners:
+        _hash_listeners.remove(listener)
+
+
+def document_hashed(digest: str):
+    """
+    Announces a new document digest to the listeners.
+    """
+    for listener in list(_hash_listeners):
+        try:
+            listener(digest)
+        except Exception as e:
+            print("HASH LISTENER ERROR:", e)
+    return digest
+
+
+def generate_hash(file_bytes: bytes):
+    return document_hashed(hashlib.sha256(file_bytes).hexdigest())
+
+
+# --------------------------------------------------
+# STREAMING HASHER
+# --------------------------------------------------
+class StreamingHasher:
+    """
+    Incremental SHA-256 over chunks as they arrive.
+    Optionally copies every chunk to a spool file on disk.
+    """
+
+    def __init__(self, spool_path: str = None):
+        self._sha = hashlib.sha256()
+        self.size = 0
+        self.path = spool_path
+        self._spool = open(spool_path, "wb") if spool_path else None
+
+    def update(self, chunk: bytes):
+        self._sha.update(chunk)
+        self.size += len(chunk)
+        if self._spool:
+            self._spool.write(chunk)
+
+    def finish(self):
+        self.close()
+        return HashResult(self._sha.hexdigest(), self.size, self.path)
+
+    def close(self):
+        if self._spool:
+            self._spool.close()
+            self._spool = None
+
+    def discard(self):
+        self.close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _spool_path(spool_dir: str = None):
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=".part", dir=spool_dir)
+    os.close(fd)
+    return path
+
+
+def hash_stream(stream, chunk_size: int = CHUNK_SIZE, spool_path: str = None):
+    """
+    Hashes a sync file-like object chunk by chunk.
+    Memory use is bounded by chunk_size, not by the file size.
+    """
+    hasher = StreamingHasher(spool_path)
+    try:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    except BaseException:
+        hasher.discard()
+        raise
+    return hasher.finish()
+
+
+def hash_file(path: str, chunk_size: int = CHUNK_SIZE):
+    with open(path, "rb") as f:
+        return hash_stream(f, chunk_size)
+
+
+@timed("hash")
+async def hash_upload(upload, chunk_size: int = CHUNK_SIZE,
+                      spool: bool = False, spool_dir: str = None):
+    """
+    Hashes an upload without blocking the event loop.
+
+    Accepts a Starlette UploadFile, a sync file-like object, an object
+    with an async read(), or an async iterator of byte chunks
+    (e.g. request.stream()). Hashing always runs in the threadpool.
+    With spool=True the bytes are also written to a temp file whose
+    path is returned in HashResult.path.
+    """
+    spool_path = _spool_path(spool_dir) if spool else None
+
+    # UploadFile and plain file objects: one threadpool hop for the whole file
+    sync_file = getattr(upload, "file", None)
+    if sync_file is None and hasattr(upload, "read") and \
+            not inspect.iscoroutinefunction(upload.read):
+        sync_file = upload
+
+    if sync_file is not None:
+        if hasattr(sync_file, "seek"):
+            sync_file.seek(0)
+        return await run_in_threadpool(hash_stream, sync_file, chunk_size, spool_path)
+
+    # Async sources: hash each chunk as it arrives
+    hasher = StreamingHasher(spool_path)
+    try:
+        if hasattr(upload, "read"):
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                await run_in_threadpool(hasher.update, chunk)
+        else:
+            async for chunk in upload:
+                if chunk:
+                    await run_in_threadpool(hasher.update, chunk)
+    except BaseException:
+        hasher.discard()
+        raise
+    return hasher.finish()
@@ -0,0 +1,267 @@
+"""
+Response/data cache with TTL and write-driven invalidation.
+
+Backends:
+  - memory: per-process LRU with TTL (default)
+  - file:   one file per key under a shared directory (tmpfs /dev/shm
+            when available), so every uvicorn worker sees the same entries.
+            Entries are pickles, so the directory must be private to the
+            app user (0700, owned by it): FileCache refuses to start otherwise.
+
+Writers don't delete keys directly: they call mark_stale(db, key) and
+the keys are dropped right after that session commits, so a reader can
+never re-cache data from a transaction that later rolls back.
+"""
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+CACHE_BACKEND = os.getenv("TRADECHAIN_CACHE_BACKEND", "memory")
+CACHE_TTL = float(os.getenv("TRADECHAIN_CACHE_TTL", "2"))
+CACHE_MAX_ENTRIES = int(os.getenv("TRADECHAIN_CACHE_MAX_ENTRIES", "1024"))
+CACHE_DIR = os.getenv(
+    "TRADECHAIN_CACHE_DIR",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+                 f"tradechain-cache-{os.getuid()}")
+)
+
+# Well-known keys
+ANALYTICS_KEY = "analytics"
+RECENT_LEDGER_KEY = "ledger:recent"
+
+MISS = object()
+
+
+def ensure_private_dir(path: str):
+    """
+    Creates path with mode 0700 if missing, then checks it is a real
+    directory (not a symlink) owned by this user and closed to others.
+    Raises RuntimeError if not: another local user could plant files there.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise RuntimeError(f"{path} is not a directory")
+    if info.st_uid != os.getuid():
+        raise RuntimeError(f"{path} is not owned by uid {os.getuid()}")
+    if info.st_mode & 0o077:
+        raise RuntimeError(f"{path} is accessible to other users (mode "
+                           f"{stat.S_IMODE(info.st_mode):o}); expected 0700")
+    return path
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def to_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+class BaseCache:
+    backend = "base"
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl: float = CACHE_TTL):
+        raise NotImplementedError
+
+    def delete(self, *keys):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def get_or_set(self, key, loader, ttl: float = CACHE_TTL):
+        value = self.get(key)
+        if value is MISS:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+    async def get_or_set_async(self, key, loader, ttl: float = CACHE_TTL):
+        """
+        get_or_set for async loaders (loader() returns an awaitable).
+        """
+        value = self.get(key)
+        if value is MISS:
+            value = await loader()
+            self.set(key, value, ttl)
+        return value
+
+    def describe(self):
+        return {"backend": self.backend, "entries": len(self), **self.stats.to_dict()}
+
+
+# --------------------------------------------------
+# IN-PROCESS LRU
+# --------------------------------------------------
+class MemoryCache(BaseCache):
+    backend = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        super().__init__()
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.stats.misses += 1
+                return MISS
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return item[1]
+
+    def set(self, key, value, ttl: float = CACHE_TTL):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            self.stats.sets += 1
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self.stats.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# --------------------------------------------------
+# SHARED FILE / SHARED-MEMORY BACKEND
+# --------------------------------------------------
+class FileCache(BaseCache):
+    """
+    Entries are pickled (expires_at, value) files written atomically
+    with os.replace. Expiry uses wall-clock time so it is comparable
+    across processes. Hit/miss stats are per process.
+    """
+    backend = "file"
+
+    def __init__(self, directory: str = CACHE_DIR):
+        super().__init__()
+        self.directory = ensure_private_dir(directory)
+
+    def _path(self, key):
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name)
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                expires_at, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.stats.misses += 1
+            return MISS
+
+        if expires_at < time.time():
+            self.stats.misses += 1
+            return MISS
+        self.stats.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float = CACHE_TTL):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((time.time() + ttl, value), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+            self.stats.sets += 1
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def delete(self, *keys):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+                self.stats.invalidations += 1
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(self.directory)
+                   if not name.endswith(".tmp"))
+
+
+def build_cache(backend: str = CACHE_BACKEND):
+    if backend == "file":
+        return FileCache()
+    return MemoryCache()
+
+
+cache = build_cache()
+
+
+# --------------------------------------------------
+# COMMIT-DRIVEN INVALIDATION
+# --------------------------------------------------
+def mark_stale(db, *keys):
+    """
+    Invalidates keys once db's current transaction commits.
+    """
+    db.info.setdefault("stale_cache_keys", set()).update(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    keys = session.info.pop("stale_cache_keys", None)
+    if keys:
+        cache.delete(*keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("stale_cache_keys", None)
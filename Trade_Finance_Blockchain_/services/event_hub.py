@@ -0,0 +1,177 @@
+"""
+In-process pub/sub for live dashboard updates.
+
+Writers queue events on their DB session (queue_event, like
+mark_stale); the events are published once that session commits and
+dropped if it rolls back. publish() serializes an event once and hands
+the same bytes to every subscriber, so one DB change reaches N clients
+with no extra queries.
+
+Each subscriber has its own bounded queue. A client that falls
+EVENT_QUEUE_SIZE events behind is disconnected rather than buffered
+without limit; the browser's EventSource reconnects and reloads state.
+"""
+import asyncio
+import itertools
+import json
+import os
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+# newest ledger entries carried by one "ledger" event
+EVENT_LEDGER_ENTRIES = 20
+
+_CLOSED = object()
+
+
+def _json_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+class Subscription:
+    def __init__(self, hub, max_queued: int):
+        self.hub = hub
+        self.queue = asyncio.Queue(max_queued)
+        self.dropped = False
+
+    def offer(self, message):
+        """
+        Called on the event loop. Returns False if the client is too slow.
+        """
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.dropped = True
+            return False
+
+    async def next(self, timeout: float = None):
+        """
+        Next encoded message, None on timeout, _CLOSED once dropped.
+        """
+        if self.dropped and self.queue.empty():
+            return _CLOSED
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return _CLOSED if self.dropped else None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class EventHub:
+    def __init__(self, max_queued: int = EVENT_QUEUE_SIZE):
+        self.max_queued = max_queued
+        self._subscribers = set()
+        self._loop = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def bind(self, loop):
+        self._loop = loop
+
+    def subscribe(self):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self, self.max_queued)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def encode(self, event_type: str, data):
+        with self._lock:
+            event_id = next(self._ids)
+        payload = json.dumps(data, default=_json_value, separators=(",", ":"))
+        return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n".encode("utf-8")
+
+    def publish(self, event_type: str, data):
+        """
+        Thread-safe; may be called from the ledger writer thread or
+        the threadpool. No-op while nobody is subscribed.
+        """
+        if not self._subscribers or self._loop is None or self._loop.is_closed():
+            return
+        message = self.encode(event_type, data)
+        self._loop.call_soon_threadsafe(self._fan_out, message)
+
+    def _fan_out(self, message):
+        self.published += 1
+        for subscription in list(self._subscribers):
+            if not subscription.offer(message):
+                self.dropped += 1
+                self.unsubscribe(subscription)
+
+    def describe(self):
+        return {
+            "subscribers": self.subscriber_count,
+            "published": self.published,
+            "dropped_clients": self.dropped
+        }
+
+
+hub = EventHub()
+
+
+async def sse_stream(subscription, heartbeat: float = EVENT_HEARTBEAT_SECONDS):
+    """
+    text/event-stream body for one subscriber.
+    """
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            message = await subscription.next(heartbeat)
+            if message is _CLOSED:
+                break
+            yield message if message is not None else b": ping\n\n"
+    finally:
+        subscription.close()
+
+
+# --------------------------------------------------
+# COMMIT-DRIVEN PUBLISHING
+# --------------------------------------------------
+def queue_event(db, event_type: str, data):
+    """
+    Publishes the event once db's current transaction commits.
+    "counters" events are merged: their deltas are summed per commit.
+    """
+    pending = db.info.setdefault("pending_events", {})
+    if event_type == "counters":
+        deltas = pending.setdefault("counters", {})
+        for name, delta in data.items():
+            deltas[name] = deltas.get(name, 0) + delta
+    elif event_type == "ledger":
+        ledger = pending.setdefault("ledger", {"count": 0, "entries": []})
+        ledger["count"] += data["count"]
+        ledger["entries"] = (data["entries"] + ledger["entries"])[:EVENT_LEDGER_ENTRIES]
+    else:
+        pending[event_type] = data
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session):
+    pending = session.info.pop("pending_events", None)
+    if not pending:
+        return
+    for event_type, data in pending.items():
+        if event_type == "counters":
+            data = {"deltas": data}
+        hub.publish(event_type, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("pending_events", None)
@@ -0,0 +1,219 @@
+"""
+Streaming exports of the ledger, transactions and documents.
+
+Rows are read with yield_per on a streaming (server-side) cursor,
+encoded one at a time as NDJSON or CSV, and gzip-compressed
+incrementally, so memory stays flat however many rows are exported.
+Unfiltered exports are ordered by (time column, id), which each table
+has an index for, so the database streams rows instead of sorting them.
+Ledger exports merge in archived entries (ledger_archive_service),
+decompressing one segment block at a time.
+The generators are synchronous; StreamingResponse drives them in the
+threadpool.
+"""
+import csv
+import heapq
+import io
+import json
+import zlib
+from collections import namedtuple
+
+from sqlalchemy import or_, select
+
+from database.init_db import read_engine
+from models.document import Document
+from models.ledger_entry import LedgerEntry
+from models.transaction import TradeTransaction
+
+EXPORT_FETCH_SIZE = 2000
+# flush compressed output to the client in ~64 KiB pieces
+EXPORT_CHUNK_BYTES = 64 * 1024
+GZIP_LEVEL = 6
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+ExportSpec = namedtuple("ExportSpec", ["model", "columns", "time_column"])
+
+EXPORTS = {
+    "ledger": ExportSpec(LedgerEntry, (
+        LedgerEntry.id, LedgerEntry.leaf_index, LedgerEntry.document_id,
+        LedgerEntry.action, LedgerEntry.actor_role.label("actor"),
+        LedgerEntry.timestamp, LedgerEntry.prev_hash, LedgerEntry.entry_hash
+    ), LedgerEntry.timestamp),
+    "transactions": ExportSpec(TradeTransaction, (
+        TradeTransaction.id, TradeTransaction.buyer_email,
+        TradeTransaction.seller_email, TradeTransaction.status,
+        TradeTransaction.created_at
+    ), TradeTransaction.created_at),
+    "documents": ExportSpec(Document, (
+        Document.id, Document.filename, Document.document_type,
+        Document.owner_email, Document.content_hash, Document.uploaded_at
+    ), Document.uploaded_at),
+}
+
+
+def _entity_filters(kind: str, document_id: int = None, actor: str = None):
+    filters = []
+
+    if document_id is not None:
+        if kind == "ledger":
+            filters.append(LedgerEntry.document_id == document_id)
+        elif kind == "documents":
+            filters.append(Document.id == document_id)
+        else:
+            raise ValueError("document_id filter is not supported for " + kind)
+
+    if actor is not None:
+        if kind == "ledger":
+            filters.append(LedgerEntry.actor_role == actor)
+        elif kind == "documents":
+            filters.append(Document.owner_email == actor)
+        else:
+            filters.append(or_(
+                TradeTransaction.buyer_email == actor,
+                TradeTransaction.seller_email == actor
+            ))
+
+    return filters
+
+
+def export_query(kind: str, start=None, end=None, document_id: int = None,
+                 actor: str = None):
+    """
+    Raises ValueError for an unknown kind or unsupported filter.
+    start is inclusive, end exclusive.
+    """
+    spec = EXPORTS.get(kind)
+    if spec is None:
+        raise ValueError(f"unknown export '{kind}'")
+
+    query = select(*spec.columns)
+    if start is not None:
+        query = query.where(spec.time_column >= start)
+    if end is not None:
+        query = query.where(spec.time_column < end)
+    for condition in _entity_filters(kind, document_id, actor):
+        query = query.where(condition)
+
+    return query.order_by(spec.time_column, spec.model.id)
+
+
+def iter_rows(query, engine=read_engine):
+    """
+    Yields result rows; the connection is released when the generator
+    finishes or is closed (e.g. the client disconnects).
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=EXPORT_FETCH_SIZE
+        ).execute(query)
+        for row in result:
+            yield row
+
+
+def iter_ledger_rows(query, start=None, end=None, document_id: int = None,
+                     actor: str = None, engine=read_engine):
+    """
+    Hot and archived ledger rows, merged in (timestamp, id) order.
+    """
+    from services.ledger_archive_service import iter_archived
+
+    with engine.connect() as conn:
+        cold = iter_archived(conn, start, end, document_id, actor)
+        yield from heapq.merge(cold, iter_rows(query, engine),
+                               key=lambda row: (row.timestamp, row.id))
+
+
+# --------------------------------------------------
+# ENCODERS
+# --------------------------------------------------
+def _json_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def encode_ndjson(rows, columns):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), default=_json_value) + "\n"
+
+
+def encode_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(
+            v.isoformat() if hasattr(v, "isoformat") else v for v in row
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzip_chunks(lines, level: int = GZIP_LEVEL, chunk_bytes: int = EXPORT_CHUNK_BYTES):
+    """
+    Gzip stream (wbits=31 writes the gzip header/trailer) of text lines,
+    emitted in ~chunk_bytes pieces.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    pending = []
+    pending_size = 0
+
+    for line in lines:
+        data = compressor.compress(line.encode("utf-8"))
+        if data:
+            pending.append(data)
+            pending_size += len(data)
+            if pending_size >= chunk_bytes:
+                yield b"".join(pending)
+                pending = []
+                pending_size = 0
+
+    pending.append(compressor.flush())
+    yield b"".join(pending)
+
+
+def plain_chunks(lines, chunk_bytes: int = EXPORT_CHUNK_BYTES):
+    pending = []
+    pending_size = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size >= chunk_bytes:
+            yield b"".join(pending)
+            pending = []
+            pending_size = 0
+    if pending:
+        yield b"".join(pending)
+
+
+def export_stream(kind: str, fmt: str = "ndjson", compress: bool = True,
+                  start=None, end=None, document_id: int = None,
+                  actor: str = None):
+    """
+    Byte chunks of the export. Validation errors (ValueError) are raised
+    here, before the first byte is produced.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown format '{fmt}'")
+
+    query = export_query(kind, start, end, document_id, actor)
+    if kind == "ledger":
+        rows = iter_ledger_rows(query, start, end, document_id, actor)
+    else:
+        rows = iter_rows(query)
+    columns = [c.name for c in query.selected_columns]
+
+    if fmt == "csv":
+        lines = encode_csv(rows, columns)
+    else:
+        lines = encode_ndjson(rows, columns)
+
+    return gzip_chunks(lines) if compress else plain_chunks(lines)
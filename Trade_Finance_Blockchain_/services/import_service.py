@@ -0,0 +1,420 @@
+"""
+Bulk import of historical transactions, documents and ledger entries.
+
+Records are streamed from NDJSON or CSV (optionally .gz; the formats
+written by /export are accepted), validated a chunk at a time, and
+inserted with one executemany per chunk. Every chunk commits together
+with the job's progress, so after a crash re-running the same file
+(identified by its SHA-256) continues where it stopped.
+
+Ledger rows are sealed into the hash chain via log_ledger_many.
+Documents may name an attached file ("file", relative to --files-dir
+and confined to it); those are hashed and copied into the blob store in
+parallel threads. Imports without a files directory (the HTTP endpoint)
+reject "file". A document's content_hash must name a blob that is
+already stored.
+
+CLI (from Trade_Finance_Blockchain_/):
+    python -m services.import_service transactions trades.csv
+    python -m services.import_service documents docs.ndjson --files-dir ./scans
+    python -m services.import_service ledger ledger.ndjson.gz
+"""
+import argparse
+import csv
+import datetime
+import functools
+import gzip
+import itertools
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import insert, select
+
+from models.blob import Blob
+from models.document import Document
+from models.import_job import ImportJob
+from models.transaction import TradeTransaction
+from models.transaction_history import TransactionStatusHistory
+from services.blob_service import acquire_blob, is_content_hash, store_file
+from services.blockchain_service import hash_file
+from services.counter_service import bump_counters, document_type_key, trade_status_key
+from services.ledger_service import log_ledger_many
+from services.search_service import extract_text
+from services.transaction_service import TRANSITIONS, normalize_status
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+IMPORT_HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", str(os.cpu_count() or 4)))
+MAX_REPORTED_ERRORS = 100
+
+IMPORT_KINDS = ("transactions", "documents", "ledger")
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+# --------------------------------------------------
+# READING
+# --------------------------------------------------
+def detect_format(name: str):
+    base = name[:-3] if name.endswith(".gz") else name
+    return "csv" if base.lower().endswith(".csv") else "ndjson"
+
+
+def read_records(path: str, fmt: str = None):
+    """
+    Yields one dict per record, streaming from disk.
+    """
+    fmt = fmt or detect_format(path)
+    opener = gzip.open if path.endswith(".gz") else open
+
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+# --------------------------------------------------
+# VALIDATION (one record -> insert params)
+# --------------------------------------------------
+def _text(record, *names, required=True):
+    for name in names:
+        value = record.get(name)
+        if value not in (None, ""):
+            return str(value).strip()
+    if required:
+        raise ImportRowError(f"missing {names[0]}")
+    return None
+
+
+def _datetime(record, name, default):
+    value = record.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return datetime.datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ImportRowError(f"bad {name}: {value!r}")
+
+
+def _int(record, name):
+    try:
+        return int(record.get(name))
+    except (TypeError, ValueError):
+        raise ImportRowError(f"bad {name}: {record.get(name)!r}")
+
+
+def validate_transaction(record, now):
+    status = normalize_status(_text(record, "status", required=False))
+    if status not in TRANSITIONS:
+        raise ImportRowError(f"unknown status {status!r}")
+    return {
+        "buyer_email": _text(record, "buyer_email"),
+        "seller_email": _text(record, "seller_email"),
+        "status": status,
+        "created_at": _datetime(record, "created_at", now)
+    }
+
+
+def _attached_file(record, files_dir):
+    """
+    Resolves "file" to a real path inside files_dir.
+    """
+    name = _text(record, "file", required=False)
+    if name is None:
+        return None
+    if files_dir is None:
+        raise ImportRowError("file attachments are not accepted here")
+
+    base = os.path.realpath(files_dir)
+    path = os.path.realpath(os.path.join(base, name))
+    if os.path.commonpath([base, path]) != base:
+        raise ImportRowError(f"file outside the files directory: {name!r}")
+    if not os.path.isfile(path):
+        raise ImportRowError(f"file not found: {name!r}")
+    return path
+
+
+def validate_document(record, now, files_dir=None):
+    content_hash = _text(record, "content_hash", required=False)
+    if content_hash is not None and not is_content_hash(content_hash):
+        raise ImportRowError(f"bad content_hash: {content_hash!r}")
+    return {
+        "filename": _text(record, "filename"),
+        "document_type": _text(record, "document_type", required=False),
+        "owner_email": _text(record, "owner_email", required=False),
+        "uploaded_at": _datetime(record, "uploaded_at", now),
+        "content_hash": content_hash,
+        "file": _attached_file(record, files_dir)
+    }
+
+
+def validate_ledger(record, now):
+    return {
+        "document_id": _int(record, "document_id"),
+        "action": _text(record, "action"),
+        "actor": _text(record, "actor", "actor_role"),
+        "timestamp": _datetime(record, "timestamp", now)
+    }
+
+
+VALIDATORS = {
+    "transactions": validate_transaction,
+    "documents": validate_document,
+    "ledger": validate_ledger,
+}
+
+
+# --------------------------------------------------
+# CHUNK WRITERS (insert + counters, caller's transaction)
+# --------------------------------------------------
+def _write_transactions(db, rows, **_):
+    ids = db.execute(
+        insert(TradeTransaction).returning(
+            TradeTransaction.id, sort_by_parameter_order=True
+        ),
+        rows
+    ).scalars().all()
+    # historical rows enter the status history at their original time
+    db.execute(insert(TransactionStatusHistory), [
+        {"transaction_id": tx_id, "from_status": None, "to_status": row["status"],
+         "actor": "import", "changed_at": row["created_at"]}
+        for tx_id, row in zip(ids, rows)
+    ])
+    bump_counters(db, Counter(trade_status_key(row["status"]) for row in rows))
+
+
+def _store_attachment(path: str):
+    result, _ = store_file(path)
+    return result, extract_text(path)
+
+
+def _attach_files(rows, pool):
+    """
+    Hashes + stores attached files (and extracts their searchable text)
+    in parallel; returns {hash: size} for the blobs stored by this
+    chunk.
+    """
+    for row in rows:
+        row["extracted_text"] = None
+    attached = [row for row in rows if row["file"]]
+    paths = [row["file"] for row in attached]
+    results = pool.map(_store_attachment, paths) if pool else map(_store_attachment, paths)
+
+    sizes = {}
+    for row, (result, content) in zip(attached, results):
+        row["content_hash"] = result.digest
+        row["extracted_text"] = content
+        sizes[result.digest] = result.size
+    return sizes
+
+
+def stored_blob_sizes(db, hashes):
+    """
+    {hash: size} for those of hashes that are in the blob store.
+    """
+    hashes = list(set(hashes))
+    if not hashes:
+        return {}
+    return dict(db.execute(
+        select(Blob.hash, Blob.size).where(Blob.hash.in_(hashes))
+    ).all())
+
+
+def _write_documents(db, rows, pool=None):
+    sizes = _attach_files(rows, pool)
+    for row in rows:
+        del row["file"]
+
+    db.execute(insert(Document), rows)
+
+    links = Counter(row["content_hash"] for row in rows if row["content_hash"])
+    sizes.update(stored_blob_sizes(db, [h for h in links if h not in sizes]))
+    for content_hash, count in links.items():
+        acquire_blob(db, content_hash, sizes[content_hash], count)
+    bump_counters(db, Counter(document_type_key(row["document_type"]) for row in rows))
+
+
+def _split_unknown_blobs(db, rows):
+    """
+    Documents linking to a content_hash (rather than attaching a file)
+    may only link to blobs already in the store. Returns (kept rows,
+    rejects) for [(record number, row)].
+    """
+    linked = [row["content_hash"] for _, row in rows
+              if row["content_hash"] and not row["file"]]
+    known = stored_blob_sizes(db, linked)
+    kept, rejects = [], []
+    for n, row in rows:
+        if row["content_hash"] and not row["file"] and row["content_hash"] not in known:
+            rejects.append((n, f"unknown content_hash {row['content_hash']}"))
+        else:
+            kept.append((n, row))
+    return kept, rejects
+
+
+WRITERS = {
+    "transactions": _write_transactions,
+    "documents": _write_documents,
+}
+
+
+# --------------------------------------------------
+# JOB
+# --------------------------------------------------
+def _job(db, kind, source_hash, source_name):
+    job = db.execute(
+        select(ImportJob).where(
+            ImportJob.kind == kind, ImportJob.source_hash == source_hash
+        )
+    ).scalar()
+    if job is None:
+        job = ImportJob(kind=kind, source_hash=source_hash, source_name=source_name)
+        db.add(job)
+        db.commit()
+    return job
+
+
+def _job_report(job, elapsed, errors, resumed_from):
+    processed = job.rows_done - resumed_from
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "resumed_from": resumed_from,
+        "rows_done": job.rows_done,
+        "rows_imported": job.rows_imported,
+        "rows_rejected": job.rows_rejected,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(processed / elapsed) if elapsed else 0,
+        "errors": errors
+    }
+
+
+def run_import(db, kind: str, path: str, fmt: str = None, files_dir: str = None,
+               source_hash: str = None, source_name: str = None,
+               chunk_size: int = IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Imports path into kind. Returns a report dict; progress(report) is
+    called after each committed chunk. Raises ValueError for unknown kinds.
+    """
+    if kind not in VALIDATORS:
+        raise ValueError(f"unknown import kind '{kind}'")
+
+    started = time.perf_counter()
+    source_hash = source_hash or hash_file(path).digest
+    job = _job(db, kind, source_hash, source_name or os.path.basename(path))
+    resumed_from = job.rows_done
+    errors = []
+
+    if job.status == "completed":
+        return _job_report(job, 0, errors, resumed_from)
+
+    job.status = "running"
+    job.error = None
+    db.commit()
+
+    validate = VALIDATORS[kind]
+    if kind == "documents":
+        validate = functools.partial(validate_document, files_dir=files_dir)
+    pool = ThreadPoolExecutor(IMPORT_HASH_WORKERS) if kind == "documents" else None
+    records = itertools.islice(read_records(path, fmt), job.rows_done, None)
+    line = job.rows_done
+
+    def advance(db, consumed, imported, rejected):
+        job.rows_done += consumed
+        job.rows_imported += imported
+        job.rows_rejected += rejected
+        job.updated_at = datetime.datetime.utcnow()
+
+    try:
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                break
+
+            now = datetime.datetime.utcnow()
+            rows = []
+            rejects = []
+            for record in chunk:
+                line += 1
+                try:
+                    rows.append((line, validate(record, now)))
+                except ImportRowError as e:
+                    rejects.append((line, str(e)))
+
+            if kind == "documents":
+                rows, unknown = _split_unknown_blobs(db, rows)
+                rejects += unknown
+
+            for n, error in sorted(rejects):
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"record": n, "error": error})
+            rows = [row for _, row in rows]
+
+            rejected = len(chunk) - len(rows)
+            if kind == "ledger" and rows:
+                log_ledger_many(
+                    db, rows, chunk_size=len(rows),
+                    before_commit=lambda db, n: advance(db, len(chunk), n, rejected)
+                )
+            else:
+                if rows:
+                    WRITERS[kind](db, rows, pool=pool)
+                advance(db, len(chunk), len(rows), rejected)
+                db.commit()
+
+            if progress:
+                progress(_job_report(job, time.perf_counter() - started,
+                                     errors, resumed_from))
+
+        job.status = "completed"
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        job.status = "failed"
+        job.error = str(e)[:500]
+        db.commit()
+        raise
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return _job_report(job, time.perf_counter() - started, errors, resumed_from)
+
+
+if __name__ == "__main__":
+    from database.init_db import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Bulk import")
+    parser.add_argument("kind", choices=IMPORT_KINDS)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["ndjson", "csv"])
+    parser.add_argument("--files-dir", default=".",
+                        help="base directory of documents' 'file' paths")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    def show(report):
+        print(f"{report['rows_done']} rows  "
+              f"({report['rows_imported']} imported, {report['rows_rejected']} rejected)  "
+              f"{report['rows_per_second']} rows/s")
+
+    init_db()
+    db = SessionLocal()
+    try:
+        report = run_import(db, args.kind, args.path, args.format, args.files_dir,
+                            chunk_size=args.chunk_size, progress=show)
+        print(f"{report['status']}: {report['rows_imported']} imported, "
+              f"{report['rows_rejected']} rejected in {report['seconds']}s "
+              f"({report['rows_per_second']} rows/s)")
+        for error in report["errors"]:
+            print(f"  record {error['record']}: {error['error']}")
+    finally:
+        db.close()
@@ -0,0 +1,768 @@
+"""
+Tiered ledger storage.
+
+ledger_entries (hot) keeps the recent part of the ledger; older entries
+are moved into immutable segment files (cold), so the SQLite table,
+its VACUUM and its backups stay small. Segment files never change once
+written; a backup copies each one once.
+
+What gets archived: whole segments of LEDGER_SEGMENT_ROWS leaves (a
+power of two, aligned on the leaf index, so every segment is exactly one
+node of the ledger Merkle tree) whose entries are all
+  - older than LEDGER_ARCHIVE_AGE_DAYS,
+  - inside the verified part of the hash chain (verification_service),
+  - already folded into the analytics rollups.
+Each entry is re-hashed and the segment's Merkle root recomputed before
+its rows are deleted; the catalog row (models/ledger_segment.py) and the
+delete commit together.
+
+Segment file (little-endian):
+    MAGIC
+    blocks       zlib-compressed, LEDGER_BLOCK_ROWS entries each, stored
+                 column by column: delta-coded ids and timestamps,
+                 document ids, dictionary-coded action / actor, raw
+                 entry hashes (prev_hash is the previous entry's hash)
+    blooms       one bloom filter of document ids per block
+    index        sparse index, one entry per block: id, leaf and
+                 timestamp ranges, offsets
+    meta         JSON: dictionaries and the hash-range summary
+    footer       offsets of the above + MAGIC
+Files are read through mmap: opening one touches only the footer, index
+and meta, and a query decompresses just the blocks its index ranges and
+bloom filters cannot rule out.
+
+Readers (ledger listing and per-document history, exports, inclusion
+proofs, full verification) combine hot rows with archived_page /
+iter_archived / iter_archived_leaves / find_archived_entry below.
+
+CLI (from Trade_Finance_Blockchain_/):
+    python -m services.ledger_archive_service archive [--older-than-days N] [--vacuum]
+    python -m services.ledger_archive_service status
+    python -m services.ledger_archive_service verify
+"""
+import argparse
+import array
+import bisect
+import datetime
+import hashlib
+import heapq
+import itertools
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import delete, func, select, text
+
+from models.ledger_entry import LedgerEntry
+from models.ledger_segment import LedgerSegment
+from models.merkle import LedgerHead
+from models.rollup import RollupWatermark
+from models.verification import VerificationCheckpoint
+from services.ledger_service import GENESIS_HASH, compute_entry_hash
+from services.merkle_service import MemoryTree, MerkleLog, leaf_hash
+
+LEDGER_ARCHIVE_DIR = os.path.abspath(os.getenv("LEDGER_ARCHIVE_DIR", "storage/ledger_archive"))
+LEDGER_ARCHIVE_AGE_DAYS = float(os.getenv("LEDGER_ARCHIVE_AGE_DAYS", "90"))
+LEDGER_SEGMENT_ROWS = int(os.getenv("LEDGER_SEGMENT_ROWS", str(1 << 16)))
+LEDGER_BLOCK_ROWS = min(int(os.getenv("LEDGER_BLOCK_ROWS", "4096")), LEDGER_SEGMENT_ROWS)
+# decoded blocks kept per process (listing pages re-read the same blocks)
+LEDGER_BLOCK_CACHE = int(os.getenv("LEDGER_BLOCK_CACHE", "64"))
+COMPRESS_LEVEL = 6
+BLOOM_BITS_PER_ENTRY = 16
+BLOOM_HASHES = 4
+
+if LEDGER_SEGMENT_ROWS & (LEDGER_SEGMENT_ROWS - 1) or LEDGER_SEGMENT_ROWS % LEDGER_BLOCK_ROWS:
+    raise ValueError("LEDGER_SEGMENT_ROWS must be a power of two and a multiple of LEDGER_BLOCK_ROWS")
+
+MAGIC = b"TFLEDG01"
+# bloom_offset, index_offset, block_count, meta_offset, meta_length, magic
+FOOTER = struct.Struct("<QQIQI8s")
+# first_id, last_id, first_leaf, min_ts, max_ts, offset, length, rows,
+# bloom_offset, bloom_length (timestamps in microseconds since EPOCH)
+INDEX_ENTRY = struct.Struct("<qqqqqQIIQI")
+EPOCH = datetime.datetime(1970, 1, 1)
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+# same fields, same order, as the ledger export columns; attribute
+# names match LedgerEntry so hot and cold rows are interchangeable
+LedgerRecord = namedtuple("LedgerRecord", [
+    "id", "leaf_index", "document_id", "action", "actor_role",
+    "timestamp", "prev_hash", "entry_hash"
+])
+
+BlockInfo = namedtuple("BlockInfo", [
+    "first_id", "last_id", "first_leaf", "min_ts", "max_ts",
+    "offset", "length", "rows", "bloom_offset", "bloom_length"
+])
+
+
+class ArchiveError(Exception):
+    """
+    The entries to archive are missing or fail verification; nothing
+    was archived from that segment on.
+    """
+
+
+def _micros(ts: datetime.datetime):
+    return (ts - EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def _from_micros(value: int):
+    return EPOCH + datetime.timedelta(microseconds=value)
+
+
+def _pack(typecode: str, values):
+    data = array.array(typecode, values)
+    if not _LITTLE_ENDIAN:
+        data.byteswap()
+    return data.tobytes()
+
+
+def _unpack(typecode: str, raw):
+    data = array.array(typecode)
+    data.frombytes(raw)
+    if not _LITTLE_ENDIAN:
+        data.byteswap()
+    return data
+
+
+def _deltas(values):
+    return [b - a for a, b in zip([0] + values[:-1], values)]
+
+
+# --------------------------------------------------
+# BLOOM FILTER (document ids per block)
+# --------------------------------------------------
+def _bloom_bits(document_id: int, size_bits: int):
+    digest = hashlib.blake2b(document_id.to_bytes(8, "little", signed=True),
+                             digest_size=8).digest()
+    h1 = int.from_bytes(digest[:4], "little")
+    h2 = int.from_bytes(digest[4:], "little") | 1
+    return [(h1 + i * h2) % size_bits for i in range(BLOOM_HASHES)]
+
+
+def _build_bloom(document_ids, rows: int):
+    size_bits = max(64, rows * BLOOM_BITS_PER_ENTRY)
+    bits = bytearray(size_bits // 8)
+    for document_id in document_ids:
+        for bit in _bloom_bits(document_id, size_bits):
+            bits[bit >> 3] |= 1 << (bit & 7)
+    return bytes(bits)
+
+
+# --------------------------------------------------
+# SEGMENT FILES
+# --------------------------------------------------
+def _encode_block(records, actions, actors):
+    ids = [r.id for r in records]
+    stamps = [_micros(r.timestamp) for r in records]
+    payload = b"".join([
+        bytes.fromhex(records[0].prev_hash),
+        _pack("q", _deltas(ids)),
+        _pack("q", [-1 if r.document_id is None else r.document_id for r in records]),
+        _pack("q", _deltas(stamps)),
+        _pack("H", [actions[r.action] for r in records]),
+        _pack("H", [actors[r.actor_role] for r in records]),
+        b"".join(bytes.fromhex(r.entry_hash) for r in records),
+    ])
+    return zlib.compress(payload, COMPRESS_LEVEL)
+
+
+def write_segment(path: str, records, summary: dict):
+    """
+    Writes records (consecutive leaves, in leaf order) as a segment file
+    and returns its SHA-256. The file appears under path only once it is
+    complete and on disk.
+    """
+    actions = {a: i for i, a in enumerate(sorted({r.action for r in records}))}
+    actors = {a: i for i, a in enumerate(sorted({r.actor_role for r in records}))}
+    digest = hashlib.sha256()
+    tmp = path + ".tmp"
+
+    with open(tmp, "wb") as f:
+        def write(data):
+            f.write(data)
+            digest.update(data)
+
+        write(MAGIC)
+        offset = len(MAGIC)
+        blocks = []
+        for start in range(0, len(records), LEDGER_BLOCK_ROWS):
+            chunk = records[start:start + LEDGER_BLOCK_ROWS]
+            data = _encode_block(chunk, actions, actors)
+            stamps = [_micros(r.timestamp) for r in chunk]
+            blocks.append([chunk[0].id, chunk[-1].id, chunk[0].leaf_index,
+                           min(stamps), max(stamps), offset, len(data), len(chunk),
+                           {r.document_id for r in chunk if r.document_id is not None}])
+            write(data)
+            offset += len(data)
+
+        bloom_offset = offset
+        for block in blocks:
+            bloom = _build_bloom(block[-1], block[7])
+            block[-1:] = [offset, len(bloom)]
+            write(bloom)
+            offset += len(bloom)
+
+        index_offset = offset
+        for block in blocks:
+            write(INDEX_ENTRY.pack(*block))
+            offset += INDEX_ENTRY.size
+
+        meta = json.dumps({
+            "actions": list(actions), "actors": list(actors), **summary
+        }).encode("utf-8")
+        write(meta)
+        write(FOOTER.pack(bloom_offset, index_offset, len(blocks), offset, len(meta), MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp, path)
+    return digest.hexdigest()
+
+
+class SegmentFile:
+    """
+    Read-only, memory-mapped segment. Only the footer, index and meta
+    are parsed on open; blocks are decompressed on demand.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        mm = self._mm
+        bloom_offset, index_offset, count, meta_offset, meta_length, magic = \
+            FOOTER.unpack_from(mm, len(mm) - FOOTER.size)
+        if magic != MAGIC or mm[:len(MAGIC)] != MAGIC:
+            raise ArchiveError(f"{path} is not a ledger segment")
+
+        self.meta = json.loads(mm[meta_offset:meta_offset + meta_length])
+        self.actions = self.meta["actions"]
+        self.actors = self.meta["actors"]
+        self.blocks = [
+            BlockInfo(*INDEX_ENTRY.unpack_from(mm, index_offset + i * INDEX_ENTRY.size))
+            for i in range(count)
+        ]
+        self._first_ids = [b.first_id for b in self.blocks]
+
+    def may_contain_document(self, block: BlockInfo, document_id: int):
+        size_bits = block.bloom_length * 8
+        base = block.bloom_offset
+        return all(
+            self._mm[base + (bit >> 3)] & (1 << (bit & 7))
+            for bit in _bloom_bits(document_id, size_bits)
+        )
+
+    def block_for_id(self, entry_id: int):
+        i = bisect.bisect_right(self._first_ids, entry_id) - 1
+        if i < 0 or self.blocks[i].last_id < entry_id:
+            return None
+        return i
+
+    def decode(self, i: int):
+        block = self.blocks[i]
+        n = block.rows
+        raw = zlib.decompress(self._mm[block.offset:block.offset + block.length])
+
+        pos = 32
+        ids = list(itertools.accumulate(_unpack("q", raw[pos:pos + 8 * n])))
+        pos += 8 * n
+        documents = _unpack("q", raw[pos:pos + 8 * n])
+        pos += 8 * n
+        stamps = itertools.accumulate(_unpack("q", raw[pos:pos + 8 * n]))
+        pos += 8 * n
+        action_codes = _unpack("H", raw[pos:pos + 2 * n])
+        pos += 2 * n
+        actor_codes = _unpack("H", raw[pos:pos + 2 * n])
+        pos += 2 * n
+        hashes = [raw[pos + 32 * i:pos + 32 * (i + 1)].hex() for i in range(n)]
+        prev_hashes = [raw[:32].hex()] + hashes[:-1]
+
+        actions, actors = self.actions, self.actors
+        return [
+            LedgerRecord(ids[i], block.first_leaf + i,
+                         None if documents[i] < 0 else documents[i],
+                         actions[action_codes[i]], actors[actor_codes[i]],
+                         _from_micros(ts), prev_hashes[i], hashes[i])
+            for i, ts in enumerate(stamps)
+        ]
+
+    def file_hash(self):
+        return hashlib.sha256(self._mm).hexdigest()
+
+    def close(self):
+        self._mm.close()
+
+
+_open_files = {}
+_block_cache = OrderedDict()
+_files_lock = threading.Lock()
+
+
+def _segment_file(file_name: str, directory: str = LEDGER_ARCHIVE_DIR):
+    with _files_lock:
+        segment = _open_files.get(file_name)
+        if segment is None:
+            segment = _open_files[file_name] = SegmentFile(os.path.join(directory, file_name))
+        return segment
+
+
+def _records(segment: SegmentFile, i: int):
+    key = (segment.path, i)
+    with _files_lock:
+        records = _block_cache.get(key)
+        if records is not None:
+            _block_cache.move_to_end(key)
+            return records
+    records = segment.decode(i)
+    with _files_lock:
+        _block_cache[key] = records
+        while len(_block_cache) > LEDGER_BLOCK_CACHE:
+            _block_cache.popitem(last=False)
+    return records
+
+
+# --------------------------------------------------
+# CATALOG
+# --------------------------------------------------
+_segments = LedgerSegment.__table__
+
+
+def archived_size(db):
+    """
+    Leaves [0, archived_size) are archived; the rest are hot.
+    """
+    return db.execute(
+        select(func.coalesce(func.max(_segments.c.first_leaf + _segments.c.entry_count), 0))
+    ).scalar()
+
+
+def archived_count(db):
+    return db.execute(
+        select(func.coalesce(func.sum(_segments.c.entry_count), 0))
+    ).scalar()
+
+
+def segment_dict(row):
+    return {
+        "id": row.id,
+        "first_leaf": row.first_leaf,
+        "entry_count": row.entry_count,
+        "first_id": row.first_id,
+        "last_id": row.last_id,
+        "min_timestamp": row.min_timestamp,
+        "max_timestamp": row.max_timestamp,
+        "first_prev_hash": row.first_prev_hash,
+        "last_hash": row.last_hash,
+        "merkle_root": row.merkle_root,
+        "file_name": row.file_name,
+        "file_size": row.file_size,
+        "file_hash": row.file_hash,
+        "created_at": row.created_at
+    }
+
+
+def list_segments(db):
+    return [segment_dict(r) for r in db.execute(
+        select(_segments).order_by(_segments.c.first_leaf)
+    )]
+
+
+# --------------------------------------------------
+# COLD READS
+# --------------------------------------------------
+def _matches(record, document_id, actor_role):
+    return ((document_id is None or record.document_id == document_id) and
+            (not actor_role or record.actor_role == actor_role))
+
+
+def _candidate_blocks(segment, document_id, low=None, high=None):
+    """
+    Blocks whose timestamp range overlaps [low, high] (microseconds)
+    and whose bloom filter admits document_id.
+    """
+    for i, block in enumerate(segment.blocks):
+        if low is not None and block.max_ts < low:
+            continue
+        if high is not None and block.min_ts > high:
+            continue
+        if document_id is not None and not segment.may_contain_document(block, document_id):
+            continue
+        yield i, block
+
+
+def archived_page(db, count: int, below=None, above=None,
+                  document_id: int = None, actor_role: str = None):
+    """
+    Up to count archived entries with above < (timestamp, id) < below,
+    newest first (the cold half of a keyset ledger page). below / above
+    are (timestamp, id) tuples or None.
+    """
+    query = select(_segments).order_by(_segments.c.max_timestamp.desc())
+    if below is not None:
+        query = query.where(_segments.c.min_timestamp <= below[0])
+    if above is not None:
+        query = query.where(_segments.c.max_timestamp >= above[0])
+    segments = db.execute(query).all()
+    if not segments:
+        return []
+
+    kept = []   # min-heap of the count newest: ((timestamp, id), record)
+    for row in segments:
+        if len(kept) >= count and row.max_timestamp < kept[0][0][0]:
+            break
+        segment = _segment_file(row.file_name)
+        low = _micros(above[0]) if above is not None else None
+        high = _micros(below[0]) if below is not None else None
+        for i, block in reversed(list(_candidate_blocks(segment, document_id, low, high))):
+            if len(kept) >= count and block.max_ts < _micros(kept[0][0][0]):
+                continue
+            for record in _records(segment, i):
+                key = (record.timestamp, record.id)
+                if below is not None and key >= below:
+                    continue
+                if above is not None and key <= above:
+                    continue
+                if not _matches(record, document_id, actor_role):
+                    continue
+                if len(kept) < count:
+                    heapq.heappush(kept, (key, record))
+                elif key > kept[0][0]:
+                    heapq.heapreplace(kept, (key, record))
+
+    return [record for _, record in sorted(kept, reverse=True)]
+
+
+def find_archived_entry(db, entry_id: int):
+    row = db.execute(
+        select(_segments).where(_segments.c.first_id <= entry_id,
+                                _segments.c.last_id >= entry_id)
+    ).first()
+    if row is None:
+        return None
+    segment = _segment_file(row.file_name)
+    i = segment.block_for_id(entry_id)
+    if i is None:
+        return None
+    return next((r for r in _records(segment, i) if r.id == entry_id), None)
+
+
+def iter_archived(conn, start=None, end=None, document_id: int = None,
+                  actor_role: str = None):
+    """
+    Archived entries with start <= timestamp < end, oldest first by
+    (timestamp, id), like the hot export query. Blocks are merged
+    lazily: a block is only decompressed once the output reaches its
+    earliest timestamp, so (time-ordered ledgers) one block at a time.
+    """
+    query = select(_segments)
+    if start is not None:
+        query = query.where(_segments.c.max_timestamp >= start)
+    if end is not None:
+        query = query.where(_segments.c.min_timestamp < end)
+    low = _micros(start) if start is not None else None
+    high = _micros(end) if end is not None else None
+
+    blocks = []
+    for row in conn.execute(query):
+        segment = _segment_file(row.file_name)
+        for i, block in _candidate_blocks(segment, document_id, low, high):
+            blocks.append((block.min_ts, segment.path, i, segment))
+    blocks.sort(key=lambda b: (b[0], b[1], b[2]))
+
+    def block_rows(segment, i):
+        rows = [
+            r for r in _records(segment, i)
+            if (start is None or r.timestamp >= start)
+            and (end is None or r.timestamp < end)
+            and _matches(r, document_id, actor_role)
+        ]
+        rows.sort(key=lambda r: (r.timestamp, r.id))
+        return rows
+
+    heap = []
+    seq = itertools.count()
+    pending = iter(blocks)
+    upcoming = next(pending, None)
+    while heap or upcoming is not None:
+        while upcoming is not None and (not heap or upcoming[0] <= _micros(heap[0][0][0])):
+            rows = block_rows(upcoming[3], upcoming[2])
+            if rows:
+                heapq.heappush(heap, ((rows[0].timestamp, rows[0].id), next(seq), 0, rows))
+            upcoming = next(pending, None)
+        if not heap:
+            continue
+        _, n, pos, rows = heapq.heappop(heap)
+        yield rows[pos]
+        if pos + 1 < len(rows):
+            heapq.heappush(heap, ((rows[pos + 1].timestamp, rows[pos + 1].id), n, pos + 1, rows))
+
+
+def iter_archived_leaves(conn, start: int, end: int):
+    """
+    Archived entries with start <= leaf_index < end, in leaf order.
+    """
+    rows = conn.execute(
+        select(_segments)
+        .where(_segments.c.first_leaf < end,
+               _segments.c.first_leaf + _segments.c.entry_count > start)
+        .order_by(_segments.c.first_leaf)
+    ).all()
+    for row in rows:
+        segment = _segment_file(row.file_name)
+        for i, block in enumerate(segment.blocks):
+            if block.first_leaf + block.rows <= start or block.first_leaf >= end:
+                continue
+            for record in segment.decode(i):
+                if start <= record.leaf_index < end:
+                    yield record
+
+
+# --------------------------------------------------
+# ARCHIVING
+# --------------------------------------------------
+def archive_limit(db, older_than: datetime.timedelta):
+    """
+    First leaf that must stay hot: the lowest of the unverified,
+    not-yet-rolled-up and too-recent leaves.
+    """
+    tree_size = db.execute(select(LedgerHead.tree_size).where(LedgerHead.id == 1)).scalar() or 0
+    checkpoint = db.get(VerificationCheckpoint, 1)
+    limits = [tree_size, checkpoint.verified_size if checkpoint else 0]
+
+    watermark = db.get(RollupWatermark, "ledger")
+    unrolled = db.execute(
+        select(func.min(LedgerEntry.leaf_index))
+        .where(LedgerEntry.id > (watermark.last_id if watermark else 0))
+    ).scalar()
+    if unrolled is not None:
+        limits.append(unrolled)
+
+    cutoff = datetime.datetime.utcnow() - older_than
+    recent = db.execute(
+        select(func.min(LedgerEntry.leaf_index)).where(LedgerEntry.timestamp >= cutoff)
+    ).scalar()
+    if recent is not None:
+        limits.append(recent)
+    return min(limits)
+
+
+def _hot_records(db, start: int, end: int):
+    rows = db.execute(
+        select(LedgerEntry.id, LedgerEntry.leaf_index, LedgerEntry.document_id,
+               LedgerEntry.action, LedgerEntry.actor_role, LedgerEntry.timestamp,
+               LedgerEntry.prev_hash, LedgerEntry.entry_hash)
+        .where(LedgerEntry.leaf_index >= start, LedgerEntry.leaf_index < end)
+        .order_by(LedgerEntry.leaf_index)
+    ).all()
+    return [LedgerRecord(*row) for row in rows]
+
+
+def check_chain(records, first_leaf: int, prev_hash: str):
+    """
+    Problem description for the first entry that does not re-hash or
+    link up, or None.
+    """
+    for expected, record in enumerate(records, first_leaf):
+        if record.leaf_index != expected:
+            return f"missing leaf {expected}"
+        if record.prev_hash != prev_hash:
+            return f"leaf {expected}: prev_hash does not match previous entry"
+        if record.entry_hash != compute_entry_hash(
+            record.leaf_index, record.prev_hash, record.document_id,
+            record.action, record.actor_role, record.timestamp
+        ):
+            return f"leaf {expected}: entry_hash does not match entry contents"
+        prev_hash = record.entry_hash
+    return None
+
+
+def _segment_root(records):
+    return MemoryTree([leaf_hash(bytes.fromhex(r.entry_hash)) for r in records]).root().hex()
+
+
+def archive_segment(db, first_leaf: int, prev_hash: str, directory: str = LEDGER_ARCHIVE_DIR):
+    """
+    Moves leaves [first_leaf, first_leaf + LEDGER_SEGMENT_ROWS) into a
+    segment file. Commits.
+    """
+    end = first_leaf + LEDGER_SEGMENT_ROWS
+    records = _hot_records(db, first_leaf, end)
+    if len(records) != LEDGER_SEGMENT_ROWS:
+        raise ArchiveError(f"leaves {first_leaf}-{end - 1}: {len(records)} of "
+                           f"{LEDGER_SEGMENT_ROWS} entries present")
+    problem = check_chain(records, first_leaf, prev_hash)
+    if problem:
+        raise ArchiveError(problem)
+
+    level = LEDGER_SEGMENT_ROWS.bit_length() - 1
+    merkle_root = MerkleLog(db).get_node(level, first_leaf >> level).hex()
+    if _segment_root(records) != merkle_root:
+        raise ArchiveError(f"leaves {first_leaf}-{end - 1} do not match the Merkle tree")
+
+    summary = {
+        "first_leaf": first_leaf,
+        "entry_count": len(records),
+        "first_id": records[0].id,
+        "last_id": records[-1].id,
+        "min_timestamp": min(r.timestamp for r in records),
+        "max_timestamp": max(r.timestamp for r in records),
+        "first_prev_hash": records[0].prev_hash,
+        "last_hash": records[-1].entry_hash,
+        "merkle_root": merkle_root
+    }
+    os.makedirs(directory, exist_ok=True)
+    file_name = f"ledger-{first_leaf:012d}-{end - 1:012d}.seg"
+    path = os.path.join(directory, file_name)
+    file_hash = write_segment(path, records, {
+        k: v.isoformat() if isinstance(v, datetime.datetime) else v
+        for k, v in summary.items()
+    })
+
+    segment = LedgerSegment(file_name=file_name, file_size=os.path.getsize(path),
+                            file_hash=file_hash, **summary)
+    db.add(segment)
+    db.execute(
+        delete(LedgerEntry)
+        .where(LedgerEntry.leaf_index >= first_leaf, LedgerEntry.leaf_index < end)
+    )
+    db.commit()
+    return segment
+
+
+def archive_ledger(db, older_than: datetime.timedelta = None, max_segments: int = None,
+                   directory: str = LEDGER_ARCHIVE_DIR):
+    """
+    Archives every eligible whole segment, oldest first.
+    """
+    if older_than is None:
+        older_than = datetime.timedelta(days=LEDGER_ARCHIVE_AGE_DAYS)
+    started = time.perf_counter()
+
+    start = archived_size(db)
+    limit = archive_limit(db, older_than)
+    last = db.execute(
+        select(_segments.c.last_hash).order_by(_segments.c.first_leaf.desc()).limit(1)
+    ).scalar()
+    prev_hash = last or GENESIS_HASH
+
+    created = 0
+    while start + LEDGER_SEGMENT_ROWS <= limit:
+        if max_segments is not None and created >= max_segments:
+            break
+        segment = archive_segment(db, start, prev_hash, directory)
+        created += 1
+        prev_hash = segment.last_hash
+        start += LEDGER_SEGMENT_ROWS
+
+    return {
+        "segments_created": created,
+        "entries_archived": created * LEDGER_SEGMENT_ROWS,
+        "archived_size": start,
+        "hot_limit": limit,
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+def vacuum(engine):
+    """
+    Returns the space freed by archiving to the filesystem (SQLite).
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+
+
+def _segment_problem(row, prev_hash: str, log: MerkleLog, directory: str):
+    try:
+        segment = SegmentFile(os.path.join(directory, row.file_name))
+    except (OSError, ValueError, ArchiveError) as e:
+        return f"unreadable: {e}"
+
+    try:
+        if segment.file_hash() != row.file_hash:
+            return "file hash does not match catalog"
+        if row.first_prev_hash != prev_hash:
+            return "does not link to the previous segment"
+        records = [r for i in range(len(segment.blocks)) for r in segment.decode(i)]
+    finally:
+        segment.close()
+
+    problem = check_chain(records, row.first_leaf, prev_hash)
+    if problem:
+        return problem
+    if len(records) != row.entry_count or records[-1].entry_hash != row.last_hash:
+        return "entries do not match catalog summary"
+    level = row.entry_count.bit_length() - 1
+    if not (_segment_root(records) == row.merkle_root ==
+            log.get_node(level, row.first_leaf >> level).hex()):
+        return "Merkle root mismatch"
+    return None
+
+
+def verify_segments(db, directory: str = LEDGER_ARCHIVE_DIR):
+    """
+    Re-checks every segment against its catalog row: file hash, hash
+    chain (inside the file and across segments) and Merkle root.
+    """
+    problems = []
+    prev_hash = GENESIS_HASH
+    rows = db.execute(select(_segments).order_by(_segments.c.first_leaf)).all()
+    log = MerkleLog(db)
+
+    for row in rows:
+        problem = _segment_problem(row, prev_hash, log, directory)
+        if problem:
+            problems.append({"segment": row.file_name, "problem": problem})
+        prev_hash = row.last_hash
+
+    return {"ok": not problems, "segments": len(rows), "problems": problems}
+
+
+if __name__ == "__main__":
+    from database.init_db import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Ledger archive (cold segments)")
+    parser.add_argument("command", choices=["archive", "status", "verify"])
+    parser.add_argument("--older-than-days", type=float, default=LEDGER_ARCHIVE_AGE_DAYS)
+    parser.add_argument("--max-segments", type=int)
+    parser.add_argument("--vacuum", action="store_true",
+                        help="VACUUM the database afterwards (SQLite)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "archive":
+            report = archive_ledger(db, datetime.timedelta(days=args.older_than_days),
+                                    args.max_segments)
+            for key, value in report.items():
+                print(f"{key}: {value}")
+            if args.vacuum and report["segments_created"]:
+                started = time.perf_counter()
+                vacuum(engine)
+                print(f"vacuum: {time.perf_counter() - started:.1f}s")
+        elif args.command == "status":
+            segments = list_segments(db)
+            size = archived_size(db)
+            hot = db.execute(select(func.count(LedgerEntry.id))).scalar()
+            print(f"segments: {len(segments)}")
+            print(f"archived entries: {archived_count(db)} (leaves 0-{size - 1})"
+                  if segments else "archived entries: 0")
+            print(f"archive bytes: {sum(s['file_size'] for s in segments)}")
+            print(f"hot entries: {hot}")
+        else:
+            report = verify_segments(db)
+            for key, value in report.items():
+                print(f"{key}: {value}")
+            raise SystemExit(0 if report["ok"] else 1)
+    finally:
+        db.close()
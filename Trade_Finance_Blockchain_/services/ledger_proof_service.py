@@ -0,0 +1,106 @@
+from sqlalchemy import select
+
+from models.merkle import LedgerCheckpoint, LedgerHead
+from services.ledger_service import find_ledger_entry
+from services.merkle_service import MerkleLog, leaf_hash
+
+
+class ProofError(LookupError):
+    """
+    Requested entry or checkpoint cannot be proven (missing or out of range).
+    """
+
+
+def _checkpoint(db, checkpoint_id: int = None):
+    query = select(LedgerCheckpoint)
+    if checkpoint_id is None:
+        query = query.order_by(LedgerCheckpoint.tree_size.desc()).limit(1)
+    else:
+        query = query.where(LedgerCheckpoint.id == checkpoint_id)
+
+    checkpoint = db.execute(query).scalar()
+    if checkpoint is None:
+        raise ProofError("checkpoint not found")
+    return checkpoint
+
+
+def _checkpoint_dict(checkpoint):
+    return {
+        "id": checkpoint.id,
+        "tree_size": checkpoint.tree_size,
+        "root_hash": checkpoint.root_hash,
+        "created_at": checkpoint.created_at
+    }
+
+
+def _live_head(db):
+    """
+    The current chain head in checkpoint form (id None: not recorded).
+    Entries appended after the last checkpoint are provable against it.
+    """
+    size = db.execute(select(LedgerHead.tree_size).where(LedgerHead.id == 1)).scalar()
+    if not size:
+        raise ProofError("ledger is empty")
+    return {
+        "id": None,
+        "tree_size": size,
+        "root_hash": MerkleLog(db).root(size).hex(),
+        "created_at": None
+    }
+
+
+def list_checkpoints(db, limit: int = 100):
+    rows = db.execute(
+        select(LedgerCheckpoint)
+        .order_by(LedgerCheckpoint.tree_size.desc())
+        .limit(limit)
+    ).scalars()
+    return [_checkpoint_dict(c) for c in rows]
+
+
+def inclusion_proof(db, entry_id: int, checkpoint_id: int = None):
+    """
+    Audit path proving entry_id is in the tree of the given checkpoint
+    (the live chain head by default). Costs O(log n) node reads.
+    """
+    entry = find_ledger_entry(db, entry_id)
+    if entry is None or entry.leaf_index is None:
+        raise ProofError("ledger entry not found or not sealed")
+
+    if checkpoint_id is None:
+        checkpoint = _live_head(db)
+    else:
+        checkpoint = _checkpoint_dict(_checkpoint(db, checkpoint_id))
+    if entry.leaf_index >= checkpoint["tree_size"]:
+        raise ProofError("entry is newer than the checkpoint")
+
+    path = MerkleLog(db).inclusion_proof(entry.leaf_index, checkpoint["tree_size"])
+
+    return {
+        "entry_id": entry.id,
+        "entry_hash": entry.entry_hash,
+        "prev_hash": entry.prev_hash,
+        "leaf_index": entry.leaf_index,
+        "leaf_hash": leaf_hash(bytes.fromhex(entry.entry_hash)).hex(),
+        "checkpoint": checkpoint,
+        "path": [node.hex() for node in path]
+    }
+
+
+def consistency_proof(db, first_id: int, second_id: int = None):
+    """
+    Proof that checkpoint first_id is a prefix of checkpoint second_id
+    (the live chain head by default), i.e. nothing before it was rewritten.
+    """
+    first = _checkpoint_dict(_checkpoint(db, first_id))
+    second = _live_head(db) if second_id is None else _checkpoint_dict(_checkpoint(db, second_id))
+    if first["tree_size"] > second["tree_size"]:
+        raise ProofError("first checkpoint must not be larger than the second")
+
+    proof = MerkleLog(db).consistency_proof(first["tree_size"], second["tree_size"])
+
+    return {
+        "first": first,
+        "second": second,
+        "proof": [node.hex() for node in proof]
+    }
@@ -1,10 +1,419 @@
-from models.ledger_entry import LedgerEntry
-
-def log_ledger(db, document_id: int, action: str, actor: str):
-    entry = LedgerEntry(
-        document_id=document_id,
-        action=action,
-        actor_role=actor
-    )
-    db.add(entry)
-    db.commit()
+import base64
+import datetime
+import hashlib
+import os
+
+from sqlalchemy import insert, select, tuple_, update
+
+from models.ledger_entry import LedgerEntry
+from models.merkle import LedgerHead, LedgerCheckpoint
+from services.cache_service import RECENT_LEDGER_KEY, cache, mark_stale
+from services.counter_service import record_ledger_appends
+from services.event_hub import EVENT_LEDGER_ENTRIES, queue_event
+from services.merkle_service import MerkleLog, leaf_hash
+
+GENESIS_HASH = "0" * 64
+# A checkpoint root is recorded each time the tree crosses a multiple of this
+LEDGER_CHECKPOINT_EVERY = int(os.getenv("LEDGER_CHECKPOINT_EVERY", "1000"))
+LEDGER_PAGE_SIZE = 50
+LEDGER_MAX_PAGE_SIZE = 500
+RECENT_LEDGER_LIMIT = 5
+# Re-seal attempts when another process advanced the chain head
+LEDGER_CONFLICT_RETRIES = 5
+
+
+class ChainConflict(Exception):
+    """
+    Another writer moved the chain head while this batch was being sealed.
+    The transaction must be rolled back and the batch retried.
+    """
+
+
+def compute_entry_hash(leaf_index, prev_hash, document_id, action,
+                       actor_role, timestamp):
+    payload = "|".join([
+        str(leaf_index),
+        prev_hash,
+        "" if document_id is None else str(document_id),
+        action,
+        actor_role,
+        timestamp.isoformat()
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def ledger_row(document_id, action, actor, timestamp=None):
+    return {
+        "document_id": document_id,
+        "action": action,
+        "actor_role": actor,
+        "timestamp": timestamp or datetime.datetime.utcnow()
+    }
+
+
+def chain_head(db):
+    """
+    Returns (tree_size, last_hash) of the ledger chain.
+    """
+    head = db.execute(
+        select(LedgerHead.tree_size, LedgerHead.last_hash)
+        .where(LedgerHead.id == 1)
+    ).first()
+
+    if head is None:
+        db.execute(insert(LedgerHead).values(
+            id=1, tree_size=0, last_hash=GENESIS_HASH
+        ))
+        return 0, GENESIS_HASH
+    return head.tree_size, head.last_hash
+
+
+def append_entries(db, rows):
+    """
+    Seals and inserts ledger rows inside the caller's transaction (no commit).
+    rows are dicts as built by ledger_row.
+
+    Each row gets leaf_index, prev_hash and entry_hash, its hash is
+    appended to the Merkle tree and the chain head is advanced with a
+    conditional UPDATE, so concurrent writers fail with ChainConflict
+    instead of forking the chain.
+    """
+    if not rows:
+        return 0
+
+    old_size, prev = chain_head(db)
+
+    size = old_size
+    for row in rows:
+        row["leaf_index"] = size
+        row["prev_hash"] = prev
+        row["entry_hash"] = compute_entry_hash(
+            size, prev, row["document_id"], row["action"],
+            row["actor_role"], row["timestamp"]
+        )
+        prev = row["entry_hash"]
+        size += 1
+
+    moved = db.execute(
+        update(LedgerHead)
+        .where(LedgerHead.id == 1, LedgerHead.tree_size == old_size)
+        .values(tree_size=size, last_hash=prev)
+    )
+    if moved.rowcount != 1:
+        raise ChainConflict(f"ledger head moved from {old_size}")
+
+    db.execute(insert(LedgerEntry), rows)
+
+    tree = MerkleLog(db)
+    tree.append(old_size, [
+        leaf_hash(bytes.fromhex(row["entry_hash"])) for row in rows
+    ])
+
+    if size // LEDGER_CHECKPOINT_EVERY > old_size // LEDGER_CHECKPOINT_EVERY:
+        db.add(LedgerCheckpoint(
+            tree_size=size, root_hash=tree.root(size).hex()
+        ))
+
+    record_ledger_appends(db, len(rows))
+    mark_stale(db, RECENT_LEDGER_KEY)
+    queue_event(db, "ledger", {
+        "count": len(rows),
+        "entries": [_event_entry(row) for row in rows[:-EVENT_LEDGER_ENTRIES - 1:-1]]
+    })
+    return len(rows)
+
+
+def _event_entry(row):
+    return {
+        "document_id": row["document_id"],
+        "action": row["action"],
+        "actor": row["actor_role"],
+        "timestamp": row["timestamp"],
+        "leaf_index": row["leaf_index"],
+        "entry_hash": row["entry_hash"]
+    }
+
+
+def seal_unsealed_entries(db, chunk_size: int = 5000):
+    """
+    Seals rows written before the hash chain existed (leaf_index NULL),
+    in id order, as if they had been appended one after another.
+    Commits once per chunk. Used by the schema migration.
+    """
+    sealed = 0
+
+    while True:
+        rows = db.execute(
+            select(LedgerEntry.id, LedgerEntry.document_id, LedgerEntry.action,
+                   LedgerEntry.actor_role, LedgerEntry.timestamp)
+            .where(LedgerEntry.leaf_index.is_(None))
+            .order_by(LedgerEntry.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return sealed
+
+        old_size, prev = chain_head(db)
+        size = old_size
+        updates = []
+        for row in rows:
+            timestamp = row.timestamp or datetime.datetime.utcnow()
+            entry_hash = compute_entry_hash(
+                size, prev, row.document_id, row.action, row.actor_role, timestamp
+            )
+            updates.append({
+                "id": row.id, "timestamp": timestamp, "leaf_index": size,
+                "prev_hash": prev, "entry_hash": entry_hash
+            })
+            prev = entry_hash
+            size += 1
+
+        moved = db.execute(
+            update(LedgerHead)
+            .where(LedgerHead.id == 1, LedgerHead.tree_size == old_size)
+            .values(tree_size=size, last_hash=prev)
+        )
+        if moved.rowcount != 1:
+            raise ChainConflict(f"ledger head moved from {old_size}")
+
+        db.execute(update(LedgerEntry), updates)
+        tree = MerkleLog(db)
+        tree.append(old_size, [
+            leaf_hash(bytes.fromhex(row["entry_hash"])) for row in updates
+        ])
+        if size // LEDGER_CHECKPOINT_EVERY > old_size // LEDGER_CHECKPOINT_EVERY:
+            db.add(LedgerCheckpoint(
+                tree_size=size, root_hash=tree.root(size).hex()
+            ))
+        db.commit()
+        sealed += len(updates)
+
+
+def create_checkpoint(db):
+    """
+    Records the current Merkle root as a checkpoint (commits).
+    """
+    size, _ = chain_head(db)
+    checkpoint = db.execute(
+        select(LedgerCheckpoint).where(LedgerCheckpoint.tree_size == size)
+    ).scalar()
+
+    if checkpoint is None:
+        checkpoint = LedgerCheckpoint(
+            tree_size=size, root_hash=MerkleLog(db).root(size).hex()
+        )
+        db.add(checkpoint)
+    db.commit()
+    return checkpoint
+
+
+def log_ledger(db, document_id: int, action: str, actor: str,
+               durable: bool = True):
+    """
+    Appends one ledger entry through the group-commit writer.
+    durable=True waits until the entry's batch is committed;
+    durable=False returns immediately (fire-and-forget).
+    The writer uses its own session, so db's pending changes are
+    committed first (as the in-session version did): an uncommitted
+    SQLite write would otherwise hold the lock the writer waits on.
+    """
+    # imported here: ledger_writer depends on this module
+    from services.ledger_writer import ledger_writer
+
+    if db is not None:
+        db.commit()
+
+    if durable:
+        return ledger_writer.log_sync(document_id, action, actor)
+    ledger_writer.submit(document_id, action, actor)
+
+
+def log_ledger_many(db, entries, chunk_size: int = 5000, before_commit=None):
+    """
+    Bulk ledger append for imports.
+    entries: iterable of (document_id, action, actor) or
+             (document_id, action, actor, timestamp) tuples, or dicts
+             with the same keys as log_ledger's arguments.
+    Commits once per chunk_size rows instead of once per row.
+    before_commit(db, count), if given, runs inside each chunk's
+    transaction (e.g. to record import progress atomically).
+    A chunk that loses the chain head to another writer is rolled back
+    and sealed again (ChainConflict after LEDGER_CONFLICT_RETRIES).
+    """
+    total = 0
+    batch = []
+
+    def flush(batch):
+        for attempt in range(LEDGER_CONFLICT_RETRIES):
+            try:
+                count = append_entries(db, batch)
+                if before_commit:
+                    before_commit(db, len(batch))
+                db.commit()
+                return count
+            except ChainConflict:
+                db.rollback()
+                if attempt == LEDGER_CONFLICT_RETRIES - 1:
+                    raise
+
+    for item in entries:
+        if isinstance(item, dict):
+            batch.append(ledger_row(
+                item["document_id"], item["action"], item["actor"],
+                item.get("timestamp")
+            ))
+        else:
+            batch.append(ledger_row(*item))
+
+        if len(batch) >= chunk_size:
+            total += flush(batch)
+            batch = []
+
+    if batch:
+        total += flush(batch)
+
+    return total
+
+
+# --------------------------------------------------
+# KEYSET PAGINATION
+# --------------------------------------------------
+def encode_cursor(timestamp, entry_id):
+    raw = f"{timestamp.isoformat()}|{entry_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    Returns (timestamp, id). Raises ValueError for malformed cursors.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, entry_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+        return datetime.datetime.fromisoformat(ts), int(entry_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def ledger_entry_dict(entry):
+    return {
+        "id": entry.id,
+        "document_id": entry.document_id,
+        "action": entry.action,
+        "actor": entry.actor_role,
+        "timestamp": entry.timestamp,
+        "entry_hash": entry.entry_hash
+    }
+
+
+def _page_limit(limit: int):
+    return max(1, min(limit, LEDGER_MAX_PAGE_SIZE))
+
+
+def ledger_page_query(cursor: str = None, limit: int = LEDGER_PAGE_SIZE,
+                      document_id: int = None, actor_role: str = None):
+    """
+    SELECT for one keyset page (fetches limit + 1 rows to detect a next page).
+    """
+    query = select(LedgerEntry)
+
+    if document_id is not None:
+        query = query.where(LedgerEntry.document_id == document_id)
+    if actor_role:
+        query = query.where(LedgerEntry.actor_role == actor_role)
+    if cursor:
+        ts, entry_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(LedgerEntry.timestamp, LedgerEntry.id) < tuple_(ts, entry_id)
+        )
+
+    return (
+        query
+        .order_by(LedgerEntry.timestamp.desc(), LedgerEntry.id.desc())
+        .limit(_page_limit(limit) + 1)
+    )
+
+
+def with_archived(db, rows, cursor: str = None, limit: int = LEDGER_PAGE_SIZE,
+                  document_id: int = None, actor_role: str = None):
+    """
+    Merges archived entries (ledger_archive_service) into one page of hot
+    rows. Only cold entries newer than the last hot row fetched can make
+    it onto the page, so once the hot rows fill it the archive is not read.
+    """
+    from services.ledger_archive_service import archived_page
+
+    limit = _page_limit(limit)
+    below = decode_cursor(cursor) if cursor else None
+    above = (rows[-1].timestamp, rows[-1].id) if len(rows) > limit else None
+    cold = archived_page(db, limit + 1, below, above, document_id, actor_role)
+    if not cold:
+        return rows
+    merged = sorted(list(rows) + cold, key=lambda e: (e.timestamp, e.id), reverse=True)
+    return merged[:limit + 1]
+
+
+def ledger_page_result(rows, limit: int):
+    limit = _page_limit(limit)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+
+    return [ledger_entry_dict(e) for e in rows], next_cursor
+
+
+def list_ledger_page(db, cursor: str = None, limit: int = LEDGER_PAGE_SIZE,
+                     document_id: int = None, actor_role: str = None):
+    """
+    Newest-first ledger page using a (timestamp, id) keyset cursor.
+    Every page is an index range scan, so latency does not grow with
+    table size or page depth (unlike OFFSET).
+    Returns (entries, next_cursor); next_cursor is None on the last page.
+    """
+    query = ledger_page_query(cursor, limit, document_id, actor_role)
+    rows = db.execute(query).scalars().all()
+    rows = with_archived(db, rows, cursor, limit, document_id, actor_role)
+    return ledger_page_result(rows, limit)
+
+
+async def list_ledger_page_async(db, cursor: str = None,
+                                 limit: int = LEDGER_PAGE_SIZE,
+                                 document_id: int = None,
+                                 actor_role: str = None):
+    """
+    list_ledger_page for an AsyncSession.
+    """
+    query = ledger_page_query(cursor, limit, document_id, actor_role)
+    rows = (await db.execute(query)).scalars().all()
+    rows = await db.run_sync(with_archived, rows, cursor, limit, document_id, actor_role)
+    return ledger_page_result(rows, limit)
+
+
+def find_ledger_entry(db, entry_id: int):
+    """
+    Entry by id, hot or archived (None if neither).
+    """
+    entry = db.get(LedgerEntry, entry_id)
+    if entry is None:
+        from services.ledger_archive_service import find_archived_entry
+        entry = find_archived_entry(db, entry_id)
+    return entry
+
+
+def recent_ledger(db):
+    """
+    Newest entries for the dashboard, cached until the next ledger append.
+    """
+    return cache.get_or_set(
+        RECENT_LEDGER_KEY,
+        lambda: list_ledger_page(db, limit=RECENT_LEDGER_LIMIT)[0]
+    )
+
+
+async def recent_ledger_async(db):
+    async def load():
+        entries, _ = await list_ledger_page_async(db, limit=RECENT_LEDGER_LIMIT)
+        return entries
+
+    return await cache.get_or_set_async(RECENT_LEDGER_KEY, load)
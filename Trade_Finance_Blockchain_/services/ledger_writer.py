@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from starlette.concurrency import run_in_threadpool
+
+from database.init_db import LedgerSessionLocal
+from services.ledger_service import (
+    LEDGER_CONFLICT_RETRIES,
+    ChainConflict,
+    append_entries,
+    ledger_row
+)
+from services.metrics_service import stage
+
+# Flush when this many entries are queued ...
+LEDGER_BATCH_SIZE = int(os.getenv("LEDGER_BATCH_SIZE", "500"))
+# ... or when the oldest queued entry has waited this long
+LEDGER_FLUSH_MS = int(os.getenv("LEDGER_FLUSH_MS", "20"))
+LEDGER_QUEUE_SIZE = int(os.getenv("LEDGER_QUEUE_SIZE", "50000"))
+
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+class WriterStopped(RuntimeError):
+    """
+    The writer was stopped: the entry was not (or will not be) written.
+    """
+
+
+class LedgerWriter:
+    """
+    Group-commit ledger writer.
+
+    Entries are queued in memory and a single background thread writes
+    them in one transaction per batch, so N ledger actions cost one
+    commit (one fsync) instead of N.
+
+    Every submitted entry gets a Future that resolves once its batch
+    is committed:
+      - durable: wait on the future (log() / log_sync())
+      - fire-and-forget: ignore it (submit())
+
+    The first submit starts the thread (so CLIs need no setup); after
+    stop() submits raise WriterStopped until start() is called again.
+    """
+
+    def __init__(self, session_factory=LedgerSessionLocal,
+                 batch_size: int = LEDGER_BATCH_SIZE,
+                 flush_ms: int = LEDGER_FLUSH_MS,
+                 queue_size: int = LEDGER_QUEUE_SIZE):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000.0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopped = False
+
+        self.batches_committed = 0
+        self.entries_committed = 0
+
+    # --------------------------------------------------
+    # LIFECYCLE
+    # --------------------------------------------------
+    def start(self):
+        with self._lock:
+            self._stopped = False
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="ledger-writer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Flushes everything queued so far, then stops the thread.
+        Entries still queued after timeout have their futures failed
+        with WriterStopped.
+        """
+        with self._lock:
+            self._stopped = True
+            thread = self._thread
+            if thread and thread.is_alive():
+                self._queue.put(_STOP)
+                thread.join(timeout)
+            self._thread = None
+        self._fail_pending()
+
+    def _fail_pending(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP and not item[1].done():
+                item[1].set_exception(WriterStopped("ledger writer stopped"))
+
+    def _ensure_running(self):
+        if self._stopped:
+            raise WriterStopped("ledger writer stopped")
+        if not self.running:
+            self.start()
+
+    @property
+    def running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    # --------------------------------------------------
+    # PRODUCERS
+    # --------------------------------------------------
+    def submit(self, document_id: int, action: str, actor: str):
+        """
+        Queues one entry and returns a Future for its group commit.
+        Blocks if the queue is full (backpressure).
+        Raises WriterStopped after stop().
+        """
+        self._ensure_running()
+        future = Future()
+        self._queue.put((ledger_row(document_id, action, actor), future))
+        if self._stopped and not self.running:
+            # raced with stop() after the final drain: don't leave it queued forever
+            self._fail_pending()
+        return future
+
+    def log_sync(self, document_id: int, action: str, actor: str,
+                 timeout: float = None):
+        """
+        Durable acknowledge for sync callers.
+        """
+        return self.submit(document_id, action, actor).result(timeout)
+
+    async def log(self, document_id: int, action: str, actor: str,
+                  durable: bool = True):
+        """
+        Async entry point. With durable=True the caller awaits the
+        group commit that contains this entry.
+        """
+        self._ensure_running()
+        try:
+            future = Future()
+            self._queue.put_nowait(
+                (ledger_row(document_id, action, actor), future)
+            )
+            if self._stopped and not self.running:
+                self._fail_pending()
+        except queue.Full:
+            future = await run_in_threadpool(
+                self.submit, document_id, action, actor
+            )
+
+        if durable:
+            await asyncio.wrap_future(future)
+        return future
+
+    # --------------------------------------------------
+    # WRITER THREAD
+    # --------------------------------------------------
+    def _run(self):
+        stopping = False
+
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._flush(batch)
+
+        # Drain whatever is still queued behind the stop marker
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        for start in range(0, len(leftover), self.batch_size):
+            self._flush(leftover[start:start + self.batch_size])
+
+    def _flush(self, batch):
+        rows = [row for row, _ in batch]
+        db = self.session_factory()
+
+        try:
+            for attempt in range(LEDGER_CONFLICT_RETRIES):
+                try:
+                    with stage("ledger_write"):
+                        append_entries(db, rows)
+                        db.commit()
+                    break
+                except ChainConflict:
+                    db.rollback()
+                    if attempt == LEDGER_CONFLICT_RETRIES - 1:
+                        raise
+        except Exception as e:
+            db.rollback()
+            logger.exception("ledger batch of %d entries failed", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            db.close()
+
+        self.batches_committed += 1
+        self.entries_committed += len(batch)
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
+
+
+ledger_writer = LedgerWriter()
@@ -0,0 +1,250 @@
+"""
+Merkle tree helpers (RFC 6962 layout).
+
+Leaves and interior nodes are domain-separated:
+    leaf  = SHA256(0x00 || data)
+    node  = SHA256(0x01 || left || right)
+
+Every complete subtree is addressed by (level, position): level 0 holds
+the leaves, and node (level, pos) covers leaves
+[pos * 2**level, (pos + 1) * 2**level). Only complete subtrees are ever
+stored, so appends never rewrite existing nodes. Roots and proofs for
+any tree size are rebuilt from O(log n) of these nodes.
+"""
+import hashlib
+
+from sqlalchemy import insert, select
+
+from models.merkle import MerkleNode
+
+EMPTY_ROOT = hashlib.sha256(b"").digest()
+
+
+def leaf_hash(data: bytes):
+    return hashlib.sha256(b"\x00" + data).digest()
+
+
+def node_hash(left: bytes, right: bytes):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def _split(n: int):
+    """
+    Largest power of two strictly smaller than n (n > 1).
+    """
+    return 1 << ((n - 1).bit_length() - 1)
+
+
+# --------------------------------------------------
+# GENERIC TREE ALGORITHMS
+# get_node(level, pos) -> bytes for any complete subtree
+# --------------------------------------------------
+def subtree_root(get_node, start: int, end: int):
+    size = end - start
+    if size == 0:
+        return EMPTY_ROOT
+    if size & (size - 1) == 0 and start % size == 0:
+        level = size.bit_length() - 1
+        return get_node(level, start >> level)
+    k = _split(size)
+    return node_hash(
+        subtree_root(get_node, start, start + k),
+        subtree_root(get_node, start + k, end)
+    )
+
+
+def inclusion_path(get_node, index: int, size: int):
+    """
+    Audit path for leaf `index` in a tree of `size` leaves, leaf-first.
+    """
+    path = []
+    start, end = 0, size
+
+    while end - start > 1:
+        k = _split(end - start)
+        if index < start + k:
+            path.append(subtree_root(get_node, start + k, end))
+            end = start + k
+        else:
+            path.append(subtree_root(get_node, start, start + k))
+            start = start + k
+
+    path.reverse()
+    return path
+
+
+def consistency_path(get_node, old_size: int, new_size: int):
+    """
+    Proof that the tree of old_size leaves is a prefix of new_size.
+    """
+    if old_size == 0 or old_size == new_size:
+        return []
+
+    def subproof(m, start, end, complete):
+        n = end - start
+        if m == n:
+            return [] if complete else [subtree_root(get_node, start, end)]
+        k = _split(n)
+        if m <= k:
+            return subproof(m, start, start + k, complete) + \
+                [subtree_root(get_node, start + k, end)]
+        return subproof(m - k, start + k, end, False) + \
+            [subtree_root(get_node, start, start + k)]
+
+    return subproof(old_size, 0, new_size, True)
+
+
+# --------------------------------------------------
+# VERIFICATION (what an auditor runs)
+# --------------------------------------------------
+def verify_inclusion(leaf: bytes, index: int, size: int, path, root: bytes):
+    if index >= size:
+        return False
+
+    fn, sn = index, size - 1
+    result = leaf
+
+    for sibling in path:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            result = node_hash(sibling, result)
+            while fn and not fn & 1:
+                fn >>= 1
+                sn >>= 1
+        else:
+            result = node_hash(result, sibling)
+        fn >>= 1
+        sn >>= 1
+
+    return sn == 0 and result == root
+
+
+def verify_consistency(old_size: int, new_size: int,
+                       old_root: bytes, new_root: bytes, proof):
+    if old_size > new_size:
+        return False
+    if old_size == new_size:
+        return old_root == new_root and not proof
+    if old_size == 0:
+        return not proof
+
+    proof = list(proof)
+    if old_size & (old_size - 1) == 0:
+        proof.insert(0, old_root)
+    if not proof:
+        return False
+
+    fn, sn = old_size - 1, new_size - 1
+    while fn & 1:
+        fn >>= 1
+        sn >>= 1
+
+    fr = sr = proof[0]
+    for c in proof[1:]:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            fr = node_hash(c, fr)
+            sr = node_hash(c, sr)
+            while fn and not fn & 1:
+                fn >>= 1
+                sn >>= 1
+        else:
+            sr = node_hash(sr, c)
+        fn >>= 1
+        sn >>= 1
+
+    return fr == old_root and sr == new_root and sn == 0
+
+
+# --------------------------------------------------
+# IN-MEMORY TREE
+# --------------------------------------------------
+class MemoryTree:
+    """
+    Full tree over a fixed list of leaf hashes.
+    """
+
+    def __init__(self, leaves):
+        self.levels = [list(leaves)]
+        while len(self.levels[-1]) > 1:
+            below = self.levels[-1]
+            self.levels.append([
+                node_hash(below[i], below[i + 1])
+                for i in range(0, len(below) - 1, 2)
+            ])
+
+    @property
+    def size(self):
+        return len(self.levels[0])
+
+    def get_node(self, level: int, pos: int):
+        return self.levels[level][pos]
+
+    def root(self):
+        return subtree_root(self.get_node, 0, self.size)
+
+    def path(self, index: int):
+        return inclusion_path(self.get_node, index, self.size)
+
+
+# --------------------------------------------------
+# PERSISTENT (DB-BACKED) TREE
+# --------------------------------------------------
+class MerkleLog:
+    """
+    Append-only Merkle tree stored in merkle_nodes.
+
+    Appending leaf n writes the leaf plus every subtree it completes,
+    combining with the frontier (the rightmost unpaired node of each
+    level), so one append costs O(log n).
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._cache = {}
+
+    def get_node(self, level: int, pos: int):
+        key = (level, pos)
+        if key not in self._cache:
+            value = self.db.execute(
+                select(MerkleNode.hash)
+                .where(MerkleNode.level == level, MerkleNode.position == pos)
+            ).scalar()
+            if value is None:
+                raise LookupError(f"missing merkle node {key}")
+            self._cache[key] = bytes.fromhex(value)
+        return self._cache[key]
+
+    def append(self, size: int, leaves):
+        """
+        Appends leaf hashes to a tree of `size` leaves.
+        Returns the new size. Nodes are added to the session, not committed.
+        """
+        rows = []
+
+        for leaf in leaves:
+            level, pos, value = 0, size, leaf
+            while True:
+                self._cache[(level, pos)] = value
+                rows.append({"level": level, "position": pos,
+                             "hash": value.hex()})
+                if pos & 1 == 0:
+                    break
+                value = node_hash(self.get_node(level, pos - 1), value)
+                level, pos = level + 1, pos >> 1
+            size += 1
+
+        if rows:
+            self.db.execute(insert(MerkleNode), rows)
+        return size
+
+    def root(self, size: int):
+        return subtree_root(self.get_node, 0, size)
+
+    def inclusion_proof(self, index: int, size: int):
+        return inclusion_path(self.get_node, index, size)
+
+    def consistency_proof(self, old_size: int, new_size: int):
+        return consistency_path(self.get_node, old_size, new_size)
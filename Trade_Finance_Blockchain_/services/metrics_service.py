@@ -0,0 +1,362 @@
+"""
+Request metrics, SQL accounting and stage timers, rendered in the
+Prometheus text format on /metrics.
+
+  - MetricsMiddleware: latency histogram per (method, route, status)
+    plus per-request SQL query count and time
+  - SQL: engine-level cursor events, attributed to the current request
+    through a contextvar (run_in_threadpool and AsyncSession greenlets
+    both carry it along)
+  - stages: timed("hash"), stage("ledger_write"), instrumented Jinja
+    templates ("template")
+  - ?profile=1 (admins, see access_service): samples the
+    process's stacks while the request runs and returns them in the
+    collapsed "frame;frame;frame count" format used by flamegraph.pl
+    and speedscope
+"""
+import asyncio
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.access_service import is_admin
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "1")) / 1000
+PROFILE_MAX_DEPTH = 64
+
+
+# --------------------------------------------------
+# REGISTRY
+# --------------------------------------------------
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+
+def _labels(labels: dict):
+    if not labels:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in sorted(labels.items())
+    )
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+        self._gauges = {}
+
+    def describe(self, name: str, kind: str, text: str):
+        self._help[name] = (kind, text)
+
+    def observe(self, name: str, value: float, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def gauge(self, name: str, text: str, read):
+        """
+        read() -> number or {labels-tuple: number}, called at scrape time.
+        """
+        self.describe(name, "gauge", text)
+        self._gauges[name] = read
+
+    def render(self):
+        lines = []
+        seen = set()
+
+        def header(name):
+            if name not in seen and name in self._help:
+                kind, text = self._help[name]
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+            seen.add(name)
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda kv: kv[0])
+            histograms = [(key, h.buckets, list(h.counts), h.total, h.count)
+                          for key, h in histograms]
+
+        for (name, labels), value in counters:
+            header(name)
+            lines.append(f"{name}{_labels(dict(labels))} {value}")
+
+        for (name, labels), buckets, counts, total, count in histograms:
+            header(name)
+            labels = dict(labels)
+            cumulative = 0
+            for bound, n in zip(buckets, counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}")
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {round(total, 6)}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        for name, read in sorted(self._gauges.items()):
+            try:
+                value = read()
+            except Exception as e:
+                print("METRICS GAUGE ERROR:", name, e)
+                continue
+            header(name)
+            if isinstance(value, dict):
+                for labels, v in value.items():
+                    lines.append(f"{name}{_labels(dict(labels))} {v}")
+            else:
+                lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+metrics.describe("http_request_duration_seconds", "histogram", "Request latency by route")
+metrics.describe("http_request_sql_queries", "histogram", "SQL statements per request")
+metrics.describe("http_request_sql_seconds", "histogram", "SQL time per request")
+metrics.describe("sql_queries_total", "counter", "SQL statements executed (all threads)")
+metrics.describe("sql_seconds_total", "counter", "SQL execution time (all threads)")
+metrics.describe("stage_duration_seconds", "histogram", "Time spent in instrumented stages")
+
+
+# --------------------------------------------------
+# PER-REQUEST ACCOUNTING
+# --------------------------------------------------
+class RequestStats:
+    __slots__ = ("sql_count", "sql_seconds", "stages")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.stages = Counter()
+
+
+current_request = ContextVar("current_request", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _sql_start(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _sql_end(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    metrics.inc("sql_queries_total")
+    metrics.inc("sql_seconds_total", elapsed)
+
+    stats = current_request.get()
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_seconds += elapsed
+
+
+@event.listens_for(Engine, "handle_error")
+def _sql_failed(context):
+    # after_cursor_execute does not run for a failed query
+    if context.connection is not None:
+        context.connection.info.pop("query_started", None)
+
+
+@contextmanager
+def stage(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe("stage_duration_seconds", elapsed, stage=name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.stages[name] += elapsed
+
+
+def timed(name: str):
+    """
+    Decorator form of stage() for sync and async functions.
+    """
+    def wrap(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return wrap
+
+
+def instrument_templates(templates):
+    """
+    Times every render of a Jinja2Templates instance as stage "template".
+    """
+    base = templates.env.template_class
+
+    class TimedTemplate(base):
+        def render(self, *args, **kwargs):
+            with stage("template"):
+                return super().render(*args, **kwargs)
+
+    templates.env.template_class = TimedTemplate
+    return templates
+
+
+# --------------------------------------------------
+# SAMPLING PROFILER
+# --------------------------------------------------
+class StackSampler:
+    """
+    Samples every other thread's Python stack at a fixed interval and
+    aggregates them as collapsed stacks.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def profiling_allowed(scope):
+    if b"profile=1" not in scope.get("query_string", b"").split(b"&"):
+        return False
+    user = (scope.get("session") or {}).get("user")
+    return bool(user) and is_admin(user)
+
+
+# --------------------------------------------------
+# MIDDLEWARE
+# --------------------------------------------------
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no response buffering, works with streaming
+    responses). Must run inside SessionStoreMiddleware for ?profile=1.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = {"code": 500}
+        sampler = StackSampler().start() if profiling_allowed(scope) else None
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if sampler is None:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [
+                        (b"server-timing", _server_timing(stats, started).encode("latin-1"))
+                    ]
+            if sampler is None:
+                await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if sampler is not None:
+                sampler.stop()
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope.get("method", "GET")
+
+            metrics.observe("http_request_duration_seconds", elapsed,
+                            method=method, route=route, status=status["code"])
+            metrics.observe("http_request_sql_queries", stats.sql_count,
+                            buckets=QUERY_COUNT_BUCKETS, route=route)
+            metrics.observe("http_request_sql_seconds", stats.sql_seconds, route=route)
+
+        if sampler is not None:
+            body = sampler.collapsed().encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"server-timing", _server_timing(stats, started).encode("latin-1")),
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+
+
+def _server_timing(stats, started):
+    parts = [f'sql;dur={stats.sql_seconds * 1000:.2f};desc="{stats.sql_count} queries"']
+    parts += [f"{name};dur={seconds * 1000:.2f}" for name, seconds in stats.stages.items()]
+    parts.append(f"total;dur={(time.perf_counter() - started) * 1000:.2f}")
+    return ", ".join(parts)
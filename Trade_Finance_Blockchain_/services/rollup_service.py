@@ -0,0 +1,397 @@
+"""
+Hourly and daily analytics rollups.
+
+Source events are folded into analytics_rollups incrementally: each
+series keeps a high-water mark on its source table's id, and a run only
+reads rows above it. Sources are append-only event tables, so a
+rollup never has to be revisited:
+
+    ledger        ledger_entries              ACTION|actor_role @ timestamp
+    transactions  transaction_status_history  to_status         @ changed_at
+    documents     documents                   document_type     @ uploaded_at
+
+Ledger entries later moved into archive segments (ledger_archive_service)
+stay counted; a rebuild reads them back from the segment files.
+
+timeseries() answers arbitrary ranges from day buckets for whole days
+and hour buckets for the partial days at either end, so a year-long
+chart reads ~365 + 48 rows instead of scanning the base tables.
+
+SQLite serializes writers, so ids become visible in order and the id
+watermark is exact. Every worker runs the job; a batch is only counted
+by the worker whose compare-and-set moves the watermark over it, in the
+same transaction as the counts. On databases where sequence values can commit out
+of order, ROLLUP_SETTLE_SECONDS keeps the newest rows for the next run.
+
+CLI (from Trade_Finance_Blockchain_/):
+    python -m services.rollup_service update
+    python -m services.rollup_service rebuild
+"""
+import argparse
+import asyncio
+import datetime
+import os
+from collections import Counter, namedtuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from starlette.concurrency import run_in_threadpool
+
+from models.document import Document
+from models.ledger_entry import LedgerEntry
+from models.rollup import AnalyticsRollup, RollupWatermark
+from models.transaction_history import TransactionStatusHistory
+
+ROLLUP_INTERVAL = float(os.getenv("ROLLUP_INTERVAL_SECONDS", "30"))
+# first pass is held back so it doesn't compete with the first requests
+# after a cold start
+ROLLUP_START_DELAY = float(os.getenv("ROLLUP_START_DELAY_SECONDS", "5"))
+ROLLUP_BATCH_SIZE = int(os.getenv("ROLLUP_BATCH_SIZE", "50000"))
+ROLLUP_SETTLE_SECONDS = float(os.getenv("ROLLUP_SETTLE_SECONDS", "0"))
+
+GRAINS = ("hour", "day")
+# "auto" switches to day buckets beyond this range
+AUTO_HOURLY_MAX = datetime.timedelta(days=3)
+MAX_HOURLY_RANGE = datetime.timedelta(days=93)
+
+RollupSource = namedtuple("RollupSource", ["model", "time_column", "dimensions"])
+
+SOURCES = {
+    "ledger": RollupSource(
+        LedgerEntry, LedgerEntry.timestamp,
+        (LedgerEntry.action, LedgerEntry.actor_role)
+    ),
+    "transactions": RollupSource(
+        TransactionStatusHistory, TransactionStatusHistory.changed_at,
+        (TransactionStatusHistory.to_status,)
+    ),
+    "documents": RollupSource(
+        Document, Document.uploaded_at, (Document.document_type,)
+    ),
+}
+
+
+def bucket_start(ts: datetime.datetime, grain: str):
+    ts = ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0) if grain == "day" else ts
+
+
+def _step(grain: str):
+    return datetime.timedelta(days=1) if grain == "day" else datetime.timedelta(hours=1)
+
+
+def _dimension(values):
+    return "|".join("" if v is None else str(v) for v in values)
+
+
+# --------------------------------------------------
+# INCREMENTAL UPDATE
+# --------------------------------------------------
+def _watermark(db, series: str):
+    """
+    Current last_id of series (creating the row at 0).
+    """
+    last_id = db.execute(
+        select(RollupWatermark.last_id).where(RollupWatermark.series == series)
+    ).scalar()
+    if last_id is None:
+        try:
+            db.execute(insert(RollupWatermark).values(series=series, last_id=0))
+            db.commit()
+        except IntegrityError:
+            # another worker created it first
+            db.rollback()
+        return _watermark(db, series)
+    return last_id
+
+
+def _advance_watermark(db, series: str, old: int, new: int):
+    """
+    Moves the watermark from old to new; False if another worker moved
+    it first (its batch covers these rows).
+    """
+    return db.execute(
+        update(RollupWatermark)
+        .where(RollupWatermark.series == series, RollupWatermark.last_id == old)
+        .values(last_id=new)
+    ).rowcount == 1
+
+
+def _add_counts(db, deltas: Counter):
+    """
+    deltas: {(grain, series, dimension, bucket): n}, one upsert batch.
+    """
+    rows = [
+        {"grain": grain, "series": series, "dimension": dimension,
+         "bucket": bucket, "count": n}
+        for (grain, series, dimension, bucket), n in deltas.items()
+    ]
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    upsert = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}.get(dialect)
+    if upsert is not None:
+        stmt = upsert(AnalyticsRollup)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["grain", "series", "dimension", "bucket"],
+            set_={"count": AnalyticsRollup.count + stmt.excluded.count}
+        ), rows)
+    else:
+        for row in rows:
+            existing = db.get(AnalyticsRollup, (
+                row["grain"], row["series"], row["dimension"], row["bucket"]
+            ), with_for_update=True)
+            if existing is None:
+                db.add(AnalyticsRollup(**row))
+            else:
+                existing.count += row["count"]
+
+
+def update_series(db, series: str, batch_size: int = ROLLUP_BATCH_SIZE):
+    """
+    Folds every source row above the watermark into the rollups,
+    committing once per batch. Returns the number of rows folded in.
+    """
+    source = SOURCES[series]
+    id_column = source.model.id
+    settled = datetime.datetime.utcnow() - datetime.timedelta(seconds=ROLLUP_SETTLE_SECONDS)
+    total = 0
+
+    while True:
+        last_id = _watermark(db, series)
+        query = (
+            select(id_column, source.time_column, *source.dimensions)
+            .where(id_column > last_id)
+            .order_by(id_column)
+            .limit(batch_size)
+        )
+        if ROLLUP_SETTLE_SECONDS:
+            query = query.where(source.time_column < settled)
+
+        rows = db.execute(query).all()
+        if not rows:
+            db.commit()
+            return total
+
+        # claim the batch first: every worker runs this job, and only
+        # the one that moves the watermark may count the rows
+        if not _advance_watermark(db, series, last_id, rows[-1][0]):
+            db.rollback()
+            continue
+
+        deltas = Counter()
+        for row in rows:
+            if row[1] is None:
+                continue
+            dimension = _dimension(row[2:])
+            for grain in GRAINS:
+                deltas[(grain, series, dimension, bucket_start(row[1], grain))] += 1
+
+        _add_counts(db, deltas)
+        db.commit()
+        total += len(rows)
+
+        if len(rows) < batch_size:
+            return total
+
+
+def update_rollups(db, batch_size: int = ROLLUP_BATCH_SIZE):
+    return {series: update_series(db, series, batch_size) for series in SOURCES}
+
+
+def _fold_archived_ledger(db, batch_size: int = ROLLUP_BATCH_SIZE):
+    """
+    Folds entries moved into ledger archive segments (no longer in
+    ledger_entries) into the ledger rollups. Returns the number folded.
+    """
+    from services.ledger_archive_service import archived_size, iter_archived_leaves
+
+    total = 0
+    deltas = Counter()
+    for record in iter_archived_leaves(db, 0, archived_size(db)):
+        dimension = _dimension((record.action, record.actor_role))
+        for grain in GRAINS:
+            deltas[(grain, "ledger", dimension, bucket_start(record.timestamp, grain))] += 1
+        total += 1
+        if total % batch_size == 0:
+            _add_counts(db, deltas)
+            deltas.clear()
+    _add_counts(db, deltas)
+    db.commit()
+    return total
+
+
+def rebuild_rollups(db):
+    db.execute(delete(AnalyticsRollup))
+    db.execute(delete(RollupWatermark))
+    db.commit()
+    archived = _fold_archived_ledger(db)
+    result = update_rollups(db)
+    result["ledger"] += archived
+    return result
+
+
+class RollupJob:
+    """
+    Runs update_rollups every ROLLUP_INTERVAL seconds on the event loop,
+    with the DB work in the threadpool.
+    """
+
+    def __init__(self, session_factory=None, interval: float = ROLLUP_INTERVAL,
+                 start_delay: float = ROLLUP_START_DELAY):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.start_delay = start_delay
+        self._task = None
+        self.last_run = None
+
+    def _run_once(self):
+        if self.session_factory is None:
+            from database.init_db import SessionLocal
+            self.session_factory = SessionLocal
+        db = self.session_factory()
+        try:
+            return update_rollups(db)
+        finally:
+            db.close()
+
+    async def _loop(self):
+        await asyncio.sleep(self.start_delay)
+        while True:
+            try:
+                await run_in_threadpool(self._run_once)
+                self.last_run = datetime.datetime.utcnow()
+            except Exception as e:
+                print("ROLLUP ERROR:", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+rollup_job = RollupJob()
+
+
+# --------------------------------------------------
+# QUERIES
+# --------------------------------------------------
+def _bucket_query(series, grain, start, end, dimension=None):
+    query = select(
+        AnalyticsRollup.dimension, AnalyticsRollup.bucket, AnalyticsRollup.count
+    ).where(
+        AnalyticsRollup.series == series,
+        AnalyticsRollup.grain == grain,
+        AnalyticsRollup.bucket >= start,
+        AnalyticsRollup.bucket < end
+    )
+    if dimension is not None:
+        query = query.where(AnalyticsRollup.dimension == dimension)
+    return query
+
+
+def series_plan(series: str, start: datetime.datetime, end: datetime.datetime,
+                grain: str = "auto", dimension: str = None):
+    """
+    Output grain plus the bucket queries that cover [start, end).
+    Raises ValueError for bad arguments.
+    """
+    if series not in SOURCES:
+        raise ValueError(f"unknown series '{series}'")
+    if end <= start:
+        raise ValueError("end must be after start")
+    if grain == "auto":
+        grain = "hour" if end - start <= AUTO_HOURLY_MAX else "day"
+    if grain not in GRAINS:
+        raise ValueError(f"unknown grain '{grain}'")
+    if grain == "hour" and end - start > MAX_HOURLY_RANGE:
+        raise ValueError("hourly series are limited to 93 days")
+
+    start = bucket_start(start, "hour")
+    if grain == "hour":
+        return grain, start, end, [_bucket_query(series, "hour", start, end, dimension)]
+
+    # whole days from day buckets, ragged ends from hour buckets
+    first_day = bucket_start(start, "day")
+    if first_day < start:
+        first_day += _step("day")
+    last_day = max(bucket_start(end, "day"), first_day)
+
+    queries = [_bucket_query(series, "day", first_day, last_day, dimension)]
+    if start < first_day:
+        queries.append(_bucket_query(series, "hour", start, min(first_day, end), dimension))
+    if last_day < end:
+        queries.append(_bucket_query(series, "hour", max(last_day, start), end, dimension))
+    return grain, start, end, queries
+
+
+def series_result(grain, start, end, rows):
+    """
+    Zero-filled {"buckets": [...], "values": {dimension: [...]}}.
+    """
+    buckets = []
+    cursor = bucket_start(start, grain)
+    while cursor < end:
+        buckets.append(cursor)
+        cursor += _step(grain)
+    position = {bucket: i for i, bucket in enumerate(buckets)}
+
+    values = {}
+    for dimension, bucket, count in rows:
+        index = position.get(bucket_start(bucket, grain))
+        if index is None:
+            continue
+        values.setdefault(dimension, [0] * len(buckets))[index] += count
+
+    return {
+        "grain": grain,
+        "start": start,
+        "end": end,
+        "buckets": [bucket.isoformat() for bucket in buckets],
+        "values": values,
+        "totals": {dimension: sum(counts) for dimension, counts in values.items()}
+    }
+
+
+def timeseries(db, series: str, start, end, grain: str = "auto", dimension: str = None):
+    grain, start, end, queries = series_plan(series, start, end, grain, dimension)
+    rows = []
+    for query in queries:
+        rows.extend(db.execute(query).all())
+    return {"series": series, **series_result(grain, start, end, rows)}
+
+
+async def timeseries_async(db, series: str, start, end, grain: str = "auto",
+                           dimension: str = None):
+    grain, start, end, queries = series_plan(series, start, end, grain, dimension)
+    rows = []
+    for query in queries:
+        rows.extend((await db.execute(query)).all())
+    return {"series": series, **series_result(grain, start, end, rows)}
+
+
+if __name__ == "__main__":
+    from database.init_db import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Analytics rollups")
+    parser.add_argument("command", choices=["update", "rebuild"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        run = rebuild_rollups if args.command == "rebuild" else update_rollups
+        for series, count in run(db).items():
+            print(f"{series}: {count} rows folded in")
+    finally:
+        db.close()
@@ -0,0 +1,401 @@
+"""
+Document search.
+
+On SQLite, queries go to the documents_fts FTS5 index (see
+models/document_search.py): every term must match, the last one as a
+prefix, and results are ranked by bm25 with filename matches weighted
+highest. Queries matching more than SEARCH_RANK_WINDOW documents are
+listed newest first instead, so a term found in half of millions of
+documents costs about as much as a rare one. Pages are LIMIT/OFFSET
+within that window; the page's rows are then loaded from documents and
+given snippets.
+
+Other databases fall back to an unranked LIKE scan.
+
+Text for the index is extracted at upload time (extract_text) from
+plain-text formats; register_extractor() adds others.
+
+CLI (from Trade_Finance_Blockchain_/):
+    python -m services.search_service query "invoice acme"
+    python -m services.search_service rebuild
+    python -m services.search_service backfill   # text of older uploads
+"""
+import argparse
+import os
+import re
+
+from sqlalchemy import or_, select, text
+
+from models.document import Document
+from models.document_search import FTS_TABLE, rebuild_search_index
+from services.blob_service import blob_path, is_content_hash
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+# most matches a query is ranked over; also the deepest page
+SEARCH_RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "1000"))
+SEARCH_SNIPPET_WORDS = 16
+SEARCH_TEXT_BYTES = int(os.getenv("SEARCH_TEXT_BYTES", str(1024 * 1024)))
+# bm25 weights, in models.document_search.FTS_COLUMNS order
+SEARCH_WEIGHTS = (10.0, 2.0, 5.0, 1.0)
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+_TAG = re.compile(r"<[^>]+>")
+
+
+# --------------------------------------------------
+# TEXT EXTRACTION
+# --------------------------------------------------
+def _read_text(path: str):
+    with open(path, "rb") as f:
+        data = f.read(SEARCH_TEXT_BYTES)
+    return data.decode("utf-8", errors="ignore").replace("\x00", "")
+
+
+def _read_markup(path: str):
+    return _TAG.sub(" ", _read_text(path))
+
+
+EXTRACTORS = {
+    ".txt": _read_text, ".csv": _read_text, ".json": _read_text,
+    ".md": _read_text, ".log": _read_text,
+    ".xml": _read_markup, ".html": _read_markup, ".htm": _read_markup,
+}
+
+
+def register_extractor(extension: str, extractor):
+    """
+    extractor(path) -> str or None, for files ending in extension.
+    """
+    EXTRACTORS[extension.lower()] = extractor
+
+
+def extract_text(path: str, filename: str = None):
+    """
+    Searchable text of a stored file, or None for formats without an
+    extractor. filename decides the format (blob paths have no extension).
+    """
+    extractor = EXTRACTORS.get(os.path.splitext(filename or path)[1].lower())
+    if extractor is None:
+        return None
+    try:
+        content = extractor(path)
+    except Exception as e:
+        print("TEXT EXTRACTION ERROR:", e)
+        return None
+    if not content:
+        return None
+    return " ".join(content.split()) or None
+
+
+def backfill_text(db, chunk_size: int = 500):
+    """
+    Extracts text for stored documents uploaded before extraction
+    existed. Commits per chunk (the triggers index each update), so it
+    can be stopped and resumed. Returns the number of documents updated.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Document.id, Document.filename, Document.content_hash)
+            .where(Document.id > last_id,
+                   Document.content_hash.is_not(None),
+                   Document.extracted_text.is_(None))
+            .order_by(Document.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            return updated
+        last_id = rows[-1].id
+
+        values = []
+        for row in rows:
+            if not is_content_hash(row.content_hash):
+                continue
+            content = extract_text(blob_path(row.content_hash), row.filename)
+            if content:
+                values.append({"doc_id": row.id, "content": content})
+        if values:
+            db.execute(text(
+                "UPDATE documents SET extracted_text = :content WHERE id = :doc_id"
+            ), values)
+            updated += len(values)
+        db.commit()
+
+
+# --------------------------------------------------
+# QUERIES
+# --------------------------------------------------
+def _terms(query: str):
+    """
+    Whitespace separated terms, each as its list of tokens (the same
+    \w+ split the unicode61 tokenizer makes).
+    """
+    terms = []
+    for term in (query or "").split():
+        tokens = _TERM.findall(term.lower())
+        if tokens:
+            terms.append(tokens)
+    return terms
+
+
+def _phrase(tokens):
+    # quoted, so user input never reaches FTS5 syntax
+    return '"' + " ".join(tokens) + '"'
+
+
+def match_expression(query: str, prefix: bool = True):
+    """
+    FTS5 MATCH expression for free text: every term must match, the last
+    one as a prefix (typeahead) unless prefix is False. Punctuation
+    inside a term makes it a phrase, so "alice@acme.com" matches that
+    address only.
+    """
+    terms = _terms(query)
+    if not terms:
+        return None
+    parts = [_phrase(tokens) for tokens in terms]
+    if prefix:
+        # long prefixes merge every matching term's postings; one is enough
+        parts[-1] += "*"
+    return " AND ".join(parts)
+
+
+def _column_filters(document_type: str = None, owner_email: str = None):
+    """
+    Metadata filters as FTS5 column filters. They narrow a match inside
+    the index but are token matches, not equality; callers still check
+    the columns exactly.
+    """
+    parts = []
+    for column, value in (("document_type", document_type), ("owner_email", owner_email)):
+        tokens = _TERM.findall((value or "").lower())
+        if tokens:
+            parts.append(f"{column} : {_phrase(tokens)}")
+    return parts
+
+
+def snippet(content: str, query: str, words: int = SEARCH_SNIPPET_WORDS):
+    """
+    A few words of content around the first match, matches in [brackets].
+    Built here from the page's rows, rather than by FTS5 snippet(), which
+    would re-run the match for every row.
+    """
+    terms = _terms(query)
+    if not content or not terms:
+        return None
+    exact = {token for tokens in terms[:-1] for token in tokens}
+    exact.update(terms[-1][:-1])
+    prefix = terms[-1][-1]
+
+    def matches(word):
+        tokens = _TERM.findall(word.lower())
+        return any(t in exact or t.startswith(prefix) for t in tokens)
+
+    content_words = content.split()
+    first = next((i for i, w in enumerate(content_words) if matches(w)), None)
+    if first is None:
+        return None
+    begin = max(0, first - words // 3)
+    window = content_words[begin:begin + words]
+    excerpt = " ".join(f"[{w}]" if matches(w) else w for w in window)
+    return ("…" if begin else "") + excerpt + ("…" if begin + words < len(content_words) else "")
+
+
+def _document_dict(row, score=None, excerpt=None):
+    result = {
+        "id": row.id,
+        "filename": row.filename,
+        "document_type": row.document_type,
+        "owner_email": row.owner_email,
+        "content_hash": row.content_hash,
+        "uploaded_at": row.uploaded_at
+    }
+    if score is not None:
+        result["score"] = round(-score, 4)   # bm25 is negative; higher is better
+    if excerpt:
+        result["snippet"] = excerpt
+    return result
+
+
+def _filters(query, document_type, owner_email):
+    if document_type:
+        query = query.where(Document.document_type == document_type)
+    if owner_email:
+        query = query.where(Document.owner_email == owner_email)
+    return query
+
+
+def _newest(db, expression, limit):
+    return db.execute(text(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+        f"ORDER BY rowid DESC LIMIT :limit"
+    ), {"match": expression, "limit": limit}).scalars().all()
+
+
+def _ranked_ids(db, query, limit, offset, document_type, owner_email):
+    """
+    (id, bm25 or None) of one page.
+
+    bm25 costs a pass over every document containing each phrase (its
+    IDF counts them), so it only runs once the text is known to match at
+    most SEARCH_RANK_WINDOW documents: FTS5 streams matches in rowid
+    order and stops after the window. Broader text is listed newest
+    first; its terms are in so many documents that bm25 would score
+    them all near zero anyway.
+
+    A last term that is already a word that broad is listed as that
+    word, skipping the prefix expansion (which reads every posting of
+    every word it covers).
+    """
+    expression = match_expression(query)
+    exact = match_expression(query, prefix=False)
+    window = SEARCH_RANK_WINDOW + 1
+
+    candidates = _newest(db, exact, window)
+    if len(candidates) <= SEARCH_RANK_WINDOW:
+        candidates = _newest(db, expression, window)
+    else:
+        expression = exact
+    broad = len(candidates) > SEARCH_RANK_WINDOW
+
+    if not (document_type or owner_email):
+        if broad:
+            return [(doc_id, None) for doc_id in candidates[offset:offset + limit]]
+        if not candidates:
+            return []
+
+    join = ""
+    conditions = [f"{FTS_TABLE} MATCH :match"]
+    params = {"limit": limit, "offset": offset}
+    if document_type or owner_email:
+        join = "JOIN documents d ON d.id = f.rowid"
+    if document_type:
+        conditions.append("d.document_type = :document_type")
+        params["document_type"] = document_type
+    if owner_email:
+        conditions.append("d.owner_email = :owner_email")
+        params["owner_email"] = owner_email
+    source = f"FROM {FTS_TABLE} f {join} WHERE {' AND '.join(conditions)}"
+
+    if broad:
+        # column filters let the index skip other owners / types
+        params["match"] = " AND ".join(
+            [expression] + _column_filters(document_type, owner_email)
+        )
+        ids = db.execute(text(
+            f"SELECT f.rowid {source} ORDER BY f.rowid DESC LIMIT :limit OFFSET :offset"
+        ), params).scalars().all()
+        return [(doc_id, None) for doc_id in ids]
+
+    params["match"] = expression
+    weights = ", ".join(str(w) for w in SEARCH_WEIGHTS)
+    rows = db.execute(text(
+        f"SELECT f.rowid, bm25({FTS_TABLE}, {weights}) AS score {source} "
+        f"ORDER BY score, f.rowid DESC LIMIT :limit OFFSET :offset"
+    ), params).all()
+    return [(row[0], row[1]) for row in rows]
+
+
+def search_documents(db, query: str = "", document_type: str = None,
+                     owner_email: str = None, limit: int = SEARCH_PAGE_SIZE,
+                     offset: int = 0):
+    """
+    One page of documents matching query (and the exact metadata
+    filters), best match first. Returns (results, next_offset).
+    Raises ValueError for an empty search or an out-of-range page.
+    """
+    limit = max(1, min(limit, SEARCH_MAX_PAGE_SIZE))
+    if offset < 0 or offset >= SEARCH_RANK_WINDOW:
+        raise ValueError(f"offset must be between 0 and {SEARCH_RANK_WINDOW - 1}")
+
+    expression = match_expression(query)
+    if expression is None and not (document_type or owner_email):
+        raise ValueError("empty search")
+
+    # ---------- METADATA ONLY (newest first, on the column indexes) ----------
+    if expression is None:
+        rows = db.execute(
+            _filters(select(Document), document_type, owner_email)
+            .order_by(Document.id.desc()).limit(limit + 1).offset(offset)
+        ).scalars().all()
+        return _page([_document_dict(r) for r in rows], limit, offset)
+
+    # ---------- NO FTS5: unranked LIKE ----------
+    if db.get_bind().dialect.name != "sqlite":
+        stmt = select(Document)
+        for term in query.split():
+            pattern = f"%{term}%"
+            stmt = stmt.where(or_(
+                Document.filename.ilike(pattern),
+                Document.document_type.ilike(pattern),
+                Document.owner_email.ilike(pattern)
+            ))
+        rows = db.execute(
+            _filters(stmt, document_type, owner_email)
+            .order_by(Document.id.desc()).limit(limit + 1).offset(offset)
+        ).scalars().all()
+        return _page([_document_dict(r) for r in rows], limit, offset)
+
+    # ---------- RANKED ----------
+    ranked = _ranked_ids(db, query, limit + 1, offset, document_type, owner_email)
+    ids = [doc_id for doc_id, _ in ranked[:limit]]
+    if not ids:
+        return [], None
+
+    documents = {
+        row.id: row for row in db.execute(
+            select(Document).where(Document.id.in_(ids))
+        ).scalars()
+    }
+    results = [
+        _document_dict(documents[doc_id], score,
+                       snippet(documents[doc_id].extracted_text, query))
+        for doc_id, score in ranked
+        if doc_id in documents
+    ]
+    return _page(results, limit, offset, more=len(ranked) > limit)
+
+
+def _page(results, limit, offset, more=None):
+    if more is None:
+        more = len(results) > limit
+    next_offset = offset + limit
+    if not more or next_offset >= SEARCH_RANK_WINDOW:
+        next_offset = None
+    return results[:limit], next_offset
+
+
+if __name__ == "__main__":
+    import time
+    from database.init_db import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Document search")
+    parser.add_argument("command", choices=["query", "rebuild", "backfill"])
+    parser.add_argument("query", nargs="?", default="")
+    parser.add_argument("--type")
+    parser.add_argument("--owner")
+    parser.add_argument("--limit", type=int, default=SEARCH_PAGE_SIZE)
+    parser.add_argument("--offset", type=int, default=0)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            rebuild_search_index(db.connection())
+            db.commit()
+            print("search index rebuilt")
+        elif args.command == "backfill":
+            print(f"extracted text for {backfill_text(db)} documents")
+        else:
+            started = time.perf_counter()
+            results, next_offset = search_documents(
+                db, args.query, args.type, args.owner, args.limit, args.offset
+            )
+            elapsed = (time.perf_counter() - started) * 1000
+            for result in results:
+                print(f"{result['id']:>10}  {result.get('score', ''):>8}  "
+                      f"{result['document_type'] or '':<15} {result['filename']}")
+            print(f"{len(results)} results in {elapsed:.1f} ms, next_offset={next_offset}")
+    finally:
+        db.close()
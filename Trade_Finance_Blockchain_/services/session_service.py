@@ -0,0 +1,439 @@
+"""
+Server-side sessions.
+
+The cookie only carries an opaque random id (43 characters, whatever
+the session holds); the session itself lives in a store, looked up by
+that id once per request:
+  - memory: per-process LRU (single worker)
+  - sqlite: one SQLite file shared by every worker, on tmpfs
+            (/dev/shm) when available. Its directory must be private to
+            the app user (0700) and the file is created 0600.
+
+Expiry is sliding: a session lives SESSION_TTL past its last use.
+Expired sessions are never returned and are swept in bulk every
+SESSION_SWEEP_INTERVAL. logout_user(email) ends every session of a user
+(forced logout).
+
+SessionStoreMiddleware replaces Starlette's SessionMiddleware; routes
+keep using request.session as before.
+
+CLI (from Trade_Finance_Blockchain_/, sqlite backend):
+    python -m services.session_service stats
+    python -m services.session_service sweep
+    python -m services.session_service logout user@example.com
+"""
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+from services.cache_service import ensure_private_dir
+
+SESSION_BACKEND = os.getenv("TRADECHAIN_SESSION_BACKEND", "memory")
+SESSION_TTL = float(os.getenv("TRADECHAIN_SESSION_TTL", str(8 * 3600)))
+SESSION_MAX_ENTRIES = int(os.getenv("TRADECHAIN_SESSION_MAX_ENTRIES", "100000"))
+SESSION_DB = os.getenv(
+    "TRADECHAIN_SESSION_DB",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+                 f"tradechain-sessions-{os.getuid()}", "sessions.db")
+)
+# the sqlite store rewrites a session's expiry at most this often
+SESSION_TOUCH_INTERVAL = 60
+SESSION_SWEEP_INTERVAL = float(os.getenv("TRADECHAIN_SESSION_SWEEP_INTERVAL", "300"))
+
+SESSION_COOKIE = "session"
+# upper bound only; the store decides when a session ends
+SESSION_COOKIE_MAX_AGE = 14 * 24 * 3600
+SESSION_COOKIE_SECURE = os.getenv("TRADECHAIN_SESSION_COOKIE_SECURE", "0") == "1"
+
+
+def new_session_id():
+    return secrets.token_urlsafe(32)
+
+
+def _user_email(data):
+    return ((data or {}).get("user") or {}).get("email")
+
+
+class SessionStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.deleted = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class BaseSessionStore:
+    backend = "base"
+    # calls may wait on I/O or locks: keep them off the event loop
+    blocking = False
+
+    def __init__(self, ttl: float = SESSION_TTL):
+        self.ttl = ttl
+        self.stats = SessionStats()
+
+    def get(self, session_id):
+        """
+        Session data, or None if unknown or expired. Extends the expiry.
+        """
+        raise NotImplementedError
+
+    def create(self, data):
+        """
+        Stores data under a new id and returns the id.
+        """
+        session_id = new_session_id()
+        self.save(session_id, data)
+        self.stats.created += 1
+        return session_id
+
+    def save(self, session_id, data):
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+    def delete_user(self, email):
+        """
+        Ends every session of a user. Returns how many there were.
+        """
+        raise NotImplementedError
+
+    def sweep(self):
+        """
+        Drops every expired session. Returns how many.
+        """
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def describe(self):
+        return {"backend": self.backend, "sessions": len(self),
+                "ttl": self.ttl, **self.stats.to_dict()}
+
+
+# --------------------------------------------------
+# IN-PROCESS LRU
+# --------------------------------------------------
+class MemorySessionStore(BaseSessionStore):
+    """
+    Every get() moves the session to the end, so the OrderedDict is in
+    expiry order and a sweep only pops expired sessions off the front.
+    Past max_entries the least recently used session is dropped.
+    """
+    backend = "memory"
+
+    def __init__(self, ttl: float = SESSION_TTL, max_entries: int = SESSION_MAX_ENTRIES):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._data = OrderedDict()      # id -> (expires_at, data)
+        self._by_user = {}              # email -> {id, ...}
+        self._lock = threading.Lock()
+
+    def _forget(self, session_id):
+        _, data = self._data.pop(session_id)
+        email = _user_email(data)
+        ids = self._by_user.get(email)
+        if ids is not None:
+            ids.discard(session_id)
+            if not ids:
+                del self._by_user[email]
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(session_id)
+            if item is None or item[0] < now:
+                if item is not None:
+                    self._forget(session_id)
+                    self.stats.expired += 1
+                self.stats.misses += 1
+                return None
+            self._data[session_id] = (now + self.ttl, item[1])
+            self._data.move_to_end(session_id)
+            self.stats.hits += 1
+            return item[1]
+
+    def save(self, session_id, data):
+        with self._lock:
+            if session_id in self._data:
+                self._forget(session_id)
+            self._data[session_id] = (time.monotonic() + self.ttl, data)
+            email = _user_email(data)
+            if email:
+                self._by_user.setdefault(email, set()).add(session_id)
+            while len(self._data) > self.max_entries:
+                self._forget(next(iter(self._data)))
+                self.stats.evictions += 1
+
+    def delete(self, session_id):
+        with self._lock:
+            if session_id in self._data:
+                self._forget(session_id)
+                self.stats.deleted += 1
+
+    def delete_user(self, email):
+        with self._lock:
+            ids = list(self._by_user.get(email, ()))
+            for session_id in ids:
+                self._forget(session_id)
+            self.stats.deleted += len(ids)
+            return len(ids)
+
+    def sweep(self):
+        now = time.monotonic()
+        swept = 0
+        with self._lock:
+            while self._data:
+                session_id, (expires_at, _) = next(iter(self._data.items()))
+                if expires_at >= now:
+                    break
+                self._forget(session_id)
+                swept += 1
+            self.stats.expired += swept
+        return swept
+
+    def __len__(self):
+        return len(self._data)
+
+
+# --------------------------------------------------
+# SHARED SQLITE / SHARED-MEMORY BACKEND
+# --------------------------------------------------
+def _create_private_file(path: str):
+    """
+    Creates the session database 0600 inside a private directory
+    (O_EXCL: never adopts a file someone else planted). SQLite gives
+    the -wal / -shm files the same mode.
+    """
+    ensure_private_dir(os.path.dirname(os.path.abspath(path)))
+    try:
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600))
+    except FileExistsError:
+        info = os.lstat(path)
+        if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+            raise RuntimeError(f"{path} must be a regular file owned by uid "
+                               f"{os.getuid()} with mode 0600")
+
+
+class SQLiteSessionStore(BaseSessionStore):
+    """
+    One row per session, keyed by id (WITHOUT ROWID: the lookup is a
+    single primary-key probe). Expiry uses wall-clock time so every
+    worker agrees on it. WAL lets workers read while one writes.
+    Hit/miss stats are per process.
+    """
+    backend = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str = SESSION_DB, ttl: float = SESSION_TTL):
+        super().__init__(ttl)
+        self.path = path
+        _create_private_file(path)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY,"
+                " user_email TEXT,"
+                " data TEXT NOT NULL,"
+                " expires_at REAL NOT NULL"
+                ") WITHOUT ROWID;"
+                "CREATE INDEX IF NOT EXISTS ix_sessions_user_email ON sessions (user_email);"
+                "CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions (expires_at);"
+            )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # sessions can be re-created by logging in again
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id):
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT data, expires_at FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        if row is None or row[1] < now:
+            self.stats.misses += 1
+            if row is not None:
+                self.stats.expired += 1
+            return None
+        if row[1] - now < self.ttl - SESSION_TOUCH_INTERVAL:
+            conn.execute("UPDATE sessions SET expires_at = ? WHERE id = ?",
+                         (now + self.ttl, session_id))
+        self.stats.hits += 1
+        return json.loads(row[0])
+
+    def save(self, session_id, data):
+        self._conn().execute(
+            "INSERT INTO sessions (id, user_email, data, expires_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET user_email = excluded.user_email, "
+            "data = excluded.data, expires_at = excluded.expires_at",
+            (session_id, _user_email(data), json.dumps(data), time.time() + self.ttl)
+        )
+
+    def delete(self, session_id):
+        self.stats.deleted += self._conn().execute(
+            "DELETE FROM sessions WHERE id = ?", (session_id,)
+        ).rowcount
+
+    def delete_user(self, email):
+        deleted = self._conn().execute(
+            "DELETE FROM sessions WHERE user_email = ?", (email,)
+        ).rowcount
+        self.stats.deleted += deleted
+        return deleted
+
+    def sweep(self):
+        swept = self._conn().execute(
+            "DELETE FROM sessions WHERE expires_at < ?", (time.time(),)
+        ).rowcount
+        self.stats.expired += swept
+        return swept
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def build_session_store(backend: str = SESSION_BACKEND):
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    return MemorySessionStore()
+
+
+session_store = build_session_store()
+
+
+def logout_user(email: str, store: BaseSessionStore = None):
+    """
+    Forced logout: ends every session of email, in every worker that
+    shares the store.
+    """
+    return (store or session_store).delete_user(email)
+
+
+# --------------------------------------------------
+# MIDDLEWARE
+# --------------------------------------------------
+class SessionStoreMiddleware:
+    """
+    Pure ASGI drop-in for SessionMiddleware. scope["session"] is a plain
+    dict; it is written back only when the request changed it. Logging
+    in (a session gaining a user) issues a fresh id, so an id planted
+    before login is worthless after it; emptying the session deletes it
+    and expires the cookie. Store calls of a blocking store (sqlite:
+    the touch UPDATE can wait on another worker's write) run in the
+    threadpool.
+    """
+
+    def __init__(self, app, store: BaseSessionStore = None,
+                 cookie_name: str = SESSION_COOKIE,
+                 sweep_interval: float = SESSION_SWEEP_INTERVAL):
+        self.app = app
+        self.store = store or session_store
+        self.cookie_name = cookie_name
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._flags = "; Path=/; HttpOnly; SameSite=Lax" + \
+            ("; Secure" if SESSION_COOKIE_SECURE else "")
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        asyncio.get_running_loop().run_in_executor(None, self._sweep)
+
+    def _sweep(self):
+        try:
+            self.store.sweep()
+        except Exception as e:
+            print("SESSION SWEEP ERROR:", e)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        self._maybe_sweep()
+        session_id = HTTPConnection(scope).cookies.get(self.cookie_name)
+        data = await self._call(self.store.get, session_id) if session_id else None
+        loaded = json.dumps(data, sort_keys=True) if data else None
+        scope["session"] = dict(data) if data else {}
+
+        async def send_with_session(message):
+            if message["type"] == "http.response.start":
+                cookie = await self._call(
+                    self._commit, scope["session"], session_id, data, loaded
+                )
+                if cookie is not None:
+                    MutableHeaders(scope=message).append("set-cookie", cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_with_session)
+
+    async def _call(self, func, *args):
+        if self.store.blocking:
+            return await run_in_threadpool(func, *args)
+        return func(*args)
+
+    def _commit(self, session, session_id, data, loaded):
+        """
+        Saves / deletes the session; returns a Set-Cookie value or None.
+        """
+        if not session:
+            if data is None:
+                return None
+            self.store.delete(session_id)
+            return f"{self.cookie_name}=null{self._flags}; Max-Age=0"
+
+        if data is not None and _user_email(session) == _user_email(data):
+            if json.dumps(session, sort_keys=True) != loaded:
+                self.store.save(session_id, session)
+            return None
+
+        # new session, or a different user on this one
+        if data is not None:
+            self.store.delete(session_id)
+        session_id = self.store.create(session)
+        return f"{self.cookie_name}={session_id}{self._flags}; Max-Age={SESSION_COOKIE_MAX_AGE}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Server-side sessions (sqlite backend)")
+    parser.add_argument("command", choices=["stats", "sweep", "logout"])
+    parser.add_argument("email", nargs="?")
+    args = parser.parse_args()
+
+    store = SQLiteSessionStore()
+    if args.command == "stats":
+        for key, value in store.describe().items():
+            print(f"{key}: {value}")
+    elif args.command == "sweep":
+        print(f"swept {store.sweep()} expired sessions")
+    else:
+        if not args.email:
+            parser.error("logout needs an email")
+        print(f"ended {logout_user(args.email, store)} sessions of {args.email}")
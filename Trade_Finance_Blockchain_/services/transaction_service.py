@@ -0,0 +1,242 @@
+"""
+Trade transaction lifecycle.
+
+    CREATED -> IN_PROGRESS -> SHIPPED -> SETTLED
+                                      -> DISPUTED
+
+Statuses are stored upper-case. A transition is a single conditional
+UPDATE (WHERE id = ? AND status = <expected>), so two concurrent
+requests cannot both move the same transaction; the loser gets
+InvalidTransition. Every change writes a status-history row and moves
+the analytics counters in the same transaction.
+
+CLI (from Trade_Finance_Blockchain_/):
+    python -m services.transaction_service normalize
+"""
+import argparse
+import datetime
+
+from sqlalchemy import insert, select, union_all, update
+
+from models.transaction import TradeTransaction
+from models.transaction_history import TransactionStatusHistory
+from services.counter_service import (
+    rebuild_counters,
+    record_status_change,
+    record_transaction_created
+)
+
+INITIAL_STATUS = "CREATED"
+
+TRANSITIONS = {
+    "CREATED": ("IN_PROGRESS",),
+    "IN_PROGRESS": ("SHIPPED",),
+    "SHIPPED": ("SETTLED", "DISPUTED"),
+    "SETTLED": (),
+    "DISPUTED": (),
+}
+
+ACTIVE_STATUSES = ("IN_PROGRESS", "SHIPPED")
+TRANSACTION_PAGE_SIZE = 50
+
+
+class TransactionNotFound(LookupError):
+    pass
+
+
+class InvalidTransition(ValueError):
+    """
+    Target status is not reachable from the current one (or another
+    request changed the status first).
+    """
+
+
+def normalize_status(status: str):
+    """
+    "in progress" / "In-Progress" / "in_progress" -> "IN_PROGRESS"
+    """
+    return (status or INITIAL_STATUS).strip().upper().replace("-", "_").replace(" ", "_")
+
+
+def transaction_dict(tx):
+    return {
+        "id": tx.id,
+        "buyer_email": tx.buyer_email,
+        "seller_email": tx.seller_email,
+        "status": tx.status,
+        "created_at": tx.created_at,
+        "next_statuses": list(TRANSITIONS.get(tx.status, ()))
+    }
+
+
+# --------------------------------------------------
+# WRITES
+# --------------------------------------------------
+def _record_history(db, transaction_id, from_status, to_status, actor):
+    db.execute(insert(TransactionStatusHistory).values(
+        transaction_id=transaction_id,
+        from_status=from_status,
+        to_status=to_status,
+        actor=actor,
+        changed_at=datetime.datetime.utcnow()
+    ))
+
+
+def create_transaction(db, buyer_email: str, seller_email: str, actor: str = None):
+    tx = TradeTransaction(
+        buyer_email=buyer_email,
+        seller_email=seller_email,
+        status=INITIAL_STATUS
+    )
+    db.add(tx)
+    db.flush()
+    _record_history(db, tx.id, None, INITIAL_STATUS, actor)
+    record_transaction_created(db, INITIAL_STATUS)
+    db.commit()
+    db.refresh(tx)
+    return tx
+
+
+def transition(db, transaction_id: int, new_status: str, actor: str = None,
+               expected_status: str = None):
+    """
+    Moves a transaction to new_status and commits. expected_status, if
+    given, pins the status the caller saw (optimistic concurrency).
+    Returns (old_status, new_status).
+    """
+    new_status = normalize_status(new_status)
+
+    current = db.execute(
+        select(TradeTransaction.status).where(TradeTransaction.id == transaction_id)
+    ).scalar()
+    if current is None:
+        raise TransactionNotFound(f"transaction {transaction_id} not found")
+
+    if expected_status is not None and normalize_status(expected_status) != current:
+        raise InvalidTransition(f"transaction is {current}, not {expected_status}")
+    if new_status not in TRANSITIONS.get(current, ()):
+        raise InvalidTransition(f"cannot move from {current} to {new_status}")
+
+    moved = db.execute(
+        update(TradeTransaction)
+        .where(TradeTransaction.id == transaction_id,
+               TradeTransaction.status == current)
+        .values(status=new_status)
+    )
+    if moved.rowcount != 1:
+        db.rollback()
+        raise InvalidTransition(f"transaction {transaction_id} changed concurrently")
+
+    _record_history(db, transaction_id, current, new_status, actor)
+    record_status_change(db, current, new_status)
+    db.commit()
+    return current, new_status
+
+
+def normalize_statuses(db):
+    """
+    One-off cleanup of legacy free-form statuses; rebuilds the counters.
+    Returns {old: new} for every rewritten value.
+    """
+    changed = {}
+    for (status,) in db.execute(select(TradeTransaction.status).distinct()).all():
+        canonical = normalize_status(status)
+        if canonical != status:
+            db.execute(
+                update(TradeTransaction)
+                .where(TradeTransaction.status == status)
+                .values(status=canonical)
+            )
+            changed[status] = canonical
+    db.commit()
+    if changed:
+        rebuild_counters(db)
+    return changed
+
+
+# --------------------------------------------------
+# READS (index range scans)
+# --------------------------------------------------
+def _newest_first(query, before: datetime.datetime = None, limit: int = TRANSACTION_PAGE_SIZE):
+    if before is not None:
+        query = query.where(TradeTransaction.created_at < before)
+    return query.order_by(TradeTransaction.created_at.desc()).limit(limit)
+
+
+def transactions_by_status(db, statuses, before=None, limit: int = TRANSACTION_PAGE_SIZE):
+    query = select(TradeTransaction).where(TradeTransaction.status.in_(
+        [normalize_status(s) for s in statuses]
+    ))
+    return [transaction_dict(tx) for tx in
+            db.execute(_newest_first(query, before, limit)).scalars()]
+
+
+def active_transactions(db, before=None, limit: int = TRANSACTION_PAGE_SIZE,
+                        party: str = None):
+    """
+    Active transactions, only those party is buyer or seller on if given.
+    """
+    if party is not None:
+        return counterparty_transactions(db, party, before, limit, ACTIVE_STATUSES)
+    return transactions_by_status(db, ACTIVE_STATUSES, before, limit)
+
+
+def counterparty_transactions(db, email: str, before=None,
+                              limit: int = TRANSACTION_PAGE_SIZE, statuses=None):
+    """
+    Transactions where email is buyer or seller (optionally only those
+    in statuses): two index range scans merged, instead of an OR that
+    defeats both indexes.
+    """
+    def side(column):
+        query = select(TradeTransaction.id, TradeTransaction.created_at).where(column == email)
+        if statuses is not None:
+            query = query.where(TradeTransaction.status.in_(
+                [normalize_status(s) for s in statuses]
+            ))
+        return _newest_first(query, before, limit).subquery()
+
+    # each side is wrapped in a subquery: SQLite rejects LIMIT inside UNION arms
+    buyer, seller = side(TradeTransaction.buyer_email), side(TradeTransaction.seller_email)
+    sides = union_all(select(buyer), select(seller)).subquery()
+    newest = select(sides.c.id, sides.c.created_at).distinct() \
+        .order_by(sides.c.created_at.desc()).limit(limit).subquery()
+
+    query = select(TradeTransaction) \
+        .where(TradeTransaction.id.in_(select(newest.c.id))) \
+        .order_by(TradeTransaction.created_at.desc())
+    return [transaction_dict(tx) for tx in db.execute(query).scalars()]
+
+
+def status_history(db, transaction_id: int):
+    rows = db.execute(
+        select(TransactionStatusHistory)
+        .where(TransactionStatusHistory.transaction_id == transaction_id)
+        .order_by(TransactionStatusHistory.changed_at, TransactionStatusHistory.id)
+    ).scalars()
+    return [
+        {
+            "from_status": row.from_status,
+            "to_status": row.to_status,
+            "actor": row.actor,
+            "changed_at": row.changed_at
+        }
+        for row in rows
+    ]
+
+
+if __name__ == "__main__":
+    from database.init_db import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Transaction statuses")
+    parser.add_argument("command", choices=["normalize"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        changed = normalize_statuses(db)
+        for old, new in sorted(changed.items(), key=lambda kv: str(kv[0])):
+            print(f"{old!r} -> {new}")
+        print(f"{len(changed)} status values normalized")
+    finally:
+        db.close()
@@ -0,0 +1,304 @@
+"""
+Whole-ledger hash-chain verification.
+
+The ledger is split into leaf_index ranges; each range is re-hashed in
+a worker process, and the range boundaries are stitched together
+afterwards (range k must start from the hash range k-1 ended on).
+The last verified position is saved so the next run only checks
+entries appended since. A run ends at the chain head (ledger_head): if
+rows are missing at the end, or the last hash differs from the head's,
+verification fails. One run at a time, across workers.
+Archived leaves (ledger_archive_service) are read from their segment
+files, so --full still covers the whole chain.
+
+CLI (from Trade_Finance_Blockchain_/):
+    python -m services.verification_service [--full] [--workers N]
+"""
+import argparse
+import datetime
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from config import DATABASE_URL
+from database.init_db import SessionLocal, read_engine
+from database.sqlite_profile import create_read_engine
+from models.ledger_entry import LedgerEntry
+from models.merkle import LedgerHead
+from models.verification import VerificationCheckpoint
+from services.ledger_archive_service import archived_size, iter_archived_leaves
+from services.ledger_service import GENESIS_HASH, compute_entry_hash
+
+VERIFY_RANGE_SIZE = int(os.getenv("VERIFY_RANGE_SIZE", "100000"))
+VERIFY_WORKERS = int(os.getenv("VERIFY_WORKERS", str(os.cpu_count() or 1)))
+VERIFY_FETCH_SIZE = 5000
+# a run claim older than this is considered abandoned
+VERIFY_CLAIM_TIMEOUT = float(os.getenv("VERIFY_CLAIM_TIMEOUT_SECONDS", "3600"))
+
+
+class VerificationBusy(RuntimeError):
+    """
+    Another verification run holds the claim.
+    """
+
+
+# --------------------------------------------------
+# WORKER (runs in a spawned child process, or in-process)
+# --------------------------------------------------
+# Workers are started with "spawn", not fork: the web process runs the
+# ledger writer and anchoring threads, and a forked child would inherit
+# their locks and the parent's pooled connections. Each child builds
+# its own engine on first use.
+_worker_engine = None
+
+
+def _engine():
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = create_read_engine(DATABASE_URL)
+    return _worker_engine
+
+
+def _verify_range_in_worker(start: int, end: int):
+    return verify_range(start, end, _engine())
+
+
+def verify_range(start: int, end: int, engine=read_engine):
+    """
+    Re-hashes leaves [start, end) and checks the links inside the range.
+    Returns a summary used to join ranges; "broken" is the first bad
+    link found or None.
+    """
+    columns = (
+        LedgerEntry.id, LedgerEntry.leaf_index, LedgerEntry.prev_hash,
+        LedgerEntry.entry_hash, LedgerEntry.document_id, LedgerEntry.action,
+        LedgerEntry.actor_role, LedgerEntry.timestamp
+    )
+    query = (
+        select(*columns)
+        .where(LedgerEntry.leaf_index >= start, LedgerEntry.leaf_index < end)
+        .order_by(LedgerEntry.leaf_index)
+        .execution_options(yield_per=VERIFY_FETCH_SIZE)
+    )
+
+    summary = {
+        "start": start, "end": end, "count": 0,
+        "first_prev_hash": None, "last_hash": None, "broken": None
+    }
+    expected_index = start
+    prev = None
+
+    with engine.connect() as conn:
+        rows = itertools.chain(iter_archived_leaves(conn, start, end), conn.execute(query))
+        for row in rows:
+            if summary["first_prev_hash"] is None:
+                summary["first_prev_hash"] = row.prev_hash
+                prev = row.prev_hash
+
+            problem = None
+            if row.leaf_index != expected_index:
+                problem = f"missing leaf {expected_index}"
+            elif row.prev_hash != prev:
+                problem = "prev_hash does not match previous entry"
+            elif row.entry_hash != compute_entry_hash(
+                row.leaf_index, row.prev_hash, row.document_id,
+                row.action, row.actor_role, row.timestamp
+            ):
+                problem = "entry_hash does not match entry contents"
+
+            if problem:
+                summary["broken"] = {
+                    "entry_id": row.id,
+                    "leaf_index": row.leaf_index,
+                    "reason": problem
+                }
+                break
+
+            prev = row.entry_hash
+            expected_index += 1
+            summary["count"] += 1
+
+    summary["last_hash"] = prev
+    if summary["broken"] is None and expected_index != end:
+        summary["broken"] = {
+            "entry_id": None,
+            "leaf_index": expected_index,
+            "reason": f"missing leaf {expected_index}"
+        }
+    return summary
+
+
+# --------------------------------------------------
+# COORDINATOR
+# --------------------------------------------------
+def _saved_checkpoint(db):
+    return db.get(VerificationCheckpoint, 1)
+
+
+def _claim_run(db):
+    """
+    Marks a verification as running, across every worker sharing the
+    database. A claim older than VERIFY_CLAIM_TIMEOUT is treated as
+    abandoned (its process died). Raises VerificationBusy.
+    """
+    if _saved_checkpoint(db) is None:
+        db.add(VerificationCheckpoint(id=1, verified_size=0, verified_at=None))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+
+    now = datetime.datetime.utcnow()
+    stale = now - datetime.timedelta(seconds=VERIFY_CLAIM_TIMEOUT)
+    claimed = db.execute(
+        update(VerificationCheckpoint)
+        .where(VerificationCheckpoint.id == 1,
+               or_(VerificationCheckpoint.running_since.is_(None),
+                   VerificationCheckpoint.running_since < stale))
+        .values(running_since=now)
+    ).rowcount
+    db.commit()
+    if not claimed:
+        raise VerificationBusy("a ledger verification is already running")
+
+
+def _release_run(db):
+    db.rollback()
+    db.execute(
+        update(VerificationCheckpoint)
+        .where(VerificationCheckpoint.id == 1)
+        .values(running_since=None)
+    )
+    db.commit()
+
+
+def verify_ledger(full: bool = False, workers: int = VERIFY_WORKERS,
+                  range_size: int = VERIFY_RANGE_SIZE):
+    """
+    Verifies the hash chain from the saved checkpoint (or from genesis
+    with full=True) up to the chain head, and advances the checkpoint if
+    everything links up. Raises VerificationBusy if a run is in progress.
+    """
+    started = time.perf_counter()
+    db = SessionLocal()
+
+    try:
+        _claim_run(db)
+    except BaseException:
+        db.close()
+        raise
+
+    try:
+        # the head is read first: entries appended during the run are
+        # left for the next one
+        head = db.execute(
+            select(LedgerHead.tree_size, LedgerHead.last_hash).where(LedgerHead.id == 1)
+        ).first()
+        head_size, head_hash = head if head else (0, GENESIS_HASH)
+
+        saved = _saved_checkpoint(db)
+        checkpoint = None if full or not saved.verified_size else saved
+        start = checkpoint.verified_size if checkpoint else 0
+        expected_prev = checkpoint.last_hash if checkpoint else GENESIS_HASH
+
+        # rows past the head are not part of the chain: checking them
+        # reports the mismatch
+        end = db.execute(
+            select(func.max(LedgerEntry.leaf_index))
+        ).scalar()
+        end = max(0 if end is None else end + 1, archived_size(db), head_size)
+
+        ranges = [
+            (lo, min(lo + range_size, end))
+            for lo in range(start, end, range_size)
+        ]
+
+        if len(ranges) > 1 and workers > 1:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(ranges)),
+                mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                summaries = list(pool.map(
+                    _verify_range_in_worker, *zip(*ranges)
+                ))
+        else:
+            summaries = [verify_range(lo, hi) for lo, hi in ranges]
+
+        # ---------- JOIN RANGE BOUNDARIES ----------
+        verified_size = start
+        broken = None
+
+        for summary in summaries:
+            if summary["count"] and summary["first_prev_hash"] != expected_prev:
+                broken = {
+                    "entry_id": None,
+                    "leaf_index": summary["start"],
+                    "reason": "prev_hash does not match previous range"
+                }
+                break
+            verified_size += summary["count"]
+            if summary["count"]:
+                expected_prev = summary["last_hash"]
+            if summary["broken"]:
+                broken = summary["broken"]
+                break
+
+        # ---------- CHAIN HEAD ----------
+        # deleting the newest entries leaves a chain that links up on its
+        # own; only the head (size + last hash) shows it is short
+        if broken is None and (verified_size != head_size or expected_prev != head_hash):
+            broken = {
+                "entry_id": None,
+                "leaf_index": min(verified_size, head_size),
+                "reason": f"chain ends at {verified_size} entries but the head "
+                          f"records {head_size}" if verified_size != head_size
+                          else "last entry hash does not match the chain head"
+            }
+
+        checked = verified_size - start
+
+        # ---------- SAVE CHECKPOINT ----------
+        if broken is None and verified_size > saved.verified_size:
+            saved.verified_size = verified_size
+            saved.last_hash = expected_prev
+            saved.verified_at = datetime.datetime.utcnow()
+            db.commit()
+
+        elapsed = time.perf_counter() - started
+        return {
+            "ok": broken is None,
+            "from_leaf": start,
+            "verified_size": verified_size,
+            "head_size": head_size,
+            "entries_checked": checked,
+            "ranges": len(ranges),
+            "seconds": round(elapsed, 3),
+            "entries_per_second": round(checked / elapsed) if elapsed else 0,
+            "first_broken_link": broken
+        }
+    finally:
+        _release_run(db)
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify the ledger hash chain")
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the saved checkpoint and start at genesis")
+    parser.add_argument("--workers", type=int, default=VERIFY_WORKERS)
+    parser.add_argument("--range-size", type=int, default=VERIFY_RANGE_SIZE)
+    args = parser.parse_args()
+
+    try:
+        report = verify_ledger(args.full, args.workers, args.range_size)
+    except VerificationBusy as e:
+        print(e)
+        raise SystemExit(2)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    raise SystemExit(0 if report["ok"] else 1)
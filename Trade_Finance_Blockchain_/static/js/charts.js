@@ -0,0 +1,71 @@
+// Analytics charts: draws /analytics/series responses on <canvas>
+// elements marked with data-series (and optional data-grain,
+// data-days, data-dimension). No chart library needed.
+(function () {
+  const COLORS = ["#20c997", "#93c5fd", "#f59e0b", "#f87171", "#a78bfa", "#4ade80"];
+
+  function drawSeries(canvas, data) {
+    const ctx = canvas.getContext("2d");
+    const width = canvas.width = canvas.clientWidth;
+    const height = canvas.height = canvas.clientHeight || 220;
+    const pad = 30;
+    ctx.clearRect(0, 0, width, height);
+
+    const dims = Object.keys(data.values);
+    const n = data.buckets.length;
+    let max = 1;
+    dims.forEach(d => data.values[d].forEach(v => { if (v > max) max = v; }));
+
+    const x = i => pad + (n > 1 ? i * (width - 2 * pad) / (n - 1) : 0);
+    const y = v => height - pad - v * (height - 2 * pad) / max;
+
+    ctx.strokeStyle = "#334155";
+    ctx.beginPath();
+    ctx.moveTo(pad, pad);
+    ctx.lineTo(pad, height - pad);
+    ctx.lineTo(width - pad, height - pad);
+    ctx.stroke();
+
+    ctx.fillStyle = "#94a3b8";
+    ctx.font = "11px sans-serif";
+    ctx.fillText(String(max), 2, pad);
+    if (n) {
+      ctx.fillText(data.buckets[0].slice(0, 10), pad, height - 10);
+      ctx.fillText(data.buckets[n - 1].slice(0, 10), width - pad - 60, height - 10);
+    }
+
+    dims.forEach((dim, k) => {
+      const color = COLORS[k % COLORS.length];
+      ctx.strokeStyle = color;
+      ctx.beginPath();
+      data.values[dim].forEach((v, i) => {
+        if (i === 0) ctx.moveTo(x(i), y(v));
+        else ctx.lineTo(x(i), y(v));
+      });
+      ctx.stroke();
+
+      ctx.fillStyle = color;
+      ctx.fillText(dim + " (" + data.totals[dim] + ")", width - pad - 150, pad + 14 * k);
+    });
+  }
+
+  function load(canvas) {
+    const days = Number(canvas.dataset.days || 30);
+    const end = new Date();
+    const start = new Date(end.getTime() - days * 86400000);
+    const params = new URLSearchParams({
+      series: canvas.dataset.series,
+      grain: canvas.dataset.grain || "auto",
+      start: start.toISOString().slice(0, 19),
+      end: end.toISOString().slice(0, 19)
+    });
+    if (canvas.dataset.dimension) params.set("dimension", canvas.dataset.dimension);
+
+    fetch("/analytics/series?" + params)
+      .then(res => res.json())
+      .then(data => drawSeries(canvas, data))
+      .catch(() => {});
+  }
+
+  document.querySelectorAll("canvas[data-series]").forEach(load);
+})();
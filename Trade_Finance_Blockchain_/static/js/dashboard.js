@@ -1,8 +1,57 @@
-fetch("/")
-  .then(res => res.json())
-  .then(data => {
-    document.getElementById("docs").innerText = data.total_documents;
-    document.getElementById("txns").innerText = data.active_transactions;
-    document.getElementById("verified").innerText = data.verified_today;
-    document.getElementById("risk").innerText = data.avg_risk_score;
+// Live dashboard: applies server-sent events instead of reloading.
+// "counters" carries analytics counter deltas, "ledger" the newest
+// appended entries (see services/event_hub.py).
+(function () {
+  if (!window.EventSource) return;
+
+  const ACTIVE = ["trades.status.in_progress", "trades.status.shipped"];
+  const RECENT_LIMIT = 5;
+
+  function bump(id, delta) {
+    const el = document.getElementById(id);
+    if (!el || !delta) return;
+    el.innerText = (parseInt(el.innerText, 10) || 0) + delta;
+  }
+
+  function renderEntry(entry) {
+    const item = document.createElement("div");
+    item.className = "ledger-item";
+
+    const action = document.createElement("strong");
+    action.textContent = entry.action;
+    const doc = document.createElement("div");
+    doc.textContent = entry.document_id;
+    const meta = document.createElement("span");
+    meta.textContent = entry.actor + " • " + entry.timestamp;
+
+    item.append(action, doc, meta);
+    return item;
+  }
+
+  const events = new EventSource("/events/stream");
+
+  events.addEventListener("counters", function (e) {
+    const deltas = JSON.parse(e.data).deltas;
+    Object.keys(deltas).forEach(name => {
+      if (name.indexOf("documents.type.") === 0) bump("docs", deltas[name]);
+      if (ACTIVE.indexOf(name) !== -1) bump("txns", deltas[name]);
+      if (name === "ledger.total") bump("verified", deltas[name]);
+    });
   });
+
+  events.addEventListener("ledger", function (e) {
+    const section = document.getElementById("recent-ledger");
+    if (!section) return;
+
+    const empty = section.querySelector("p");
+    if (empty) empty.remove();
+
+    const heading = section.querySelector("h3");
+    JSON.parse(e.data).entries.slice().reverse().forEach(entry => {
+      heading.after(renderEntry(entry));
+    });
+    section.querySelectorAll(".ledger-item").forEach((item, i) => {
+      if (i >= RECENT_LIMIT) item.remove();
+    });
+  });
+})();
@@ -0,0 +1,62 @@
+// Ledger Explorer: fetch older entries page by page using the
+// keyset cursor returned by /ledger/entries (no OFFSET scans), and
+// prepend new entries pushed over /events/stream.
+(function () {
+  const button = document.getElementById("load-more");
+  const box = document.getElementById("ledger-box");
+  if (!box) return;
+
+  function renderEntry(entry) {
+    const item = document.createElement("div");
+    item.className = "ledger-item";
+
+    const main = document.createElement("div");
+    main.className = "ledger-main";
+
+    const action = document.createElement("span");
+    action.className = "action";
+    action.textContent = entry.action;
+
+    const actor = document.createElement("span");
+    actor.className = "actor";
+    actor.textContent = "by " + entry.actor;
+
+    const timestamp = document.createElement("div");
+    timestamp.className = "timestamp";
+    timestamp.textContent = entry.timestamp;
+
+    main.append(action, actor);
+    item.append(main, timestamp);
+    return item;
+  }
+
+  if (window.EventSource) {
+    const events = new EventSource("/events/stream");
+    events.addEventListener("ledger", function (e) {
+      JSON.parse(e.data).entries.slice().reverse().forEach(entry => {
+        box.prepend(renderEntry(entry));
+      });
+    });
+  }
+
+  if (!button) return;
+
+  button.addEventListener("click", function () {
+    const cursor = button.dataset.cursor;
+    button.disabled = true;
+
+    fetch("/ledger/entries?cursor=" + encodeURIComponent(cursor))
+      .then(res => res.json())
+      .then(data => {
+        data.entries.forEach(entry => box.appendChild(renderEntry(entry)));
+
+        if (data.next_cursor) {
+          button.dataset.cursor = data.next_cursor;
+          button.disabled = false;
+        } else {
+          button.remove();
+        }
+      })
+      .catch(() => { button.disabled = false; });
+  });
+})();
@@ -0,0 +1,78 @@
+// Document search: queries /documents/search as the user types
+// (debounced) and replaces the table body with the ranked results;
+// "Load more" follows next_offset. Clearing the box restores the
+// server-rendered list.
+(function () {
+  const input = document.getElementById("doc-search");
+  const body = document.getElementById("doc-rows");
+  const more = document.getElementById("search-more");
+  if (!input || !body) return;
+
+  const original = Array.from(body.children);
+  let timer = null;
+  let query = "";
+  let nextOffset = null;
+
+  function cell(text) {
+    const td = document.createElement("td");
+    td.textContent = text == null ? "" : text;
+    return td;
+  }
+
+  function renderRow(doc) {
+    const row = document.createElement("tr");
+    const name = cell(doc.filename);
+    if (doc.snippet) {
+      const snippet = document.createElement("div");
+      snippet.className = "snippet";
+      snippet.textContent = doc.snippet;
+      name.appendChild(snippet);
+    }
+    row.append(cell(doc.id), name, cell(doc.owner_email), cell(doc.uploaded_at));
+    return row;
+  }
+
+  function showMore() {
+    if (!more) return;
+    more.hidden = nextOffset == null;
+    more.disabled = false;
+  }
+
+  function search(offset) {
+    const requested = query;
+    const url = "/documents/search?q=" + encodeURIComponent(requested) +
+      "&offset=" + offset;
+
+    return fetch(url)
+      .then(res => res.ok ? res.json() : { results: [], next_offset: null })
+      .then(data => {
+        if (requested !== query) return;   // a newer search is in flight
+        if (offset === 0) body.replaceChildren();
+        data.results.forEach(doc => body.appendChild(renderRow(doc)));
+        nextOffset = data.next_offset;
+        showMore();
+      })
+      .catch(showMore);
+  }
+
+  input.addEventListener("input", function () {
+    clearTimeout(timer);
+    timer = setTimeout(function () {
+      query = input.value.trim();
+      if (!query) {
+        body.replaceChildren(...original);
+        nextOffset = null;
+        showMore();
+        return;
+      }
+      search(0);
+    }, 200);
+  });
+
+  if (more) {
+    more.addEventListener("click", function () {
+      more.disabled = true;
+      search(nextOffset);
+    });
+  }
+})();
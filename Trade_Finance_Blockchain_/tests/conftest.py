@@ -0,0 +1,74 @@
+"""
+Shared fixtures.
+
+Settings are read from the environment when the app modules are
+imported, so the database and storage directories are pointed at a
+throwaway directory here, before any test imports them. Small archive
+segments keep the ledger archive tests fast.
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="tradechain-tests-")
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_TMP, "test.db")
+os.environ["BLOB_STORE_DIR"] = os.path.join(_TMP, "blobs")
+os.environ["LEDGER_ARCHIVE_DIR"] = os.path.join(_TMP, "ledger_archive")
+os.environ["ANCHOR_NODE_PATH"] = os.path.join(_TMP, "anchor_node.jsonl")
+os.environ["TRADECHAIN_CACHE_BACKEND"] = "memory"
+os.environ["TRADECHAIN_SESSION_BACKEND"] = "memory"
+os.environ["LEDGER_SEGMENT_ROWS"] = "16"
+os.environ["LEDGER_BLOCK_ROWS"] = "4"
+
+
+def _empty_database():
+    from database.init_db import engine
+    from models.base import Base
+
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+
+def _empty_storage():
+    from services import ledger_archive_service
+    from services.cache_service import cache
+
+    # segment files are recreated under the same names by the next test
+    with ledger_archive_service._files_lock:
+        for segment in ledger_archive_service._open_files.values():
+            segment.close()
+        ledger_archive_service._open_files.clear()
+        ledger_archive_service._block_cache.clear()
+    cache.clear()
+
+    for name in ("blobs", "ledger_archive"):
+        shutil.rmtree(os.path.join(_TMP, name), ignore_errors=True)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    from database.init_db import init_db
+
+    init_db()
+    yield
+    shutil.rmtree(_TMP, ignore_errors=True)
+
+
+@pytest.fixture
+def db():
+    """
+    A session on an empty database; everything written is removed afterwards.
+    """
+    from database.init_db import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        _empty_database()
+        _empty_storage()
@@ -0,0 +1,37 @@
+import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from routes.analytics_api import _utc_param
+from services.ledger_service import log_ledger_many
+from services.rollup_service import timeseries, update_rollups
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("2026-10-01T00:00:00Z", datetime.datetime(2026, 10, 1)),
+    ("2026-10-01T05:30:00+05:30", datetime.datetime(2026, 10, 1)),
+    ("2026-10-01T00:00:00", datetime.datetime(2026, 10, 1)),
+    ("2026-10-01", datetime.datetime(2026, 10, 1)),
+    ("", None),
+])
+def test_query_times_become_naive_utc(raw, expected):
+    assert _utc_param(raw, "start") == expected
+
+
+@pytest.mark.parametrize("raw", ["yesterday", "2026-13-01", "0001-01-01T00:00:00+05:00"])
+def test_bad_query_times_are_400(raw):
+    with pytest.raises(HTTPException) as e:
+        _utc_param(raw, "start")
+    assert e.value.status_code == 400
+
+
+def test_offset_range_matches_utc_buckets(db):
+    at = datetime.datetime(2026, 10, 1, 12)
+    log_ledger_many(db, [(1, "UPLOAD", "bank", at)] * 3)
+    update_rollups(db)
+
+    report = timeseries(db, "ledger",
+                        _utc_param("2026-10-01T14:00:00+02:00", "start"),
+                        _utc_param("2026-10-01T13:00:00Z", "end"))
+    assert sum(report["totals"].values()) == 3
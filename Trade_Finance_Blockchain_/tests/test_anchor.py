@@ -0,0 +1,33 @@
+import hashlib
+import time
+
+from services.anchor_service import Anchorer, receipt
+
+
+def _digest(n):
+    return hashlib.sha256(str(n).encode()).hexdigest()
+
+
+def test_listener_skips_hashes_when_the_queue_is_full():
+    anchorer = Anchorer(queue_size=1)
+    anchorer.listener(_digest(1))
+
+    started = time.monotonic()
+    anchorer.listener(_digest(2))
+    assert time.monotonic() - started < 1
+    assert anchorer.hashes_dropped == 1
+    assert anchorer.queue_depth == 1
+
+
+def test_stop_seals_queued_hashes_under_backpressure(db):
+    # max_pending=0: the backend always counts as behind
+    anchorer = Anchorer(flush_seconds=0.05, max_pending=0)
+    anchorer.start()
+    anchorer.submit(_digest(1))
+    time.sleep(0.3)
+
+    started = time.monotonic()
+    anchorer.stop(timeout=10)
+    assert time.monotonic() - started < 5
+    assert not anchorer.running
+    assert receipt(db, _digest(1))["verified"]
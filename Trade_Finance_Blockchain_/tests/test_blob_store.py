@@ -0,0 +1,57 @@
+import datetime
+import os
+
+from sqlalchemy import update
+
+from models.blob import Blob
+from services.blob_service import (
+    blob_path,
+    create_document,
+    delete_document,
+    store_file,
+    sweep_orphans
+)
+
+
+def _orphan(db, tmp_path):
+    path = tmp_path / "invoice.txt"
+    path.write_text("invoice 42")
+    result, created = store_file(str(path))
+    assert created
+
+    document = create_document(db, result, "invoice.txt", "invoice", "buyer@x")
+    delete_document(db, document)
+    db.execute(
+        update(Blob).where(Blob.hash == result.digest)
+        .values(released_at=datetime.datetime.utcnow() - datetime.timedelta(days=1))
+    )
+    db.commit()
+    return str(path), result.digest
+
+
+def test_sweep_removes_expired_orphans(db, tmp_path):
+    _, digest = _orphan(db, tmp_path)
+
+    assert sweep_orphans(db, grace_seconds=60) == [digest]
+    assert not os.path.exists(blob_path(digest))
+    assert db.get(Blob, digest) is None
+
+
+def test_reupload_keeps_an_orphan_from_the_sweep(db, tmp_path):
+    path, digest = _orphan(db, tmp_path)
+
+    result, created = store_file(path)
+    assert not created
+    assert sweep_orphans(db, grace_seconds=60) == []
+
+    create_document(db, result, "invoice.txt", "invoice", "seller@x")
+    assert os.path.exists(blob_path(digest))
+
+
+def test_reupload_after_a_sweep_stores_the_file_again(db, tmp_path):
+    path, digest = _orphan(db, tmp_path)
+    sweep_orphans(db, grace_seconds=60)
+
+    _, created = store_file(path)
+    assert created
+    assert os.path.exists(blob_path(digest))
@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from models.document import Document
+from services.blob_service import blob_path
+from services.import_service import run_import
+
+
+def _ndjson(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def files_dir(tmp_path):
+    scans = tmp_path / "scans"
+    scans.mkdir()
+    (scans / "invoice.txt").write_text("invoice 42")
+    (tmp_path / "secret.txt").write_text("not for import")
+    os.symlink(tmp_path / "secret.txt", scans / "link.txt")
+    return str(scans)
+
+
+def _errors(report):
+    return {e["record"]: e["error"] for e in report["errors"]}
+
+
+def test_bad_content_hashes_are_rejected(db, tmp_path):
+    path = _ndjson(tmp_path / "docs.ndjson", [
+        {"filename": "a.pdf", "content_hash": "../../../etc/passwd"},
+        {"filename": "b.pdf", "content_hash": "AB" * 32},
+        {"filename": "c.pdf", "content_hash": "ab" * 32},   # well-formed, not stored
+        {"filename": "d.pdf"},
+    ])
+    report = run_import(db, "documents", path)
+
+    assert (report["rows_imported"], report["rows_rejected"]) == (1, 3)
+    errors = _errors(report)
+    assert "bad content_hash" in errors[1] and "bad content_hash" in errors[2]
+    assert "unknown content_hash" in errors[3]
+    assert [d.filename for d in db.query(Document)] == ["d.pdf"]
+
+
+@pytest.mark.parametrize("name", ["../secret.txt", "link.txt", "/etc/passwd", "missing.txt"])
+def test_files_outside_the_files_dir_are_rejected(db, tmp_path, files_dir, name):
+    path = _ndjson(tmp_path / "docs.ndjson", [{"filename": "x.pdf", "file": name}])
+    report = run_import(db, "documents", path, files_dir=files_dir)
+
+    assert (report["rows_imported"], report["rows_rejected"]) == (0, 1)
+    assert db.query(Document).count() == 0
+
+
+def test_files_need_a_files_dir(db, tmp_path, files_dir):
+    path = _ndjson(tmp_path / "docs.ndjson", [{"filename": "x.pdf", "file": "invoice.txt"}])
+    report = run_import(db, "documents", path)
+
+    assert report["rows_rejected"] == 1
+    assert "not accepted" in _errors(report)[1]
+
+
+def test_attached_file_is_stored_and_linked(db, tmp_path, files_dir):
+    path = _ndjson(tmp_path / "docs.ndjson", [
+        {"filename": "invoice.pdf", "file": "invoice.txt", "owner_email": "a@x"}
+    ])
+    report = run_import(db, "documents", path, files_dir=files_dir)
+    assert report["rows_imported"] == 1
+
+    document = db.query(Document).one()
+    with open(blob_path(document.content_hash)) as f:
+        assert f.read() == "invoice 42"
+
+    # a later import may link to the now-stored blob by hash
+    again = _ndjson(tmp_path / "more.ndjson", [
+        {"filename": "copy.pdf", "content_hash": document.content_hash}
+    ])
+    assert run_import(db, "documents", again)["rows_imported"] == 1
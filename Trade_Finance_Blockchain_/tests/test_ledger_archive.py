@@ -0,0 +1,91 @@
+import datetime
+import os
+
+from sqlalchemy import func, select
+
+from models.ledger_entry import LedgerEntry
+from services.ledger_archive_service import (
+    LEDGER_SEGMENT_ROWS,
+    LEDGER_ARCHIVE_DIR,
+    archive_ledger,
+    find_archived_entry,
+    list_segments,
+    verify_segments
+)
+from services.ledger_proof_service import inclusion_proof
+from services.ledger_service import create_checkpoint, list_ledger_page, log_ledger_many
+from services.merkle_service import verify_inclusion
+from services.rollup_service import update_rollups
+from services.verification_service import verify_ledger
+
+ENTRIES = 2 * LEDGER_SEGMENT_ROWS + 5
+
+
+def _hot_entries(db):
+    return db.execute(select(LedgerEntry).order_by(LedgerEntry.leaf_index)).scalars().all()
+
+
+def _archive(db):
+    """
+    Fills the ledger, makes it eligible (verified, rolled up) and archives it.
+    Returns the entries as they were before archiving.
+    """
+    log_ledger_many(db, [(i % 7, "UPLOAD" if i % 2 else "VERIFY", "bank") for i in range(ENTRIES)])
+    before = [(e.id, e.leaf_index, e.document_id, e.action, e.entry_hash) for e in _hot_entries(db)]
+    assert verify_ledger(True, workers=1)["ok"]
+    update_rollups(db)
+
+    report = archive_ledger(db, datetime.timedelta(0))
+    assert report["segments_created"] == 2
+    return before
+
+
+def test_archive_round_trip(db):
+    before = _archive(db)
+
+    assert db.execute(select(func.count(LedgerEntry.id))).scalar() == 5
+    assert [s["entry_count"] for s in list_segments(db)] == [LEDGER_SEGMENT_ROWS] * 2
+
+    # listings read hot and archived rows as one newest-first ledger
+    entries, cursor = list_ledger_page(db, limit=10)
+    while cursor:
+        page, cursor = list_ledger_page(db, cursor, limit=10)
+        entries += page
+    assert [e["id"] for e in entries] == [row[0] for row in reversed(before)]
+
+    for entry_id, leaf_index, document_id, action, entry_hash in before[:2 * LEDGER_SEGMENT_ROWS]:
+        record = find_archived_entry(db, entry_id)
+        assert (record.leaf_index, record.document_id, record.action, record.entry_hash) == \
+            (leaf_index, document_id, action, entry_hash)
+
+    assert verify_segments(db)["ok"]
+    assert verify_ledger(True, workers=1)["ok"]
+
+    checkpoint = create_checkpoint(db)
+    proof = inclusion_proof(db, before[3][0], checkpoint.id)
+    assert verify_inclusion(bytes.fromhex(proof["leaf_hash"]), proof["leaf_index"],
+                            checkpoint.tree_size, [bytes.fromhex(p) for p in proof["path"]],
+                            bytes.fromhex(checkpoint.root_hash))
+
+
+def test_tampered_segment_fails_verification(db):
+    _archive(db)
+    segment = list_segments(db)[1]["file_name"]
+
+    with open(os.path.join(LEDGER_ARCHIVE_DIR, segment), "r+b") as f:
+        f.seek(20)
+        byte = f.read(1)
+        f.seek(20)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    report = verify_segments(db)
+    assert not report["ok"]
+    assert [p["segment"] for p in report["problems"]] == [segment]
+
+
+def test_unverified_entries_stay_hot(db):
+    log_ledger_many(db, [(1, "UPLOAD", "bank")] * ENTRIES)
+    update_rollups(db)
+
+    assert archive_ledger(db, datetime.timedelta(0))["segments_created"] == 0
+    assert len(_hot_entries(db)) == ENTRIES
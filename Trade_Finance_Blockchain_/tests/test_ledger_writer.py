@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import func, select
+
+from database.init_db import LedgerSessionLocal
+from models.ledger_entry import LedgerEntry
+from models.transaction import TradeTransaction
+from services import ledger_service
+from services.ledger_service import ChainConflict, log_ledger, log_ledger_many
+from services.ledger_writer import LedgerWriter, WriterStopped
+
+
+def _count(db, model):
+    return db.execute(select(func.count(model.id))).scalar()
+
+
+def test_log_ledger_commits_the_callers_changes(db):
+    # the pending insert holds SQLite's write lock until committed
+    db.add(TradeTransaction(buyer_email="a@x", seller_email="b@x"))
+    db.flush()
+
+    log_ledger(db, 1, "UPLOAD", "bank")
+
+    db.rollback()
+    assert _count(db, TradeTransaction) == 1
+    assert _count(db, LedgerEntry) == 1
+
+
+def test_log_ledger_many_retries_a_lost_chain_head(db, monkeypatch):
+    append_entries = ledger_service.append_entries
+    conflicts = iter([True])
+
+    def racing_append(db, rows):
+        if next(conflicts, False):
+            raise ChainConflict("head moved")
+        return append_entries(db, rows)
+
+    monkeypatch.setattr(ledger_service, "append_entries", racing_append)
+    assert log_ledger_many(db, [(1, "UPLOAD", "bank")] * 3) == 3
+    assert _count(db, LedgerEntry) == 3
+
+
+def test_stopped_writer_rejects_entries(db):
+    writer = LedgerWriter(LedgerSessionLocal)
+    writer.submit(1, "UPLOAD", "bank").result(5)
+    writer.stop()
+
+    with pytest.raises(WriterStopped):
+        writer.submit(1, "UPLOAD", "bank")
+
+    writer.start()
+    writer.submit(2, "UPLOAD", "bank").result(5)
+    writer.stop()
+    assert _count(db, LedgerEntry) == 2
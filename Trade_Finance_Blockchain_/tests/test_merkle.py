@@ -0,0 +1,105 @@
+import hashlib
+
+import pytest
+from sqlalchemy import select
+
+from models.ledger_entry import LedgerEntry
+from services.ledger_proof_service import consistency_proof, inclusion_proof
+from services.ledger_service import create_checkpoint, log_ledger_many
+from services.merkle_service import (
+    MemoryTree,
+    consistency_path,
+    leaf_hash,
+    verify_consistency,
+    verify_inclusion
+)
+
+MAX_SIZE = 33
+
+
+def _leaves(n):
+    return [leaf_hash(hashlib.sha256(str(i).encode()).digest()) for i in range(n)]
+
+
+# --------------------------------------------------
+# IN-MEMORY TREES
+# --------------------------------------------------
+@pytest.mark.parametrize("size", range(1, MAX_SIZE + 1))
+def test_inclusion_round_trip(size):
+    leaves = _leaves(size)
+    tree = MemoryTree(leaves)
+    root = tree.root()
+
+    for index, leaf in enumerate(leaves):
+        path = tree.path(index)
+        assert verify_inclusion(leaf, index, size, path, root)
+        assert not verify_inclusion(leaf_hash(b"forged"), index, size, path, root)
+        if size > 1:
+            assert not verify_inclusion(leaf, (index + 1) % size, size, path, root)
+    assert not verify_inclusion(leaves[0], size, size, tree.path(0), root)
+
+
+@pytest.mark.parametrize("size", range(1, MAX_SIZE + 1))
+def test_consistency_round_trip(size):
+    leaves = _leaves(size)
+    tree = MemoryTree(leaves)
+
+    for old_size in range(1, size + 1):
+        old_root = MemoryTree(leaves[:old_size]).root()
+        proof = consistency_path(tree.get_node, old_size, size)
+        assert verify_consistency(old_size, size, old_root, tree.root(), proof)
+
+        rewritten = MemoryTree([leaf_hash(b"forged")] + leaves[1:old_size]).root()
+        assert not verify_consistency(old_size, size, rewritten, tree.root(), proof)
+
+
+# --------------------------------------------------
+# LEDGER CHECKPOINTS (DB-backed tree)
+# --------------------------------------------------
+def test_ledger_proofs_against_every_checkpoint(db):
+    checkpoints = []
+    for i in range(1, 18):
+        log_ledger_many(db, [(i, "UPLOAD", "bank")])
+        checkpoints.append(create_checkpoint(db))
+    entry_ids = db.execute(select(LedgerEntry.id).order_by(LedgerEntry.leaf_index)).scalars().all()
+
+    for checkpoint in checkpoints:
+        root = bytes.fromhex(checkpoint.root_hash)
+        for entry_id in entry_ids[:checkpoint.tree_size]:
+            proof = inclusion_proof(db, entry_id, checkpoint.id)
+            assert verify_inclusion(
+                bytes.fromhex(proof["leaf_hash"]), proof["leaf_index"],
+                checkpoint.tree_size, [bytes.fromhex(p) for p in proof["path"]], root
+            )
+
+    for first in checkpoints:
+        for second in checkpoints[checkpoints.index(first):]:
+            proof = consistency_proof(db, first.id, second.id)
+            assert verify_consistency(
+                first.tree_size, second.tree_size,
+                bytes.fromhex(first.root_hash), bytes.fromhex(second.root_hash),
+                [bytes.fromhex(p) for p in proof["proof"]]
+            )
+
+
+def test_entries_after_the_last_checkpoint_are_provable(db):
+    log_ledger_many(db, [(1, "UPLOAD", "bank")] * 3)
+    first = create_checkpoint(db)
+    log_ledger_many(db, [(2, "UPLOAD", "bank")] * 4)   # not checkpointed
+    entry_ids = db.execute(select(LedgerEntry.id).order_by(LedgerEntry.leaf_index)).scalars().all()
+
+    for entry_id in entry_ids:
+        proof = inclusion_proof(db, entry_id)
+        head = proof["checkpoint"]
+        assert (head["id"], head["tree_size"]) == (None, 7)
+        assert verify_inclusion(
+            bytes.fromhex(proof["leaf_hash"]), proof["leaf_index"], head["tree_size"],
+            [bytes.fromhex(p) for p in proof["path"]], bytes.fromhex(head["root_hash"])
+        )
+
+    proof = consistency_proof(db, first.id)
+    assert verify_consistency(
+        first.tree_size, proof["second"]["tree_size"],
+        bytes.fromhex(first.root_hash), bytes.fromhex(proof["second"]["root_hash"]),
+        [bytes.fromhex(p) for p in proof["proof"]]
+    )
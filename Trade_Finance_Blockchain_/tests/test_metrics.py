@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from database.init_db import engine
+from services import metrics_service
+from services.metrics_service import MetricsMiddleware
+
+
+def test_failed_queries_leave_no_timers():
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+        conn.execute(text("SELECT 1"))
+        assert not conn.info.get("query_started")
+
+
+def test_profiler_stops_when_the_request_fails(monkeypatch):
+    samplers = []
+
+    class RecordingSampler(metrics_service.StackSampler):
+        def start(self):
+            samplers.append(self)
+            return super().start()
+
+    async def failing_app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(metrics_service, "StackSampler", RecordingSampler)
+    monkeypatch.setattr(metrics_service, "is_admin", lambda user: True)
+    scope = {"type": "http", "method": "GET", "path": "/", "query_string": b"profile=1",
+             "session": {"user": {"email": "admin@x"}}}
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(MetricsMiddleware(failing_app)(scope, None, None))
+    assert len(samplers) == 1 and not samplers[0]._thread.is_alive()
@@ -0,0 +1,47 @@
+import os
+import shutil
+
+from sqlalchemy import create_engine, inspect
+
+from database.migrations import LATEST_VERSION, current_version, migrate
+from models.base import Base
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _engine(path):
+    return create_engine(f"sqlite:///{path}")
+
+
+def _assert_at_head(engine):
+    with engine.connect() as conn:
+        assert current_version(conn) == LATEST_VERSION
+        assert set(Base.metadata.tables) <= set(inspect(conn).get_table_names())
+
+
+def test_committed_database_migrates_to_head(tmp_path):
+    # unversioned database from before the migration series
+    path = tmp_path / "tradechain.db"
+    shutil.copy(os.path.join(ROOT, "database", "tradechain.db"), path)
+    engine = _engine(path)
+
+    assert migrate(engine) == list(range(1, LATEST_VERSION + 1))
+    _assert_at_head(engine)
+    assert migrate(engine) == []
+    engine.dispose()
+
+
+def test_partially_migrated_database_continues(tmp_path):
+    engine = _engine(tmp_path / "old.db")
+    with engine.begin() as conn:
+        for name in ("users", "documents", "ledger_entries", "transactions", "risk_scores"):
+            Base.metadata.tables[name].create(conn)
+
+    migrate(engine, target=3)
+    with engine.connect() as conn:
+        assert current_version(conn) == 3
+        assert not inspect(conn).has_table("ledger_segments")
+
+    assert migrate(engine) == list(range(4, LATEST_VERSION + 1))
+    _assert_at_head(engine)
+    engine.dispose()
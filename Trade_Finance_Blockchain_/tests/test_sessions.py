@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+from services.session_service import SessionStoreMiddleware, SQLiteSessionStore
+
+
+class RecordingStore(SQLiteSessionStore):
+    def __init__(self, path):
+        super().__init__(str(path))
+        self.threads = []
+
+    def get(self, session_id):
+        self.threads.append(threading.get_ident())
+        return super().get(session_id)
+
+    def save(self, session_id, data):
+        self.threads.append(threading.get_ident())
+        super().save(session_id, data)
+
+
+def test_sqlite_store_calls_stay_off_the_event_loop(tmp_path):
+    store = RecordingStore(tmp_path / "private" / "sessions.db")
+    session_id = store.create({"user": {"email": "bank@x"}})
+    store.threads.clear()
+
+    async def app(scope, receive, send):
+        scope["session"]["seen"] = True
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    async def request():
+        scope = {"type": "http", "headers": [(b"cookie", f"session={session_id}".encode())]}
+        await SessionStoreMiddleware(app, store)(scope, None, send)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(request())
+    assert len(store.threads) == 2     # get + save
+    assert loop_thread not in store.threads
+    assert store.get(session_id)["seen"]
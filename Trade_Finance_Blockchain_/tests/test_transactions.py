@@ -0,0 +1,73 @@
+import pytest
+
+from services.transaction_service import (
+    InvalidTransition,
+    TransactionNotFound,
+    active_transactions,
+    counterparty_transactions,
+    create_transaction,
+    normalize_status,
+    status_history,
+    transition
+)
+
+
+@pytest.mark.parametrize("raw", ["in progress", "In-Progress", "in_progress", " IN_PROGRESS "])
+def test_normalize_status(raw):
+    assert normalize_status(raw) == "IN_PROGRESS"
+
+
+def test_happy_path_records_history(db):
+    tx = create_transaction(db, "buyer@x", "seller@x", "buyer@x")
+    assert tx.status == "CREATED"
+
+    for status in ("in progress", "SHIPPED", "settled"):
+        transition(db, tx.id, status, "seller@x")
+
+    moves = [(h["from_status"], h["to_status"]) for h in status_history(db, tx.id)]
+    assert moves == [(None, "CREATED"), ("CREATED", "IN_PROGRESS"),
+                     ("IN_PROGRESS", "SHIPPED"), ("SHIPPED", "SETTLED")]
+
+
+@pytest.mark.parametrize("path, target", [
+    ((), "SHIPPED"),
+    ((), "SETTLED"),
+    (("IN_PROGRESS",), "CREATED"),
+    (("IN_PROGRESS", "SHIPPED", "DISPUTED"), "SETTLED"),
+    (("IN_PROGRESS", "SHIPPED", "SETTLED"), "DISPUTED"),
+])
+def test_invalid_transitions_are_rejected(db, path, target):
+    tx = create_transaction(db, "buyer@x", "seller@x")
+    for status in path:
+        transition(db, tx.id, status)
+
+    with pytest.raises(InvalidTransition):
+        transition(db, tx.id, target)
+    assert len(status_history(db, tx.id)) == len(path) + 1
+
+
+def test_expected_status_must_match(db):
+    tx = create_transaction(db, "buyer@x", "seller@x")
+    transition(db, tx.id, "IN_PROGRESS", expected_status="created")
+
+    with pytest.raises(InvalidTransition):
+        transition(db, tx.id, "SHIPPED", expected_status="CREATED")
+    assert transition(db, tx.id, "SHIPPED", expected_status="IN_PROGRESS") == \
+        ("IN_PROGRESS", "SHIPPED")
+
+
+def test_unknown_transaction(db):
+    with pytest.raises(TransactionNotFound):
+        transition(db, 999, "IN_PROGRESS")
+
+
+def test_active_transactions_scoped_to_party(db):
+    mine = create_transaction(db, "buyer@x", "seller@x")
+    theirs = create_transaction(db, "other@x", "seller2@x")
+    idle = create_transaction(db, "seller@x", "buyer@x")
+    for tx in (mine, theirs):
+        transition(db, tx.id, "IN_PROGRESS")
+
+    assert {t["id"] for t in active_transactions(db)} == {mine.id, theirs.id}
+    assert [t["id"] for t in active_transactions(db, party="seller@x")] == [mine.id]
+    assert {t["id"] for t in counterparty_transactions(db, "seller@x")} == {mine.id, idle.id}
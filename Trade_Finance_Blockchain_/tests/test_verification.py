@@ -0,0 +1,72 @@
+from sqlalchemy import delete, update
+
+from models.ledger_entry import LedgerEntry
+from services.ledger_service import log_ledger_many
+from services import verification_service
+from services.verification_service import verify_ledger
+
+
+def _ledger(db, count=40):
+    log_ledger_many(db, [(i, "UPLOAD", "bank") for i in range(count)])
+
+
+def _verify(full=True):
+    # small ranges so the range boundaries are stitched too
+    return verify_ledger(full, workers=1, range_size=7)
+
+
+def test_intact_chain_verifies(db):
+    _ledger(db)
+    report = _verify()
+    assert report["ok"], report
+    assert report["verified_size"] == report["head_size"] == 40
+
+
+def test_tampered_entry_fails(db):
+    _ledger(db)
+    db.execute(update(LedgerEntry).where(LedgerEntry.leaf_index == 20).values(action="DELETE"))
+    db.commit()
+
+    report = _verify()
+    assert not report["ok"]
+    assert report["first_broken_link"]["leaf_index"] == 20
+
+
+def test_tampered_link_at_range_boundary_fails(db):
+    _ledger(db)
+    db.execute(update(LedgerEntry).where(LedgerEntry.leaf_index == 14)
+               .values(prev_hash="0" * 64))
+    db.commit()
+
+    report = _verify()
+    assert not report["ok"]
+    assert report["first_broken_link"]["leaf_index"] == 14
+
+
+def test_deleted_tail_fails(db):
+    _ledger(db)
+    db.execute(delete(LedgerEntry).where(LedgerEntry.leaf_index >= 35))
+    db.commit()
+
+    report = _verify()
+    assert not report["ok"]
+    assert report["verified_size"] == 35
+
+
+def test_incremental_run_checks_only_new_entries(db):
+    _ledger(db)
+    assert _verify()["ok"]
+    _ledger(db, 5)
+
+    report = _verify(full=False)
+    assert report["ok"]
+    assert (report["from_leaf"], report["entries_checked"]) == (40, 5)
+
+
+def test_parallel_run_uses_spawned_workers(db):
+    _ledger(db)
+    report = verify_ledger(True, workers=2, range_size=7)
+    assert report["ok"], report
+    assert report["ranges"] == 6
+    # engines are only built inside the workers
+    assert verification_service._worker_engine is None
@@ -0,0 +1,33 @@
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.core.security import InvalidToken, decode_token
+
+bearer = HTTPBearer(auto_error=False)
+
+
+def get_current_user(creds: HTTPAuthorizationCredentials = Depends(bearer)):
+    """
+    Claims of the caller's access token (sub, uid, role, org, jti, exp).
+    The only DB access is the revocation check, a primary-key lookup
+    whose "not revoked" answer is reused for REVOCATION_CHECK_TTL seconds.
+    role and org are read from the token, not the users table: a change
+    to either takes effect when the token expires (30 minutes) or is
+    revoked.
+    """
+    if creds is None:
+        raise HTTPException(401, "not authenticated",
+                            headers={"WWW-Authenticate": "Bearer"})
+    try:
+        return decode_token(creds.credentials)
+    except InvalidToken:
+        raise HTTPException(401, "invalid token",
+                            headers={"WWW-Authenticate": "Bearer"})
+
+
+def require_role(*roles):
+    def checker(user: dict = Depends(get_current_user)):
+        if user.get("role") not in roles:
+            raise HTTPException(403, "forbidden")
+        return user
+    return checker
@@ -1,16 +1,290 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
-from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime, timedelta
 
 SECRET_KEY = "milestone1secret"
 ALGORITHM = "HS256"
-pwd = CryptContext(schemes=["bcrypt"])
 
-def hash_password(p): return pwd.hash(p)
-def verify_password(p, h): return pwd.verify(p, h)
+# Cost factor for new hashes; older hashes are upgraded on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 2)))
+# Jobs allowed in flight (running + queued) before we answer 503
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(HASH_WORKERS * 4)))
+LOGIN_CACHE_TTL = int(os.getenv("LOGIN_CACHE_TTL", "300"))
+LOGIN_CACHE_SIZE = int(os.getenv("LOGIN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "50000"))
+# How long a "not revoked" answer from the database is reused
+REVOCATION_CHECK_TTL = float(os.getenv("REVOCATION_CHECK_TTL", "5"))
+
+# Built on first use: bcrypt runs in the hasher pool's worker processes,
+# so the web process never needs to import passlib at startup
+_pwd = None
+
+def pwd():
+    global _pwd
+    if _pwd is None:
+        from passlib.context import CryptContext
+        _pwd = CryptContext(
+            schemes=["bcrypt"],
+            bcrypt__default_rounds=BCRYPT_ROUNDS,
+            bcrypt__min_rounds=BCRYPT_ROUNDS  # weaker hashes "need update"
+        )
+    return _pwd
+
+def hash_password(p): return pwd().hash(p)
+def verify_password(p, h): return pwd().verify(p, h)
+def verify_and_update(p, h): return pwd().verify_and_update(p, h)
 
 def create_token(data, minutes):
     to_encode = data.copy()
     to_encode["exp"] = datetime.utcnow() + timedelta(minutes=minutes)
+    to_encode.setdefault("jti", secrets.token_urlsafe(16))  # revocation handle
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+# --------------------------------------------------
+# BOUNDED BCRYPT WORKER POOL
+# --------------------------------------------------
+class HasherBusy(Exception):
+    """Too many password hash jobs pending; caller should answer 503."""
+
+
+class PasswordHasherPool:
+    """
+    Runs bcrypt in worker processes so it never holds the event loop
+    (or the GIL of the request process). At most max_pending jobs may be
+    in flight; beyond that HasherBusy is raised instead of queueing.
+    """
+
+    def __init__(self, workers=HASH_WORKERS, max_pending=HASH_MAX_PENDING):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    async def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool(), fn, *args)
+        finally:
+            self._slots.release()
+
+    async def hash(self, password):
+        return await self.run(hash_password, password)
+
+    async def verify_and_update(self, password, hashed):
+        return await self.run(verify_and_update, password, hashed)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+hasher = PasswordHasherPool()
+
+
+# --------------------------------------------------
+# VERIFIED-CREDENTIAL CACHE
+# --------------------------------------------------
+class LoginCache:
+    """
+    Remembers recently verified (email, password, stored hash) triples
+    as an HMAC-derived key, so a retried login skips bcrypt.
+    The plaintext is never stored; the HMAC secret lives only in this
+    process, and a changed password or hash yields a different key.
+    """
+
+    def __init__(self, ttl=LOGIN_CACHE_TTL, max_entries=LOGIN_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._secret = secrets.token_bytes(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _derive(self, email, password, hashed):
+        message = "\0".join([email, password, hashed]).encode("utf-8")
+        return hmac.new(self._secret, message, hashlib.sha256).digest()
+
+    def check(self, email, password, hashed):
+        with self._lock:
+            item = self._entries.get(email)
+            if item is None:
+                return False
+            key, expires_at = item
+            if expires_at < time.monotonic():
+                del self._entries[email]
+                return False
+        return hmac.compare_digest(key, self._derive(email, password, hashed))
+
+    def remember(self, email, password, hashed):
+        key = self._derive(email, password, hashed)
+        with self._lock:
+            self._entries[email] = (key, time.monotonic() + self.ttl)
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, email):
+        with self._lock:
+            self._entries.pop(email, None)
+
+
+login_cache = LoginCache()
+
+
+# --------------------------------------------------
+# TOKEN VERIFICATION
+# --------------------------------------------------
+class InvalidToken(Exception):
+    """Token is malformed, expired, badly signed or revoked."""
+
+
+class RevocationList:
+    """
+    Revoked token ids (jti) in the revoked_tokens table, kept until the
+    token would have expired anyway, so a logout handled by one worker
+    holds in every worker. Checked on every request, cache hit or not.
+    Ids revoked by this process are remembered locally, which answers
+    repeat uses of them without a query; a "not revoked" answer from the
+    table is reused for REVOCATION_CHECK_TTL seconds, so a logout handled
+    by another worker takes effect here within that time.
+    """
+
+    def __init__(self, check_ttl=REVOCATION_CHECK_TTL):
+        self.check_ttl = check_ttl
+        self._revoked = {}
+        self._checked = {}      # jti -> time its "not revoked" answer expires
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, exp):
+        from app.database import engine
+        from app.models.revoked_token import RevokedToken
+
+        table = RevokedToken.__table__
+        with engine.begin() as conn:
+            conn.execute(table.insert().prefix_with("OR IGNORE"),
+                         {"jti": jti, "expires_at": exp})
+            if secrets.randbelow(64) == 0:
+                conn.execute(table.delete().where(table.c.expires_at <= time.time()))
+        with self._lock:
+            self._revoked[jti] = exp
+            self._checked.pop(jti, None)
+            if len(self._revoked) % 1024 == 0:
+                now = time.time()
+                self._revoked = {
+                    k: v for k, v in self._revoked.items() if v > now
+                }
+
+    def is_revoked(self, jti):
+        if jti in self._revoked:
+            return True
+        now = time.time()
+        if self._checked.get(jti, 0) > now:
+            return False
+        from app.database import engine
+        from app.models.revoked_token import RevokedToken
+
+        table = RevokedToken.__table__
+        with engine.connect() as conn:
+            revoked = conn.execute(
+                table.select().with_only_columns(table.c.jti).where(table.c.jti == jti)
+            ).first() is not None
+        if not revoked:
+            with self._lock:
+                if len(self._checked) >= TOKEN_CACHE_SIZE:
+                    self._checked = {
+                        k: v for k, v in self._checked.items() if v > now
+                    }
+                self._checked[jti] = now + self.check_ttl
+        return revoked
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+class TokenCache:
+    """
+    LRU of sha256(token) -> claims for tokens whose signature was already
+    checked. Entries live until the token's own exp, so a hit costs one
+    hash and one dict lookup instead of an HMAC verify + JSON decode.
+    """
+
+    def __init__(self, max_entries=TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest):
+        with self._lock:
+            claims = self._entries.get(digest)
+            if claims is not None and claims["exp"] <= time.time():
+                del self._entries[digest]
+                claims = None
+            if claims is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return claims
+
+    def set(self, digest, claims):
+        with self._lock:
+            self._entries[digest] = claims
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+revoked_tokens = RevocationList()
+token_cache = TokenCache()
+
+
+def decode_token(token):
+    """
+    Verified claims of token, from the cache when possible.
+    Raises InvalidToken.
+    """
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    claims = token_cache.get(digest)
+
+    if claims is None:
+        try:
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except Exception as e:
+            raise InvalidToken(str(e))
+        if "sub" not in claims or "exp" not in claims:
+            raise InvalidToken("missing claims")
+        token_cache.set(digest, claims)
+
+    if revoked_tokens.is_revoked(claims.get("jti")):
+        raise InvalidToken("token revoked")
+    return claims
+
+
+def revoke_token(claims):
+    revoked_tokens.revoke(claims.get("jti"), claims["exp"])
@@ -1,5 +1,5 @@
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 DATABASE_URL = "sqlite:///./chaindocs.db"
@@ -7,3 +7,20 @@ DATABASE_URL = "sqlite:///./chaindocs.db"
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(bind=engine)
 Base = declarative_base()
+
+# Bump when the models change; stored in SQLite's PRAGMA user_version
+# (create_all only adds the missing tables)
+SCHEMA_VERSION = 2
+
+def init_db():
+    """
+    Creates the tables on first run. Once the file carries the current
+    SCHEMA_VERSION, startup costs one PRAGMA read instead of create_all.
+    """
+    with engine.connect() as conn:
+        if conn.execute(text("PRAGMA user_version")).scalar() >= SCHEMA_VERSION:
+            return
+    from app.models import user, revoked_token  # noqa: F401  (registers the tables)
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
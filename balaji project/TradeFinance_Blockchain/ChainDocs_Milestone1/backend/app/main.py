@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import auth
+from app.core.security import hasher
+from app.database import init_db
 
 app = FastAPI(title="ChainDocs Milestone 1")
 
@@ -13,3 +15,11 @@ app.add_middleware(
 )
 
 app.include_router(auth.router)
+
+@app.on_event("startup")
+def startup():
+    init_db()
+
+@app.on_event("shutdown")
+def shutdown():
+    hasher.shutdown()
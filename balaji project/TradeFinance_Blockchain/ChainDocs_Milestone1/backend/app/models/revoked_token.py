@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Float, String
+from app.database import Base
+
+class RevokedToken(Base):
+    """
+    Revoked access token id (jti), shared by every worker. Kept until
+    the token would have expired anyway (expires_at, unix time).
+    """
+    __tablename__ = "revoked_tokens"
+    jti = Column(String, primary_key=True)
+    expires_at = Column(Float, nullable=False, index=True)
@@ -1,12 +1,11 @@
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine
+from starlette.concurrency import run_in_threadpool
+from app.database import SessionLocal
 from app.models.user import User
-from app.core.security import hash_password, verify_password, create_token
-from app.database import Base
-
-Base.metadata.create_all(bind=engine)
+from app.core.deps import get_current_user
+from app.core.security import HasherBusy, create_token, hasher, login_cache, revoke_token
 
 router = APIRouter(prefix="/auth")
 
@@ -15,26 +14,79 @@ def get_db():
     try: yield db
     finally: db.close()
 
+def busy():
+    return HTTPException(503, "Server busy, please retry", headers={"Retry-After": "1"})
+
+# Handlers stay async so bcrypt is awaited on the hasher pool without
+# holding a threadpool thread; the sync Session work runs in the
+# threadpool, never on the event loop.
+def _find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+def _add_user(db: Session, user: User):
+    db.add(user)
+    db.commit()
+
+def _update_password(db: Session, user: User, hashed: str):
+    user.password = hashed
+    db.commit()
+
 @router.post("/register")
-def register(user: dict, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == user["email"]).first():
+async def register(user: dict, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_find_user, db, user["email"]):
         raise HTTPException(400, "Email exists")
+    try:
+        hashed = await hasher.hash(user["password"])
+    except HasherBusy:
+        raise busy()
     u = User(
         name=user["name"],
         email=user["email"],
-        password=hash_password(user["password"]),
+        password=hashed,
         role=user["role"],
         org_name=user["org_name"]
     )
-    db.add(u)
-    db.commit()
+    await run_in_threadpool(_add_user, db, u)
     return {"message": "registered"}
 
 @router.post("/login")
-def login(data: dict, db: Session = Depends(get_db)):
-    u = db.query(User).filter(User.email == data["email"]).first()
-    if not u or not verify_password(data["password"], u.password):
+async def login(data: dict, db: Session = Depends(get_db)):
+    u = await run_in_threadpool(_find_user, db, data["email"])
+    if not u:
         raise HTTPException(401, "invalid credentials")
-    return {
-        "access_token": create_token({"sub": u.email}, 30)
+
+    # read before any commit expires the instance (a reload would be
+    # a query on the event loop)
+    email, stored_hash = u.email, u.password
+    # role/org travel in the token so protected routes skip the DB
+    claims = {
+        "sub": email,
+        "uid": u.id,
+        "role": u.role.value if u.role else None,
+        "org": u.org_name
     }
+
+    # Retried login with the same credentials: skip bcrypt
+    if not login_cache.check(email, data["password"], stored_hash):
+        try:
+            ok, new_hash = await hasher.verify_and_update(data["password"], stored_hash)
+        except HasherBusy:
+            raise busy()
+        if not ok:
+            raise HTTPException(401, "invalid credentials")
+        if new_hash:
+            # hash used an older bcrypt cost: upgrade it transparently
+            await run_in_threadpool(_update_password, db, u, new_hash)
+            stored_hash = new_hash
+        login_cache.remember(email, data["password"], stored_hash)
+
+    return {"access_token": create_token(claims, 30)}
+
+@router.get("/me")
+def me(user: dict = Depends(get_current_user)):
+    return {k: user.get(k) for k in ("sub", "uid", "role", "org")}
+
+@router.post("/logout")
+def logout(user: dict = Depends(get_current_user)):
+    revoke_token(user)
+    return {"message": "logged out"}
@@ -0,0 +1,76 @@
+"""
+Per-request auth overhead.
+
+  decode+db    jwt.decode, then SELECT the user by email (old pattern)
+  decode       jwt.decode only (claims in token, cold cache)
+  cached       decode_token hit: sha256 + LRU lookup + revocation check
+
+Usage (from backend/):
+    python -m benchmarks.bench_auth --iterations 20000
+"""
+import argparse
+import time
+
+from jose import jwt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.security import (
+    ALGORITHM, SECRET_KEY, create_token, decode_token, token_cache
+)
+from app.database import Base
+from app.models.user import User
+
+
+def _per_call_us(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def run(iterations: int):
+    # private in-memory DB so the benchmark never touches chaindocs.db
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(name="bench", email="bench@example.com", password="x",
+                role="bank", org_name="Bench Org"))
+    db.commit()
+
+    token = create_token({
+        "sub": "bench@example.com", "uid": 1, "role": "bank", "org": "Bench Org"
+    }, 30)
+
+    def decode_and_lookup():
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        db.query(User).filter(User.email == claims["sub"]).first()
+        db.expire_all()
+
+    def decode_cold():
+        token_cache.clear()
+        decode_token(token)
+
+    def decode_cached():
+        decode_token(token)
+
+    results = {
+        "decode+db": _per_call_us(decode_and_lookup, iterations),
+        "decode": _per_call_us(decode_cold, iterations),
+        "cached": _per_call_us(decode_cached, iterations)
+    }
+    db.close()
+
+    for name, us in results.items():
+        print(f"{name:<10} {us:>10.2f} us/request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    run(args.iterations)